@@ -0,0 +1,95 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from models.article import Article, json_default
+
+logger = logging.getLogger(__name__)
+
+
+class RunState:
+    """运行检查点 - 记录RSS结果、排序结果和已抓取的全文，失败重跑时从断点继续"""
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.data = {
+            'started_at': datetime.utcnow().isoformat(),
+            'feeds': {},          # "source/category" -> 文章列表
+            'selected': None,     # 排序选择后的文章列表
+            'full_content': {},   # 文章ID -> 全文
+        }
+        self.resumed = False
+        # 推测式爬取时爬取线程和主线程都会写检查点
+        self._lock = threading.RLock()
+        self._load()
+    
+    def _load(self):
+        """读取已有的检查点"""
+        if not self.path.exists():
+            return
+        
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.data.update(data)
+            self.resumed = True
+            logger.info(f"Resuming from checkpoint {self.path}: "
+                       f"{len(self.data['feeds'])} feeds, "
+                       f"{len(self.data['full_content'])} full-content pages")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+    
+    def save(self):
+        """原子写入检查点（先写临时文件再替换，避免中途被杀留下半个文件）"""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, ensure_ascii=False, default=json_default)
+            os.replace(tmp_path, self.path)
+    
+    def clear(self):
+        """运行成功后删除检查点"""
+        if self.path.exists():
+            self.path.unlink()
+    
+    def get_feed(self, key: str) -> Optional[List[Article]]:
+        """获取已抓取的RSS源结果"""
+        return self._articles(self.data['feeds'].get(key))
+    
+    def save_feed(self, key: str, articles: List[dict]):
+        """记录单个RSS源的抓取结果"""
+        with self._lock:
+            self.data['feeds'][key] = articles
+            self.save()
+    
+    def get_selected(self) -> Optional[List[Article]]:
+        """获取已保存的排序选择结果"""
+        return self._articles(self.data['selected'])
+    
+    @staticmethod
+    def _articles(items: Optional[list]) -> Optional[List[Article]]:
+        """从检查点读出的字典转换为文章记录（本次运行写入的已经是文章记录）"""
+        if items is None:
+            return None
+        return [a if isinstance(a, Article) else Article.from_dict(a) for a in items]
+    
+    def save_selected(self, articles: List[dict]):
+        """记录排序选择结果"""
+        with self._lock:
+            self.data['selected'] = articles
+            self.save()
+    
+    def get_full_content(self, article_id: str) -> Optional[str]:
+        """获取已抓取的全文"""
+        return self.data['full_content'].get(article_id)
+    
+    def save_full_content(self, article_id: str, content: str):
+        """记录单篇文章的全文"""
+        with self._lock:
+            self.data['full_content'][article_id] = content
+            self.save()
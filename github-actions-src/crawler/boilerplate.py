@@ -0,0 +1,110 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+_WS_RE = re.compile(r'\s+')
+_DIGIT_RE = re.compile(r'\d+')
+
+
+class BoilerplateTable:
+    """按来源域名统计重复段落的频率表
+
+    同一域名下出现在多篇文章中的段落（订阅提示、版权声明、作者联系方式等）视为模板文字并删除。
+    表持久化为JSON文件，跨运行累积；每篇文章只计一次，同一URL重复抓取不会重复计数。
+    """
+
+    def __init__(self, config: dict, clock: Callable[[], float] = time.time):
+        cleaning_config = config.get('cleaning', {})
+        self.path = Path(cleaning_config.get('boilerplate_path', 'data/boilerplate.json'))
+        self.min_count = cleaning_config.get('boilerplate_min_count', 3)
+        self.ttl_seconds = cleaning_config.get('boilerplate_ttl_days', 30) * 86400
+        self.max_entries = cleaning_config.get('boilerplate_max_entries', 2000)
+        self.max_urls = cleaning_config.get('boilerplate_max_urls', 500)
+        self.clock = clock
+
+        # 域名 -> {'paragraphs': {段落指纹: [文章数, 最后出现时间]}, 'urls': [最近统计过的URL指纹]}
+        self.domains: Dict[str, dict] = {}
+        self.removed = 0
+        self._load()
+
+    def _load(self):
+        """读取已有的频率表"""
+        if not self.path.exists():
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.domains = json.load(f)
+            logger.info(f"Loaded boilerplate table: {len(self.domains)} domains")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable boilerplate table {self.path}: {e}")
+            self.domains = {}
+
+    def save(self):
+        """清理过期/低频条目后原子写入"""
+        cutoff = self.clock() - self.ttl_seconds
+        for domain in list(self.domains):
+            entry = self.domains[domain]
+            paragraphs = {key: value for key, value in entry['paragraphs'].items() if value[1] >= cutoff}
+            if len(paragraphs) > self.max_entries:
+                # 保留出现次数最多、最近出现的段落
+                keep = sorted(paragraphs.items(), key=lambda item: (item[1][0], item[1][1]), reverse=True)
+                paragraphs = dict(keep[:self.max_entries])
+            if paragraphs:
+                entry['paragraphs'] = paragraphs
+                entry['urls'] = entry['urls'][-self.max_urls:]
+            else:
+                del self.domains[domain]
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.domains, f)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def domain_of(url: str) -> str:
+        """提取来源域名（去掉www.前缀）"""
+        host = urlparse(url).netloc.lower()
+        return host[4:] if host.startswith('www.') else host
+
+    @staticmethod
+    def _fingerprint(text: str) -> str:
+        """段落指纹：忽略大小写、空白和数字（年份、日期变化不影响匹配）"""
+        normalized = _DIGIT_RE.sub('0', _WS_RE.sub(' ', text.strip().lower()))
+        return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).hexdigest()
+
+    def strip(self, url: str, content: str) -> str:
+        """统计本文段落并删除已达到阈值的模板段落"""
+        if not content:
+            return content
+
+        domain = self.domain_of(url)
+        entry = self.domains.setdefault(domain, {'paragraphs': {}, 'urls': []})
+        paragraphs = content.split('\n\n')
+        fingerprints = [self._fingerprint(p) for p in paragraphs]
+
+        url_key = hashlib.blake2b(url.encode('utf-8'), digest_size=8).hexdigest()
+        if url_key not in entry['urls']:
+            entry['urls'].append(url_key)
+            now = self.clock()
+            for key in set(fingerprints):
+                counts = entry['paragraphs'].setdefault(key, [0, now])
+                counts[0] += 1
+                counts[1] = now
+
+        table = entry['paragraphs']
+        kept: List[str] = [
+            p for p, key in zip(paragraphs, fingerprints)
+            if table.get(key, (0,))[0] < self.min_count
+        ]
+        self.removed += len(paragraphs) - len(kept)
+        return '\n\n'.join(kept)
@@ -0,0 +1,104 @@
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlBudget:
+    """运行时间预算 - 知道本次运行的截止时间，按主机历史耗时估计单篇成本
+
+    截止时间优先取环境变量 RUN_DEADLINE（Unix时间戳，由工作流在爬取步骤开始时写入），
+    否则按 deadline.max_runtime 从进程启动算起；两者都没有时不限时间。
+    预计耗时超过剩余时间时不再开始新的抓取，保证有时间写出结果。时钟可注入，便于用假时钟测试。
+    """
+
+    def __init__(self, config: dict, clock: Callable[[], float] = time.time):
+        deadline_config = config.get('deadline', {})
+        self.clock = clock
+        self.reserve = deadline_config.get('reserve_seconds', 120)
+        self.default_cost = deadline_config.get('default_page_cost', 20)
+        self.history_path = Path(deadline_config.get('history_path', 'data/crawl_costs.json'))
+        self.history_size = deadline_config.get('history_size', 20)
+
+        env_deadline = os.environ.get('RUN_DEADLINE')
+        max_runtime = deadline_config.get('max_runtime', 0)
+        if env_deadline:
+            self.deadline: Optional[float] = float(env_deadline)
+        elif max_runtime:
+            self.deadline = clock() + max_runtime
+        else:
+            self.deadline = None
+
+        self.history: Dict[str, List[float]] = {}
+        self.skipped = 0
+        self._load()
+
+        if self.deadline is not None:
+            logger.info(f"Run deadline in {self.deadline - clock():.0f}s (reserving {self.reserve}s for output)")
+
+    def _load(self):
+        """读取各主机的历史单篇耗时"""
+        if not self.history_path.exists():
+            return
+        try:
+            with open(self.history_path, 'r', encoding='utf-8') as f:
+                self.history = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable crawl cost history {self.history_path}: {e}")
+
+    def save(self):
+        """保存历史耗时（失败不影响本次运行）"""
+        try:
+            self.history_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.history_path.with_suffix(self.history_path.suffix + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.history, f)
+            os.replace(tmp_path, self.history_path)
+        except OSError as e:
+            logger.warning(f"Failed to save crawl cost history: {e}")
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def remaining(self) -> Optional[float]:
+        """距截止时间（扣除保留时间）还剩多少秒；不限时返回None"""
+        if self.deadline is None:
+            return None
+        return self.deadline - self.reserve - self.clock()
+
+    def estimate(self, url: str) -> float:
+        """按主机历史估计单篇耗时：取最近样本的80分位，没有样本时用默认值"""
+        samples = sorted(self.history.get(self._host(url), []))
+        if not samples:
+            return self.default_cost
+        return samples[min(len(samples) - 1, int(len(samples) * 0.8))]
+
+    def can_start(self, url: str) -> bool:
+        """剩余时间是否够抓取这一篇"""
+        remaining = self.remaining()
+        if remaining is None:
+            return True
+        if remaining >= self.estimate(url):
+            return True
+        self.skipped += 1
+        return False
+
+    def record(self, url: str, seconds: float):
+        """记录一次单篇抓取耗时"""
+        samples = self.history.setdefault(self._host(url), [])
+        samples.append(round(seconds, 2))
+        del samples[:-self.history_size]
+
+    def get_stats(self) -> dict:
+        """预算统计"""
+        remaining = self.remaining()
+        return {
+            'remaining_seconds': round(remaining, 1) if remaining is not None else None,
+            'skipped_for_deadline': self.skipped,
+        }
@@ -0,0 +1,138 @@
+import logging
+import re
+from typing import List, Optional, Pattern
+
+logger = logging.getLogger(__name__)
+
+MAX_CONTENT_LENGTH = 8000
+
+# 截断标记：正文中出现任一标记时，丢弃标记及其后的内容
+DEFAULT_TRUNCATE_MARKERS = [
+    'Sign up for',
+    'Subscribe to',
+    'Read more:',
+    'To contact the author',
+    'To contact the editor',
+    'Most Read from Bloomberg',
+    'Before it\'s here, it\'s on the Bloomberg Terminal',
+]
+
+# 版权行匹配任意年份
+COPYRIGHT_PATTERN = r'©\s*\d{4}\s+Bloomberg L\.P\.'
+
+
+def compile_markers(markers: Optional[List[str]] = None) -> Pattern:
+    """把截断标记编译成一个正则，一次扫描找到最早出现的标记"""
+    markers = DEFAULT_TRUNCATE_MARKERS if markers is None else markers
+    # 长标记优先，避免被其前缀抢先匹配
+    alternatives = [re.escape(m) for m in sorted(markers, key=len, reverse=True)]
+    alternatives.append(COPYRIGHT_PATTERN)
+    return re.compile('|'.join(alternatives))
+
+
+_DEFAULT_MATCHER = compile_markers()
+
+# 正文选择器（Bloomberg的HTML结构可能变化，按顺序尝试）
+SELECTORS = [
+    'article[data-testid="paragraph"]',
+    'article p',
+    '[data-testid="paragraph"]',
+    '.article-body__content p',
+    '.article-body p',
+    'article .body-content p',
+    'article .body__content p',
+    'article section p',
+]
+MAX_PARAGRAPHS = 20         # 选择器命中时最多取20段
+MIN_PARAGRAPH_LENGTH = 20   # 过滤短段落
+FALLBACK_MIN_LENGTH = 100   # 备用方案：较长的段落可能是正文
+FALLBACK_MAX_PARAGRAPHS = 15
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# 在页面内执行同样的选择器级联，只把段落文本传回Python（不序列化整个DOM）
+DOM_EXTRACT_SCRIPT = """
+([selectors, maxParagraphs, minLength, fallbackMinLength, fallbackMax]) => {
+    for (const selector of selectors) {
+        const parts = [];
+        for (const p of Array.from(document.querySelectorAll(selector)).slice(0, maxParagraphs)) {
+            const text = p.textContent.replace(/\\s+/g, ' ').trim();
+            if (text.length > minLength) parts.push(text);
+        }
+        if (parts.length) return parts;
+    }
+    const parts = [];
+    for (const p of document.querySelectorAll('p')) {
+        const text = p.textContent.replace(/\\s+/g, ' ').trim();
+        if (text.length > fallbackMinLength) parts.push(text);
+        if (parts.length >= fallbackMax) break;
+    }
+    return parts;
+}
+"""
+DOM_EXTRACT_ARGS = [SELECTORS, MAX_PARAGRAPHS, MIN_PARAGRAPH_LENGTH, FALLBACK_MIN_LENGTH, FALLBACK_MAX_PARAGRAPHS]
+
+
+def paragraph_text(tag) -> str:
+    """段落文本：与页面内 textContent 相同地保留原有空白，再把连续空白合并为一个空格
+
+    不能用 get_text(strip=True)，它会把行内元素的文字直接粘在一起（"Reserveheld"）；
+    两条提取路径必须得到相同的文本，否则模板段落指纹和全文哈希都会随路径变化。
+    """
+    return _WHITESPACE_RE.sub(' ', tag.get_text()).strip()
+
+
+def extract_content(html: str, url: str, matcher: Optional[Pattern] = None,
+                    max_length: Optional[int] = MAX_CONTENT_LENGTH) -> str:
+    """从HTML中提取文章内容（模块级函数，可在进程池中执行）
+
+    max_length 为 None 时不截断，由调用方在去除模板段落后再截断。
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+
+    content_parts = []
+
+    for selector in SELECTORS:
+        paragraphs = soup.select(selector)
+        if paragraphs:
+            for p in paragraphs[:MAX_PARAGRAPHS]:
+                text = paragraph_text(p)
+                if text and len(text) > MIN_PARAGRAPH_LENGTH:
+                    content_parts.append(text)
+
+            if content_parts:
+                break
+
+    if not content_parts:
+        # 备用方案：提取所有正文段落
+        for p in soup.find_all('p'):
+            text = paragraph_text(p)
+            if len(text) > FALLBACK_MIN_LENGTH:
+                content_parts.append(text)
+            if len(content_parts) >= FALLBACK_MAX_PARAGRAPHS:
+                break
+
+    return build_content(content_parts, matcher, max_length)
+
+
+def build_content(content_parts: List[str], matcher: Optional[Pattern] = None,
+                  max_length: Optional[int] = MAX_CONTENT_LENGTH) -> Optional[str]:
+    """拼接段落并清理（HTML解析和页面内提取共用）"""
+    content = '\n\n'.join(content_parts)
+
+    # 清理内容
+    content = clean_content(content, matcher)
+
+    if not content:
+        return None
+    return content[:max_length] if max_length else content  # 限制长度
+
+
+def clean_content(content: str, matcher: Optional[Pattern] = None) -> str:
+    """清理文章内容：在最早出现的截断标记处截断"""
+    match = (matcher or _DEFAULT_MATCHER).search(content)
+    if match:
+        content = content[:match.start()]
+
+    return content.strip()
@@ -0,0 +1,159 @@
+import logging
+import queue
+import threading
+from typing import Dict, List, Optional
+
+from crawler.stealth_browser import StealthBrowser
+from selector.article_ranker import ArticleRanker
+from sources.registry import Feed
+
+logger = logging.getLogger(__name__)
+
+_DONE = None  # 队列结束标记
+
+
+class SpeculativeCrawler:
+    """推测式全文爬取：RSS还在下载时就开始爬取暂定的候选文章
+
+    每个源抓取完成后，用已到达的全部文章做一次暂定排序，把新进入全文名单的文章放进爬取队列；
+    还没开始爬取的文章如果在后续排序中掉出名单就取消。最终排序完成后补齐遗漏的候选，
+    取消其余排队文章，等待队列爬完。Playwright只在爬取线程里使用。
+    """
+
+    def __init__(self, browser: StealthBrowser, ranker: ArticleRanker, config: dict, state=None):
+        self.browser = browser
+        self.ranker = ranker
+        self.state = state
+        browser_config = config.get('browser', {})
+        full_content_count = config['selection']['full_content_count']
+        self.max_speculative = browser_config.get('max_speculative', full_content_count * 2)
+
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        # 文章ID -> queued / cancelled / started / skipped
+        self._status: Dict[str, str] = {}
+        self._seen: List[dict] = []
+        self._speculated = 0
+        self._thread: Optional[threading.Thread] = None
+        self.error: Optional[Exception] = None
+        self.stats = {'speculated': 0, 'cancelled': 0, 'wasted': 0, 'late': 0}
+
+    def start(self):
+        """启动爬取线程（拿到第一篇文章后才启动浏览器）"""
+        self._thread = threading.Thread(target=self._run, name='speculative-crawler', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            self.browser.crawl(self._iter_queue(), state=self.state)
+        except Exception as e:
+            # 浏览器崩溃时保留已完成的部分
+            logger.error(f"Crawler failed, keeping partial results: {e}")
+            self.error = e
+
+    def _iter_queue(self):
+        """按入队顺序取出文章，跳过已取消的"""
+        while True:
+            article = self._queue.get()
+            if article is _DONE:
+                return
+            with self._lock:
+                if self._status.get(article['id']) == 'cancelled':
+                    self._status[article['id']] = 'skipped'
+                    logger.info(f"  Skipping cancelled candidate: {article['title'][:50]}")
+                    continue
+                self._status[article['id']] = 'started'
+            yield article
+
+    def _enqueue(self, article: dict) -> bool:
+        """放入爬取队列；已有检查点全文的直接复用。返回是否新放入队列"""
+        cached = self.state.get_full_content(article['id']) if self.state is not None else None
+        if cached:
+            article['full_content'] = cached
+            article['has_full_content'] = True
+            return False
+
+        with self._lock:
+            status = self._status.get(article['id'])
+            if status == 'cancelled':
+                # 还在队列里，恢复即可
+                self._status[article['id']] = 'queued'
+                return False
+            if status in ('queued', 'started'):
+                return False
+            self._status[article['id']] = 'queued'
+        self._queue.put(article)
+        return True
+
+    def _cancel_except(self, keep_ids: set):
+        """取消不在名单里、还没开始爬取的文章"""
+        with self._lock:
+            for article_id, status in self._status.items():
+                if status == 'queued' and article_id not in keep_ids:
+                    self._status[article_id] = 'cancelled'
+
+    def on_feed(self, feed: Feed, articles: List[dict]):
+        """RSS源完成回调：用已到达的文章做暂定排序，提前把候选文章放进队列"""
+        # 同一篇文章可能出现在多个源中（ID相同），只记一次
+        known = {a['id'] for a in self._seen}
+        self._seen.extend(a for a in articles if a['id'] not in known)
+        if not self.ranker.registry.can_crawl(feed.source) or self._speculated >= self.max_speculative:
+            return
+
+        # 在副本上排序，避免暂定结果写进文章的 fetch_full_content 标记
+        by_id = {a['id']: a for a in self._seen}
+        provisional = self.ranker.select_top_articles([a.copy() for a in self._seen])
+        candidates = [by_id[a['id']] for a in provisional if a.get('fetch_full_content')]
+
+        self._cancel_except({a['id'] for a in candidates})
+        for article in candidates:
+            if self._speculated >= self.max_speculative:
+                break
+            if self._enqueue(article):
+                self._speculated += 1
+                logger.info(f"  Speculatively queued after {feed.key}: {article['title'][:50]}")
+
+    def finish(self, selected_articles: List[dict]) -> List[dict]:
+        """按最终排序补齐/取消队列并等待爬取结束，把全文写回最终入选的文章"""
+        by_id = {a['id']: a for a in self._seen}
+        final = [a for a in selected_articles if a.get('fetch_full_content')]
+
+        self._cancel_except({a['id'] for a in final})
+        for article in final:
+            # 最终入选文章与RSS结果通常是同一个对象；从检查点恢复的排序结果则按ID找回
+            target = by_id.get(article['id'], article)
+            if self._enqueue(target):
+                self.stats['late'] += 1
+        self._queue.put(_DONE)
+        if self._thread is not None:
+            self._thread.join()
+
+        final_ids = {a['id'] for a in final}
+        with self._lock:
+            statuses = dict(self._status)
+        self.stats['speculated'] = self._speculated
+        self.stats['cancelled'] = sum(1 for status in statuses.values() if status == 'skipped')
+        self.stats['wasted'] = sum(1 for article_id, status in statuses.items()
+                                   if status == 'started' and article_id not in final_ids)
+
+        for article in final:
+            source = by_id.get(article['id'], article)
+            if source is not article and source.get('full_content'):
+                article['full_content'] = source['full_content']
+            article['has_full_content'] = bool(article.get('full_content'))
+
+        logger.info(f"Speculative crawl: {self.stats['speculated']} queued early, "
+                   f"{self.stats['late']} queued after ranking, {self.stats['cancelled']} cancelled, "
+                   f"{self.stats['wasted']} crawled but not selected")
+        return selected_articles
+
+    def stop(self):
+        """放弃剩余队列并结束爬取线程（提前退出时调用）"""
+        self._cancel_except(set())
+        self._queue.put(_DONE)
+        if self._thread is not None:
+            self._thread.join()
+
+    def get_stats(self) -> dict:
+        """爬虫统计（浏览器统计 + 推测式爬取统计）"""
+        return {**self.browser.get_stats(), 'speculative': dict(self.stats)}
@@ -1,114 +1,294 @@
+import itertools
 import logging
+import multiprocessing
+import os
 import random
+import statistics
 import time
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
 
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
-from bs4 import BeautifulSoup
+from crawler.boilerplate import BoilerplateTable
+from crawler.deadline import CrawlBudget
+from crawler.extraction import (DOM_EXTRACT_ARGS, DOM_EXTRACT_SCRIPT, MAX_CONTENT_LENGTH, build_content,
+                                clean_content, compile_markers, extract_content)
+from net.rate_limiter import HostRateLimiter
+from net.retry import DeadlineExceeded, HTTPStatusError, RetryPolicy
 
 logger = logging.getLogger(__name__)
 
+LAUNCH_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--disable-web-security',
+    '--disable-features=IsolateOrigins,site-per-process',
+]
+
+STEALTH_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined
+    });
+    Object.defineProperty(navigator, 'plugins', {
+        get: () => [1, 2, 3, 4, 5]
+    });
+    window.chrome = { runtime: {} };
+"""
+
 
 class StealthBrowser:
     """隐形浏览器 - 用于爬取文章全文"""
     
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, rate_limiter: Optional[HostRateLimiter] = None,
+                 retry_policy: Optional[RetryPolicy] = None, budget: Optional[CrawlBudget] = None):
         self.config = config
         self.fetching_config = config['fetching']
+        self.browser_config = config.get('browser', {})
+        self.rate_limiter = rate_limiter or HostRateLimiter(config)
+        self.retry_policy = retry_policy or RetryPolicy(config)
+        self.budget = budget or CrawlBudget(config)
+        self.reading_pause = self.browser_config.get('reading_pause', [1, 2])
+        self.extract_workers = self.browser_config.get('extract_workers') or os.cpu_count() or 1
+        # dom：在页面内提取段落文本，失败时再取整页HTML交给进程池；html：总是取整页HTML
+        self.extraction = self.browser_config.get('extraction', 'dom')
+        
+        # 截断标记预编译为单个正则；重复段落由按域名的频率表识别
+        self.noise_matcher = compile_markers(config.get('cleaning', {}).get('truncate_markers'))
+        self.boilerplate = BoilerplateTable(config)
+        
+        # 环境变量优先于配置文件（便于在Actions/服务器上切换）
+        self.cdp_endpoint = os.environ.get('BROWSER_CDP_ENDPOINT') or self.browser_config.get('cdp_endpoint', '')
+        self.user_data_dir = os.environ.get('BROWSER_USER_DATA_DIR') or self.browser_config.get('user_data_dir', '')
+        
+        # 性能统计：浏览器启动耗时与每篇文章的首字节时间
+        self.stats = {
+            'mode': self._mode(),
+            'launch_ms': None,
+            'first_byte_ms': [],
+            'extraction': {'dom': 0, 'html': 0},
+            'transfer_bytes': 0,  # 从页面传回Python的数据量（段落文本或整页HTML）
+        }
+    
+    def _mode(self) -> str:
+        """浏览器运行模式：cdp（连接已运行的浏览器）/ persistent（持久化配置目录）/ fresh"""
+        if self.cdp_endpoint:
+            return 'cdp'
+        if self.user_data_dir:
+            return 'persistent'
+        return 'fresh'
     
-    def fetch_full_content(self, articles: List[dict]) -> List[dict]:
-        """为标记的文章抓取全文"""
-        articles_to_fetch = [a for a in articles if a.get('fetch_full_content')]
+    def fetch_full_content(self, articles: List[dict], state=None) -> List[dict]:
+        """为标记的文章抓取全文（传入state时复用检查点中已抓取的全文，并逐篇记录）"""
+        articles_to_fetch = []
+        for article in articles:
+            if not article.get('fetch_full_content'):
+                continue
+            cached = state.get_full_content(article['id']) if state is not None else None
+            if cached:
+                article['full_content'] = cached
+                article['has_full_content'] = True
+            else:
+                articles_to_fetch.append(article)
         
         if not articles_to_fetch:
-            logger.info("No articles marked for full content fetching")
+            logger.info("No articles left for full content fetching")
             return articles
         
         logger.info(f"Fetching full content for {len(articles_to_fetch)} articles...")
+        self.crawl(articles_to_fetch, state=state, total=len(articles_to_fetch))
+        return articles
+    
+    def crawl(self, articles: Iterable[dict], state=None, total: Optional[int] = None):
+        """逐篇爬取全文
         
-        with sync_playwright() as p:
-            # 启动浏览器（无头模式）
-            browser = p.chromium.launch(
-                headless=True,
-                args=[
-                    '--disable-blink-features=AutomationControlled',
-                    '--disable-web-security',
-                    '--disable-features=IsolateOrigins,site-per-process',
-                ]
-            )
-            
-            # 创建新上下文（隔离Cookie和缓存）
-            context = browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent=random.choice(self.fetching_config['user_agents']),
-                locale='en-US',
-                timezone_id='America/New_York',
-            )
-            
-            # 添加 stealth 脚本
-            context.add_init_script("""
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined
-                });
-                Object.defineProperty(navigator, 'plugins', {
-                    get: () => [1, 2, 3, 4, 5]
-                });
-                window.chrome = { runtime: {} };
-            """)
-            
-            page = context.new_page()
-            
-            try:
-                for i, article in enumerate(articles_to_fetch):
-                    try:
-                        logger.info(f"Fetching article {i+1}/{len(articles_to_fetch)}: {article['title'][:50]}...")
-                        
-                        # 随机延迟，模拟人工浏览
-                        delay = self.fetching_config['delay_between_requests'] + random.uniform(
-                            0, self.fetching_config['delay_jitter'] * 2
-                        )
-                        time.sleep(delay)
-                        
-                        content = self._fetch_single_article(page, article['link'])
-                        
-                        if content:
-                            article['full_content'] = content
-                            article['has_full_content'] = True
-                            logger.info(f"  ✓ Successfully fetched {len(content)} characters")
-                        else:
-                            logger.warning(f"  ✗ Failed to extract content")
+        articles 可以是阻塞的迭代器（如推测式爬取的队列），拿到第一篇文章后才启动浏览器；
+        Playwright同步API只能在调用本方法的线程里使用。
+        """
+        iterator = iter(articles)
+        first = next(iterator, None)
+        if first is None:
+            return
+        
+        # 延迟导入：没有文章需要全文时不加载Playwright
+        from playwright.sync_api import sync_playwright
+        
+        # HTML解析放到进程池里，浏览器只负责取页面，不等解析。
+        # 用spawn而不是fork：Playwright已启动线程和子进程，fork不安全
+        pool = ProcessPoolExecutor(
+            max_workers=min(self.extract_workers, total or self.extract_workers),
+            mp_context=multiprocessing.get_context('spawn')
+        )
+        pending = {}
+        
+        try:
+            with sync_playwright() as p:
+                start = time.perf_counter()
+                browser, context, owns_context = self._open_context(p)
+                self.stats['launch_ms'] = round((time.perf_counter() - start) * 1000, 1)
+                logger.info(f"Browser ready ({self.stats['mode']}) in {self.stats['launch_ms']}ms")
+                
+                page = context.new_page()
+                
+                try:
+                    for i, article in enumerate(itertools.chain([first], iterator)):
+                        # 按排名顺序抓取；剩余时间不够时不再开始新的页面，保证能写出已完成的结果
+                        if not self.budget.can_start(article['link']):
+                            logger.warning(f"  ✗ Skipping, not enough time before deadline: {article['title'][:50]}")
                             article['has_full_content'] = False
+                            continue
+                        
+                        try:
+                            logger.info(f"Fetching article {i+1}/{total or '?'}: {article['title'][:50]}...")
                             
-                    except Exception as e:
-                        logger.error(f"  ✗ Error fetching article: {e}")
-                        article['has_full_content'] = False
-                        continue
-            
-            finally:
-                context.close()
-                browser.close()
+                            started = self.budget.clock()
+                            result = self._fetch_single_article(page, article['link'])
+                            self.budget.record(article['link'], self.budget.clock() - started)
+                            
+                            if isinstance(result, list):
+                                # 页面内已提取出段落，拼接清理很轻，直接在当前线程完成
+                                self._finish_article(article, build_content(result, self.noise_matcher, None), state)
+                            elif result:
+                                pending[pool.submit(extract_content, result, article['link'], self.noise_matcher, None)] = article
+                            else:
+                                article['has_full_content'] = False
+                                
+                        except Exception as e:
+                            logger.error(f"  ✗ Error fetching article: {e}")
+                            article['has_full_content'] = False
+                        
+                        # 顺手收取已经解析完的结果（不阻塞）
+                        self._collect_extractions(pending, state, wait=False)
+                
+                finally:
+                    page.close()
+                    if owns_context:
+                        context.close()
+                    if browser:
+                        # CDP模式下只断开连接，不会关闭外部浏览器
+                        browser.close()
+        finally:
+            # 浏览器关闭（或崩溃）后等待剩余的解析结果，已取到的页面不浪费
+            self._collect_extractions(pending, state, wait=True)
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._save_boilerplate()
+            self.budget.save()
         
-        return articles
+        self._log_stats()
+    
+    def _collect_extractions(self, pending: Dict, state, wait: bool):
+        """把已完成的解析结果写回文章（在爬取线程里执行，进程池只负责解析）"""
+        for future in list(pending):
+            if not wait and not future.done():
+                continue
+            article = pending.pop(future)
+            try:
+                content = future.result()
+            except Exception as e:
+                logger.error(f"  ✗ Error extracting {article['link']}: {e}")
+                content = None
+            self._finish_article(article, content, state)
+    
+    def _finish_article(self, article: dict, content: Optional[str], state):
+        """去除模板段落后写回文章并记录检查点"""
+        if content:
+            # 模板段落在主进程里去除：频率表需要跨文章累积
+            content = self.boilerplate.strip(article['link'], content)[:MAX_CONTENT_LENGTH]
+        
+        if content:
+            article['full_content'] = content
+            article['has_full_content'] = True
+            if state is not None:
+                state.save_full_content(article['id'], content)
+            logger.info(f"  ✓ Extracted {len(content)} characters: {article['title'][:50]}")
+        else:
+            logger.warning(f"  ✗ Failed to extract content: {article['title'][:50]}")
+            article['has_full_content'] = False
+    
+    def _save_boilerplate(self):
+        """保存模板段落频率表（失败不影响本次抓取结果）"""
+        try:
+            self.boilerplate.save()
+            logger.info(f"Removed {self.boilerplate.removed} boilerplate paragraphs")
+        except OSError as e:
+            logger.warning(f"Failed to save boilerplate table: {e}")
+    
+    def _open_context(self, p):
+        """根据配置打开浏览器上下文，返回 (browser, context, 是否由本次运行创建context)"""
+        context_options = {
+            'viewport': {'width': 1920, 'height': 1080},
+            'user_agent': random.choice(self.fetching_config['user_agents']),
+            'locale': 'en-US',
+            'timezone_id': 'America/New_York',
+        }
+        
+        if self.cdp_endpoint:
+            # 连接已运行的Chromium，复用其HTTP缓存、DNS、TLS会话和Cookie
+            browser = p.chromium.connect_over_cdp(self.cdp_endpoint)
+            if browser.contexts:
+                context = browser.contexts[0]
+                context.add_init_script(STEALTH_SCRIPT)
+                return browser, context, False
+            context = browser.new_context(**context_options)
+            context.add_init_script(STEALTH_SCRIPT)
+            return browser, context, True
+        
+        if self.user_data_dir:
+            # 持久化配置目录：缓存和Cookie在多次运行之间保留
+            user_data_dir = Path(self.user_data_dir).expanduser()
+            user_data_dir.mkdir(parents=True, exist_ok=True)
+            context = p.chromium.launch_persistent_context(
+                str(user_data_dir),
+                headless=True,
+                args=LAUNCH_ARGS,
+                **context_options
+            )
+            context.add_init_script(STEALTH_SCRIPT)
+            return None, context, True
+        
+        # 启动浏览器（无头模式）
+        browser = p.chromium.launch(headless=True, args=LAUNCH_ARGS)
+        
+        # 创建新上下文（隔离Cookie和缓存）
+        context = browser.new_context(**context_options)
+        
+        # 添加 stealth 脚本
+        context.add_init_script(STEALTH_SCRIPT)
+        return browser, context, True
+    
+    def _record_first_byte(self, response):
+        """记录首字节时间（相对于请求开始）"""
+        if response is None:
+            return
+        try:
+            timing = response.request.timing
+            if timing.get('responseStart', -1) >= 0:
+                self.stats['first_byte_ms'].append(round(timing['responseStart'], 1))
+        except Exception:
+            pass
     
-    def _fetch_single_article(self, page, url: str) -> str:
-        """抓取单篇文章"""
+    def _log_stats(self):
+        """输出启动与首字节耗时，便于对比冷/热浏览器"""
+        ttfb = self.stats['first_byte_ms']
+        median = statistics.median(ttfb) if ttfb else None
+        logger.info(f"Browser stats: mode={self.stats['mode']}, launch={self.stats['launch_ms']}ms, "
+                   f"first byte median={median}ms over {len(ttfb)} pages, "
+                   f"extraction={self.stats['extraction']}, transferred={self.stats['transfer_bytes']} bytes")
+    
+    def get_stats(self) -> dict:
+        """获取抓取统计信息"""
+        ttfb = self.stats['first_byte_ms']
+        return {
+            **self.stats,
+            'first_byte_median_ms': statistics.median(ttfb) if ttfb else None,
+            'budget': self.budget.get_stats(),
+        }
+    
+    def _fetch_single_article(self, page, url: str):
+        """抓取单篇文章，返回段落列表或HTML（瞬时错误按 fetching.max_retries 重试）"""
+        from playwright.sync_api import TimeoutError as PlaywrightTimeout
+        
         try:
-            # 访问页面
-            page.goto(url, wait_until='networkidle', timeout=30000)
-            
-            # 等待内容加载
-            page.wait_for_load_state('domcontentloaded')
-            time.sleep(random.uniform(2, 4))  # 模拟阅读时间
-            
-            # 随机滚动，模拟真实用户
-            self._simulate_scrolling(page)
-            
-            # 提取内容
-            html = page.content()
-            content = self._extract_content(html, url)
-            
-            return content
-            
+            return self.retry_policy.call(url, lambda: self._load_article(page, url),
+                                          time_left=self.budget.remaining)
         except PlaywrightTimeout:
             logger.error(f"Timeout loading page: {url}")
             return None
@@ -116,6 +296,62 @@ class StealthBrowser:
             logger.error(f"Error loading page {url}: {e}")
             return None
     
+    def _load_article(self, page, url: str):
+        """单次加载文章并返回提取结果，失败时抛出异常交给重试策略分类"""
+        from playwright.sync_api import TimeoutError as PlaywrightTimeout
+        
+        # 已过截止时间不再访问
+        remaining = self.budget.remaining()
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded(url)
+        
+        # 按主机限速（与RSS抓取共享同一限速器）
+        self.rate_limiter.acquire(url)
+        
+        # 访问页面（临近截止时间时缩短超时）
+        timeout = 30000
+        remaining = self.budget.remaining()
+        if remaining is not None:
+            timeout = max(1000, min(timeout, int(remaining * 1000)))
+        try:
+            response = page.goto(url, wait_until='networkidle', timeout=timeout)
+        except PlaywrightTimeout:
+            self.rate_limiter.record(url, None)
+            raise
+        self._record_first_byte(response)
+        if response is not None:
+            retry_after = response.headers.get('retry-after')
+            self.rate_limiter.record(url, response.status, retry_after)
+            if response.status >= 400:
+                raise HTTPStatusError(response.status, url, retry_after)
+        
+        # 等待内容加载
+        page.wait_for_load_state('domcontentloaded')
+        time.sleep(random.uniform(*self.reading_pause))  # 模拟阅读时间
+        
+        # 随机滚动，模拟真实用户
+        self._simulate_scrolling(page)
+        
+        return self._capture(page)
+    
+    def _capture(self, page):
+        """dom模式下在页面内提取段落文本；没有结果时回退为取整页HTML（解析交给进程池）"""
+        if self.extraction == 'dom':
+            try:
+                parts = page.evaluate(DOM_EXTRACT_SCRIPT, DOM_EXTRACT_ARGS)
+            except Exception as e:
+                logger.warning(f"In-page extraction failed, falling back to HTML: {e}")
+                parts = None
+            if parts:
+                self.stats['extraction']['dom'] += 1
+                self.stats['transfer_bytes'] += sum(len(part.encode('utf-8')) for part in parts)
+                return parts
+        
+        html = page.content()
+        self.stats['extraction']['html'] += 1
+        self.stats['transfer_bytes'] += len(html.encode('utf-8'))
+        return html
+    
     def _simulate_scrolling(self, page):
         """模拟滚动行为"""
         try:
@@ -129,65 +365,11 @@ class StealthBrowser:
     
     def _extract_content(self, html: str, url: str) -> str:
         """从HTML中提取文章内容"""
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # 尝试多种选择器（Bloomberg的HTML结构可能变化）
-        selectors = [
-            'article[data-testid="paragraph"]',
-            'article p',
-            '[data-testid="paragraph"]',
-            '.article-body__content p',
-            '.article-body p',
-            'article .body-content p',
-            'article .body__content p',
-            'article section p',
-        ]
-        
-        content_parts = []
-        
-        for selector in selectors:
-            paragraphs = soup.select(selector)
-            if paragraphs:
-                for p in paragraphs[:20]:  # 最多取20段
-                    text = p.get_text(strip=True)
-                    if text and len(text) > 20:  # 过滤短段落
-                        content_parts.append(text)
-                
-                if content_parts:
-                    break
-        
-        if not content_parts:
-            # 备用方案：提取所有正文段落
-            for p in soup.find_all('p'):
-                text = p.get_text(strip=True)
-                if len(text) > 100:  # 较长的段落可能是正文
-                    content_parts.append(text)
-                if len(content_parts) >= 15:
-                    break
-        
-        content = '\n\n'.join(content_parts)
-        
-        # 清理内容
-        content = self._clean_content(content)
-        
-        return content[:8000] if content else None  # 限制长度
+        content = extract_content(html, url, self.noise_matcher, None)
+        if content:
+            content = self.boilerplate.strip(url, content)[:MAX_CONTENT_LENGTH]
+        return content or None
     
     def _clean_content(self, content: str) -> str:
         """清理文章内容"""
-        # 移除常见噪音
-        noise_patterns = [
-            'Sign up for',
-            'Subscribe to',
-            'Read more:',
-            'To contact the author',
-            'To contact the editor',
-            'Most Read from Bloomberg',
-            '©2024 Bloomberg L.P.',
-            'Before it\'s here, it\'s on the Bloomberg Terminal',
-        ]
-        
-        for pattern in noise_patterns:
-            if pattern in content:
-                content = content.split(pattern)[0].strip()
-        
-        return content.strip()
+        return clean_content(content, self.noise_matcher)
@@ -1,17 +1,33 @@
+import argparse
+import importlib
 import json
 import logging
 import os
 import random
 import sys
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
 
+_T0 = time.perf_counter()
+
 import yaml
 
+from checkpoint.run_state import RunState
+from crawler.deadline import CrawlBudget
+from crawler.speculative import SpeculativeCrawler
 from crawler.stealth_browser import StealthBrowser
+from models.article import json_default
+from net.rate_limiter import HostRateLimiter
+from net.retry import RetryPolicy
 from rss.fetcher import RSSFetcher
 from selector.article_ranker import ArticleRanker
+from sharding.shards import (crawl_targets, load_selection, load_shard_outputs, parse_shard,
+                             save_selection, save_shard_output, shard_state_path)
+from sources.canonical import stamp_revision
+from sources.registry import SourceRegistry
 from uploader.github_artifacts import GitHubArtifactsUploader
+from uploader.push_notifier import PushNotifier
  
 # 确保logs目录存在
 os.makedirs('logs', exist_ok=True)
@@ -25,6 +41,59 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 按需加载的重型依赖（用于 --profile-startup 统计）
+HEAVY_MODULES = [
+    'requests',
+    'feedparser',
+    'bs4',
+    'playwright.sync_api',
+]
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='Bloomberg News Fetcher')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='打印启动阶段的导入耗时分布后退出')
+    parser.add_argument('--no-resume', action='store_true',
+                        help='忽略已有检查点，从头开始抓取')
+    parser.add_argument('--select', action='store_true',
+                        help='抓取全部RSS源并排序，结果写入 --shard-dir 供各分片划分全文爬取目标')
+    parser.add_argument('--shard', type=parse_shard, metavar='i/N',
+                        help='爬取排序结果中第i个分片（共N个）的全文，结果写入 --shard-dir')
+    parser.add_argument('--merge', action='store_true',
+                        help='把 --shard-dir 中各分片爬到的全文填回排序结果后输出')
+    parser.add_argument('--shard-dir', type=Path, default=Path('output/shards'),
+                        help='分片结果目录（默认 output/shards）')
+    parser.add_argument('--notify', nargs='?', const='', metavar='FILE',
+                        help='通知服务器artifact已就绪后退出（默认使用 output 中最新的结果文件）')
+    args = parser.parse_args()
+    if sum(map(bool, (args.select, args.shard, args.merge))) > 1:
+        parser.error('--select, --shard and --merge are mutually exclusive')
+    return args
+
+
+def profile_startup():
+    """打印导入耗时分布（入口模块 + 各个延迟加载的重型依赖）"""
+    rows = [('<entry point>', (time.perf_counter() - _T0) * 1000)]
+    
+    for name in HEAVY_MODULES:
+        if name in sys.modules:
+            rows.append((name, 0.0))
+            continue
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+            rows.append((name, (time.perf_counter() - start) * 1000))
+        except ImportError as e:
+            rows.append((f"{name} (unavailable: {e})", 0.0))
+    
+    width = max(len(name) for name, _ in rows)
+    print(f"{'module'.ljust(width)}  import ms")
+    for name, ms in rows:
+        print(f"{name.ljust(width)}  {ms:9.1f}")
+    print(f"{'total'.ljust(width)}  {sum(ms for _, ms in rows):9.1f}")
+
 
 def load_config():
     """加载配置文件"""
@@ -33,8 +102,137 @@ def load_config():
         return yaml.safe_load(f)
 
 
-def main():
-    """主程序"""
+def save_output(output_dir: Path, articles: list, crawler_stats: dict = None) -> Path:
+    """保存抓取结果到JSON文件"""
+    timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+    output_file = output_dir / f'news_{timestamp}.json'
+    
+    # 字段哈希和修订号：服务器据此只重新翻译变化的字段
+    for article in articles:
+        stamp_revision(article)
+    
+    output_data = {
+        'metadata': {
+            'generated_at': datetime.utcnow().isoformat(),
+            'total_articles': len(articles),
+            'full_content_count': sum(1 for a in articles if a.get('full_content')),
+            'sources': list(set(a['source'] for a in articles)),
+            'crawler': crawler_stats
+        },
+        'articles': articles
+    }
+    
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(output_data, f, ensure_ascii=False, indent=2, default=json_default)
+    
+    return output_file
+
+
+def upload_output(output_file: Path):
+    """上传到Artifacts（仅在GitHub Actions环境中）"""
+    if os.environ.get('GITHUB_ACTIONS'):
+        logger.info("Uploading to GitHub Artifacts...")
+        uploader = GitHubArtifactsUploader()
+        uploader.upload(output_file)
+    else:
+        logger.info("Running locally, skipping artifact upload")
+
+
+def notify(args):
+    """通知服务器artifact已上传（在 upload-artifact 之后运行）"""
+    if args.notify:
+        output_file = Path(args.notify)
+    else:
+        outputs = sorted(Path('output').glob('news_*.json'))
+        if not outputs:
+            logger.error("No output file to announce")
+            sys.exit(1)
+        output_file = outputs[-1]
+    
+    PushNotifier().notify(output_file)
+
+
+def crawl_shard(args):
+    """爬取本分片分到的全文：--select 阶段的全局排序结果中标记了全文的文章按排序轮流分给各分片"""
+    logger.info("=" * 50)
+    logger.info(f"Bloomberg News Fetcher - Crawling Shard {args.shard[0]}/{args.shard[1]}")
+    logger.info(f"Timestamp: {datetime.utcnow().isoformat()}")
+    logger.info("=" * 50)
+    
+    config = load_config()
+    
+    # 每个分片独立的检查点：失败重跑时跳过已爬取的全文
+    state_path = shard_state_path(Path(config.get('checkpoint', {}).get('path', 'state/run_state.json')), args.shard)
+    if args.no_resume and state_path.exists():
+        state_path.unlink()
+    state = RunState(state_path)
+    
+    selected_articles = load_selection(args.shard_dir)
+    targets = crawl_targets(selected_articles, args.shard)
+    logger.info(f"Crawling {len(targets)} of {sum(1 for a in selected_articles if a.get('fetch_full_content'))} "
+               f"full-content targets")
+    
+    crawler_stats = None
+    if targets:
+        browser = StealthBrowser(config, rate_limiter=HostRateLimiter(config), retry_policy=RetryPolicy(config),
+                                 budget=CrawlBudget(config))
+        try:
+            browser.fetch_full_content(targets, state=state)
+        except Exception as e:
+            # 浏览器崩溃时保留已完成的部分，照常输出
+            logger.error(f"Crawler failed, keeping partial results: {e}")
+        crawler_stats = browser.get_stats()
+    logger.info(f"Full content fetched for {sum(1 for a in targets if a.get('full_content'))} articles")
+    
+    output_file = save_shard_output(args.shard_dir, args.shard, targets, crawler_stats)
+    logger.info(f"Shard output saved to: {output_file}")
+    state.clear()
+    
+    logger.info("=" * 50)
+    logger.info("Shard Crawl Completed Successfully")
+    logger.info("=" * 50)
+
+
+def merge(args):
+    """合并各分片结果：把分片爬到的全文按文章ID填回全局排序结果"""
+    logger.info("=" * 50)
+    logger.info("Bloomberg News Fetcher - Merging Shards")
+    logger.info("=" * 50)
+    
+    output_dir = Path('output')
+    output_dir.mkdir(exist_ok=True)
+    
+    selected_articles = load_selection(args.shard_dir)
+    crawled, shards = load_shard_outputs(args.shard_dir)
+    contents = {a['id']: a['full_content'] for a in crawled if a.get('full_content')}
+    logger.info(f"Merged full content of {len(contents)} articles from {len(shards)} shards")
+    
+    for article in selected_articles:
+        content = contents.get(article['id']) if article.get('fetch_full_content') else None
+        if content:
+            article['full_content'] = content
+            article['has_full_content'] = True
+        else:
+            article.pop('full_content', None)
+            article['has_full_content'] = False
+    
+    missing = sum(1 for a in selected_articles if a.get('fetch_full_content') and not a['has_full_content'])
+    if missing:
+        logger.warning(f"{missing} articles marked for full content have none (crawl failed or shard missing)")
+    
+    crawler_stats = {'shards': [{'shard': m['shard'], **(m.get('crawler') or {})} for m in shards]}
+    output_file = save_output(output_dir, selected_articles, crawler_stats)
+    logger.info(f"Data saved to: {output_file}")
+    
+    upload_output(output_file)
+    
+    logger.info("=" * 50)
+    logger.info("Shard Merge Completed Successfully")
+    logger.info("=" * 50)
+
+
+def main(args):
+    """主程序（--select 时只抓取和排序，全文由各分片爬取）"""
     logger.info("=" * 50)
     logger.info("Bloomberg News Fetcher Started")
     logger.info(f"Timestamp: {datetime.utcnow().isoformat()}")
@@ -50,55 +248,97 @@ def main():
     config = load_config()
     logger.info("Configuration loaded successfully")
     
+    # 检查点：失败重跑时跳过已完成的RSS源和全文
+    state_path = Path(config.get('checkpoint', {}).get('path', 'state/run_state.json'))
+    if args.no_resume and state_path.exists():
+        state_path.unlink()
+    state = RunState(state_path)
+    
+    # 来源注册表只加载一次，抓取和排序共用
+    registry = SourceRegistry(config)
+    
+    # RSS抓取和全文爬取共享按主机的限速器和熔断状态
+    rate_limiter = HostRateLimiter(config)
+    retry_policy = RetryPolicy(config)
+    
+    # 运行截止时间：时间不够时停止开始新的全文抓取，保证写出结果
+    budget = CrawlBudget(config)
+    
+    ranker = ArticleRanker(config, registry=registry)
+    
+    # 推测式爬取：RSS还在下载时就开始爬取暂定的候选文章（检查点中已有排序结果时不需要）
+    speculative = None
+    if config.get('browser', {}).get('speculative', False) and not args.select and state.get_selected() is None:
+        browser = StealthBrowser(config, rate_limiter=rate_limiter, retry_policy=retry_policy, budget=budget)
+        speculative = SpeculativeCrawler(browser, ranker, config, state=state)
+        speculative.start()
+    
     # 1. 抓取RSS源
     logger.info("Step 1: Fetching RSS feeds...")
-    rss_fetcher = RSSFetcher(config)
-    all_articles = rss_fetcher.fetch_all()
+    rss_fetcher = RSSFetcher(config, rate_limiter=rate_limiter, retry_policy=retry_policy, registry=registry)
+    all_articles = rss_fetcher.fetch_all(state=state, on_feed=speculative.on_feed if speculative else None)
     logger.info(f"Total articles from RSS: {len(all_articles)}")
     
     if len(all_articles) < 5:
         logger.error("Too few articles fetched. Aborting.")
+        if speculative:
+            speculative.stop()
         sys.exit(1)
     
     # 2. 智能选择文章
     logger.info("Step 2: Ranking and selecting articles...")
-    ranker = ArticleRanker(config)
-    selected_articles = ranker.select_top_articles(all_articles)
+    selected_articles = state.get_selected()
+    if selected_articles is None:
+        selected_articles = ranker.select_top_articles(all_articles)
+        ranker.save_cache()
+        state.save_selected(selected_articles)
+    else:
+        logger.info("Using selection from checkpoint")
     logger.info(f"Selected {len(selected_articles)} articles")
     
+    if args.select:
+        # 全局排序只做一次，全文爬取目标由各分片按同一份结果划分
+        output_file = save_selection(args.shard_dir, selected_articles)
+        logger.info(f"Selection saved to: {output_file}")
+        state.clear()
+        return
+    
     # 3. 爬取选定文章的全文（仅前3篇）
     logger.info("Step 3: Fetching full content for top articles...")
-    browser = StealthBrowser(config)
-    articles_with_content = browser.fetch_full_content(selected_articles)
+    crawler_stats = None
+    if speculative:
+        # 补齐最终候选、取消掉出名单的排队文章，等待爬取线程结束
+        speculative.finish(selected_articles)
+        crawler_stats = speculative.get_stats()
+    elif any(a.get('fetch_full_content') for a in selected_articles):
+        browser = StealthBrowser(config, rate_limiter=rate_limiter, retry_policy=retry_policy, budget=budget)
+        try:
+            browser.fetch_full_content(selected_articles, state=state)
+        except Exception as e:
+            # 浏览器崩溃时保留已完成的部分，照常输出
+            logger.error(f"Crawler failed, keeping partial results: {e}")
+        crawler_stats = browser.get_stats()
+    else:
+        logger.info("No articles marked for full content, skipping crawler")
+    articles_with_content = selected_articles
+    for article in articles_with_content:
+        # 推测式爬取可能给入选但不在全文名单里的文章也爬了全文，按名单输出，保持全文数量不变
+        if not article.get('fetch_full_content') and article.get('full_content'):
+            article['full_content'] = None
+            article['has_full_content'] = False
     logger.info(f"Full content fetched for {sum(1 for a in articles_with_content if a.get('full_content'))} articles")
     
     # 4. 保存数据
     logger.info("Step 4: Saving data...")
-    timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-    output_file = output_dir / f'news_{timestamp}.json'
-    
-    output_data = {
-        'metadata': {
-            'generated_at': datetime.utcnow().isoformat(),
-            'total_articles': len(articles_with_content),
-            'full_content_count': sum(1 for a in articles_with_content if a.get('full_content')),
-            'sources': list(set(a['source'] for a in articles_with_content))
-        },
-        'articles': articles_with_content
-    }
-    
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, ensure_ascii=False, indent=2)
-    
+    output_file = save_output(output_dir, articles_with_content, crawler_stats)
     logger.info(f"Data saved to: {output_file}")
     
     # 5. 上传到Artifacts（仅在GitHub Actions环境中）
-    if os.environ.get('GITHUB_ACTIONS'):
-        logger.info("Step 5: Uploading to GitHub Artifacts...")
-        uploader = GitHubArtifactsUploader()
-        uploader.upload(output_file)
-    else:
-        logger.info("Running locally, skipping artifact upload")
+    logger.info("Step 5: Uploading output...")
+    upload_output(output_file)
+    
+    # 输出已写出，检查点不再需要
+    state.clear()
     
     logger.info("=" * 50)
     logger.info("Bloomberg News Fetcher Completed Successfully")
@@ -106,8 +346,20 @@ def main():
 
 
 if __name__ == '__main__':
+    args = parse_args()
+    if args.profile_startup:
+        profile_startup()
+        sys.exit(0)
+    
     try:
-        main()
+        if args.notify is not None:
+            notify(args)
+        elif args.merge:
+            merge(args)
+        elif args.shard:
+            crawl_shard(args)
+        else:
+            main(args)
     except Exception as e:
         logger.error("=" * 50)
         logger.error(f"FATAL ERROR: {str(e)}")
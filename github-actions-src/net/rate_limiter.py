@@ -0,0 +1,144 @@
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class _HostBucket:
+    """单个主机的令牌桶状态"""
+    
+    __slots__ = ('rate', 'tokens', 'updated_at', 'blocked_until', 'requests', 'throttled', 'waited')
+    
+    def __init__(self, rate: float, tokens: float, now: float):
+        self.rate = rate
+        self.tokens = tokens
+        self.updated_at = now
+        self.blocked_until = 0.0
+        self.requests = 0
+        self.throttled = 0
+        self.waited = 0.0
+
+
+class HostRateLimiter:
+    """按主机的自适应限速器
+    
+    每个主机一个令牌桶；正常响应时加性提高速率，429/5xx/超时时乘性降低速率（AIMD），
+    并遵守 Retry-After。时钟、sleep 和随机数都可注入，便于用假时钟做确定性测试：
+    clock 为单调时钟（令牌桶计时），wall_clock 为墙上时钟（只用于换算HTTP日期格式的 Retry-After）。
+    """
+    
+    def __init__(self, config: dict,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep,
+                 rng: Optional[random.Random] = None,
+                 wall_clock: Callable[[], float] = time.time):
+        rate_config = config.get('fetching', {}).get('rate_limit', {})
+        self.initial_rate = rate_config.get('initial_rate', 0.2)
+        self.min_rate = rate_config.get('min_rate', 0.05)
+        self.max_rate = rate_config.get('max_rate', 1.0)
+        self.burst = rate_config.get('burst', 1)
+        self.increase = rate_config.get('additive_increase', 0.1)
+        self.decrease = rate_config.get('multiplicative_decrease', 0.5)
+        self.jitter_ratio = rate_config.get('jitter_ratio', 0.3)
+        self.max_retry_after = rate_config.get('max_retry_after', 120)
+        
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        
+        self._buckets: Dict[str, _HostBucket] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def host_of(url: str) -> str:
+        """提取主机名作为限速键"""
+        return urlparse(url).netloc.lower()
+    
+    def _bucket(self, host: str, now: float) -> _HostBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = _HostBucket(self.initial_rate, self.burst, now)
+            self._buckets[host] = bucket
+        return bucket
+    
+    def reserve(self, url: str) -> float:
+        """预占一个令牌，返回需要等待的秒数（不阻塞）"""
+        host = self.host_of(url)
+        with self._lock:
+            now = self.clock()
+            bucket = self._bucket(host, now)
+            
+            # 补充令牌
+            elapsed = max(0.0, now - bucket.updated_at)
+            bucket.tokens = min(self.burst, bucket.tokens + elapsed * bucket.rate)
+            bucket.updated_at = now
+            
+            # 允许令牌为负：后来的请求排在前面的预占之后
+            bucket.tokens -= 1
+            wait = max(0.0, -bucket.tokens / bucket.rate, bucket.blocked_until - now)
+            if wait > 0:
+                wait *= 1 + self.rng.uniform(0, self.jitter_ratio)
+            
+            bucket.requests += 1
+            bucket.waited += wait
+            return wait
+    
+    def acquire(self, url: str) -> float:
+        """等待直到可以向该主机发起请求，返回实际等待的秒数"""
+        wait = self.reserve(url)
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+    
+    def record(self, url: str, status: Optional[int] = None, retry_after: Optional[str] = None):
+        """根据响应调整速率；status 为 None 表示超时/连接错误"""
+        host = self.host_of(url)
+        with self._lock:
+            now = self.clock()
+            bucket = self._bucket(host, now)
+            
+            if status is None or status == 429 or status >= 500:
+                bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+                bucket.tokens = min(bucket.tokens, 0.0)
+                bucket.throttled += 1
+                logger.info(f"Rate limit {host}: slowing down to {bucket.rate:.3f} req/s (status={status})")
+            elif status < 400:
+                bucket.rate = min(self.max_rate, bucket.rate + self.increase)
+            
+            delay = self._parse_retry_after(retry_after)
+            if delay is not None:
+                bucket.blocked_until = max(bucket.blocked_until, now + delay)
+                logger.info(f"Rate limit {host}: honoring Retry-After {delay:.0f}s")
+    
+    def _parse_retry_after(self, value: Optional[str]) -> Optional[float]:
+        """解析 Retry-After（秒数或HTTP日期）"""
+        if not value:
+            return None
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(value)
+                delay = retry_at.timestamp() - self.wall_clock()
+            except (TypeError, ValueError):
+                return None
+        return min(max(0.0, delay), self.max_retry_after)
+    
+    def get_stats(self) -> dict:
+        """获取各主机的限速统计"""
+        with self._lock:
+            return {
+                host: {
+                    'rate': round(bucket.rate, 3),
+                    'requests': bucket.requests,
+                    'throttled': bucket.throttled,
+                    'waited_seconds': round(bucket.waited, 1),
+                }
+                for host, bucket in self._buckets.items()
+            }
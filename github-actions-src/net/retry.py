@@ -0,0 +1,206 @@
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, TypeVar
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# 每类错误允许的重试次数（None 表示使用 fetching.max_retries）
+RETRY_LIMITS = {
+    'timeout': None,
+    'connection': None,
+    'rate_limited': None,
+    'server_error': None,
+    'parse_error': 1,
+    'client_error': 0,
+    'unknown': 1,
+}
+
+# 计入熔断器的错误类型（4xx和解析错误说明主机是活的，不计入）
+BREAKER_ERRORS = {'timeout', 'connection', 'rate_limited', 'server_error'}
+
+
+class HTTPStatusError(Exception):
+    """非2xx/3xx响应（用于没有自带HTTP异常的调用方，如Playwright）"""
+    
+    def __init__(self, status: int, url: str, retry_after: Optional[str] = None):
+        super().__init__(f"HTTP {status} for {url}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(Exception):
+    """主机熔断中，直接放弃请求"""
+
+
+class DeadlineExceeded(Exception):
+    """运行截止时间已到，不再发起请求"""
+
+
+def _status_of(exc: Exception) -> Optional[int]:
+    """从异常中取出HTTP状态码（兼容requests.HTTPError和HTTPStatusError）"""
+    status = getattr(exc, 'status', None)
+    if isinstance(status, int):
+        return status
+    response = getattr(exc, 'response', None)
+    status = getattr(response, 'status_code', None)
+    return status if isinstance(status, int) else None
+
+
+def classify_error(exc: Exception) -> str:
+    """将异常归类为 timeout / connection / rate_limited / server_error / client_error / parse_error / unknown"""
+    status = _status_of(exc)
+    if status is not None:
+        if status == 429:
+            return 'rate_limited'
+        if status == 408:
+            return 'timeout'
+        if status >= 500:
+            return 'server_error'
+        if status >= 400:
+            return 'client_error'
+    
+    # 按类名判断，避免在这里导入requests/playwright
+    names = [cls.__name__ for cls in type(exc).__mro__]
+    if any('Timeout' in name for name in names):
+        return 'timeout'
+    if any('ConnectionError' in name for name in names):
+        return 'connection'
+    if isinstance(exc, (ValueError, UnicodeError)) or any('Parse' in name for name in names):
+        return 'parse_error'
+    return 'unknown'
+
+
+class _Circuit:
+    """单个主机的熔断状态"""
+    
+    __slots__ = ('failures', 'opened_at', 'half_open')
+    
+    def __init__(self):
+        self.failures = 0
+        self.opened_at = None
+        self.half_open = False
+
+
+class RetryPolicy:
+    """带指数退避和抖动的重试，并按主机熔断
+    
+    重试的等待只发生在调用线程内，多个主机并发抓取时互不阻塞。
+    """
+    
+    def __init__(self, config: dict,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep,
+                 rng: Optional[random.Random] = None):
+        fetching_config = config.get('fetching', {})
+        retry_config = fetching_config.get('retry', {})
+        self.max_retries = fetching_config.get('max_retries', 3)
+        self.base_delay = retry_config.get('base_delay', 1.0)
+        self.max_delay = retry_config.get('max_delay', 30.0)
+        self.breaker_threshold = retry_config.get('breaker_threshold', 3)
+        self.breaker_cooldown = retry_config.get('breaker_cooldown', 120.0)
+        
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        
+        self._circuits: Dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+        self.stats = {'retries': 0, 'gave_up': 0, 'short_circuited': 0, 'deadline': 0}
+    
+    def call(self, url: str, func: Callable[[], T],
+             time_left: Optional[Callable[[], Optional[float]]] = None) -> T:
+        """执行 func，失败时按错误类型重试；超出次数后抛出最后一次的异常
+        
+        time_left 返回距截止时间的剩余秒数（None为不限）：剩余时间不够退避等待时不再重试，直接抛出。
+        """
+        host = urlparse(url).netloc.lower()
+        attempt = 0
+        
+        while True:
+            self._before_call(host)
+            try:
+                result = func()
+            except Exception as e:
+                kind = classify_error(e)
+                self._on_failure(host, kind)
+                
+                limit = RETRY_LIMITS.get(kind, 0)
+                if limit is None:
+                    limit = self.max_retries
+                if attempt >= limit:
+                    with self._lock:
+                        self.stats['gave_up'] += 1
+                    raise
+                
+                delay = self.backoff(attempt)
+                left = time_left() if time_left is not None else None
+                if left is not None and delay >= left:
+                    with self._lock:
+                        self.stats['gave_up'] += 1
+                        self.stats['deadline'] += 1
+                    logger.warning(f"Not retrying {url}: {max(left, 0):.0f}s left before deadline ({kind}: {e})")
+                    raise
+                
+                attempt += 1
+                with self._lock:
+                    self.stats['retries'] += 1
+                logger.warning(f"Retry {attempt}/{limit} for {url} in {delay:.1f}s ({kind}: {e})")
+                self.sleep(delay)
+                continue
+            
+            self._on_success(host)
+            return result
+    
+    def backoff(self, attempt: int) -> float:
+        """指数退避 + 抖动（一半固定，一半随机）"""
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return delay / 2 + self.rng.uniform(0, delay / 2)
+    
+    def _before_call(self, host: str):
+        """熔断检查：打开状态下直接拒绝，冷却期过后放行一次试探请求"""
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None or circuit.opened_at is None:
+                return
+            if self.clock() - circuit.opened_at >= self.breaker_cooldown and not circuit.half_open:
+                circuit.half_open = True
+                return
+            self.stats['short_circuited'] += 1
+        raise CircuitOpenError(f"Circuit open for {host}")
+    
+    def _on_failure(self, host: str, kind: str):
+        if kind not in BREAKER_ERRORS:
+            # 4xx/解析错误说明主机有响应：试探请求遇到这类错误时视为试探成功，关闭熔断
+            with self._lock:
+                circuit = self._circuits.get(host)
+                if circuit is not None and circuit.half_open:
+                    logger.info(f"Circuit closed for {host} (probe got {kind})")
+                    self._circuits[host] = _Circuit()
+            return
+        with self._lock:
+            circuit = self._circuits.setdefault(host, _Circuit())
+            circuit.failures += 1
+            if circuit.half_open or circuit.failures >= self.breaker_threshold:
+                if circuit.opened_at is None or circuit.half_open:
+                    logger.warning(f"Circuit opened for {host} after {circuit.failures} failures")
+                circuit.opened_at = self.clock()
+                circuit.half_open = False
+    
+    def _on_success(self, host: str):
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is not None:
+                if circuit.opened_at is not None:
+                    logger.info(f"Circuit closed for {host}")
+                self._circuits[host] = _Circuit()
+    
+    def is_open(self, host: str) -> bool:
+        """主机当前是否处于熔断状态"""
+        with self._lock:
+            circuit = self._circuits.get(host)
+            return circuit is not None and circuit.opened_at is not None
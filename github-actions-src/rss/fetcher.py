@@ -1,24 +1,33 @@
 import logging
 import random
-import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from urllib.parse import urljoin
 
-import feedparser
-import requests
-from bs4 import BeautifulSoup
+from models.article import Article
+from net.rate_limiter import HostRateLimiter
+from net.retry import RetryPolicy
+from sources.canonical import article_id, canonicalize_url
+from sources.parsers import ACCEPT, PARSERS
+from sources.registry import Feed, SourceRegistry
 
 logger = logging.getLogger(__name__)
 
 
 class RSSFetcher:
-    """RSS抓取器"""
+    """来源抓取器（RSS / JSON API / 站点地图，按来源注册表中声明的类型解析）"""
     
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, rate_limiter: Optional[HostRateLimiter] = None,
+                 retry_policy: Optional[RetryPolicy] = None, registry: Optional[SourceRegistry] = None):
         self.config = config
-        self.rss_sources = config['rss_sources']
+        self.registry = registry or SourceRegistry(config)
         self.fetching_config = config['fetching']
+        self.rate_limiter = rate_limiter or HostRateLimiter(config)
+        self.retry_policy = retry_policy or RetryPolicy(config)
+        
+        # 延迟导入：仅在真正抓取时才加载requests
+        import requests
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': random.choice(self.fetching_config['user_agents']),
@@ -28,123 +37,131 @@ class RSSFetcher:
             'Connection': 'keep-alive',
         })
     
-    def fetch_all(self) -> List[dict]:
-        """抓取所有RSS源"""
-        all_articles = []
+    def fetch_all(self, state=None,
+                  on_feed: Optional[Callable[[Feed, List[dict]], None]] = None) -> List[dict]:
+        """并发抓取所有RSS源（传入state时跳过检查点中已完成的源）
         
-        for source_name, source_config in self.rss_sources.items():
-            logger.info(f"Fetching from {source_name}...")
-            
-            for category, url in source_config.items():
-                if category == 'priority':
-                    continue
-                
-                try:
-                    articles = self._fetch_rss(url, source_name, category, source_config.get('priority', 1))
-                    all_articles.extend(articles)
-                    logger.info(f"  {category}: {len(articles)} articles")
+        on_feed 在每个源完成时（在调用线程中）被调用，用于推测式爬取等提前处理。
+        """
+        feeds = self.registry.feeds()
+        
+        results = {}
+        pending = []
+        for feed in feeds:
+            cached = state.get_feed(feed.key) if state is not None else None
+            if cached is not None:
+                results[feed.key] = cached
+                logger.info(f"  {feed.key}: {len(results[feed.key])} articles (from checkpoint)")
+                if on_feed is not None:
+                    on_feed(feed, results[feed.key])
+            else:
+                pending.append(feed)
+        
+        if pending:
+            # 不同主机并发抓取；同一主机的间隔由限速器控制，重试等待只阻塞当前线程
+            max_workers = min(self.fetching_config.get('max_concurrent_feeds', 4), len(pending))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {executor.submit(self._fetch_with_retry, feed): feed for feed in pending}
+                for future in as_completed(futures):
+                    feed = futures[future]
+                    try:
+                        articles = future.result()
+                    except Exception as e:
+                        logger.error(f"  Error fetching {feed.key}: {e}")
+                        continue
                     
-                    # 请求间隔，避免被封
-                    delay = self.fetching_config['delay_between_requests'] + random.uniform(0, self.fetching_config['delay_jitter'])
-                    time.sleep(delay)
+                    results[feed.key] = articles
+                    logger.info(f"  {feed.key}: {len(articles)} articles")
                     
-                except Exception as e:
-                    logger.error(f"  Error fetching {source_name}/{category}: {e}")
-                    continue
+                    if state is not None:
+                        state.save_feed(feed.key, articles)
+                    if on_feed is not None:
+                        on_feed(feed, articles)
         
+        # 按配置顺序合并，保证结果稳定；同一篇文章出现在多个源中时只保留先出现的
+        all_articles = []
+        seen_ids = set()
+        for feed in feeds:
+            for article in results.get(feed.key, []):
+                if article['id'] not in seen_ids:
+                    seen_ids.add(article['id'])
+                    all_articles.append(article)
+        
+        duplicates = sum(len(articles) for articles in results.values()) - len(all_articles)
+        if duplicates:
+            logger.info(f"Dropped {duplicates} articles listed by more than one feed")
         return all_articles
     
-    def _fetch_rss(self, url: str, source: str, category: str, priority: int) -> List[dict]:
-        """抓取单个RSS源"""
+    def _fetch_with_retry(self, feed: Feed) -> List[dict]:
+        """抓取单个源，瞬时错误按 fetching.max_retries 重试"""
+        return self.retry_policy.call(feed.url, lambda: self._fetch_feed(feed))
+    
+    def _fetch_feed(self, feed: Feed) -> List[dict]:
+        """抓取单个源并用对应类型的解析器解析"""
         articles = []
         
         try:
-            response = self.session.get(
-                url, 
-                timeout=self.fetching_config['request_timeout']
-            )
+            # 按主机限速，避免被封
+            self.rate_limiter.acquire(feed.url)
+            try:
+                response = self.session.get(
+                    feed.url,
+                    headers={'Accept': ACCEPT[feed.type]},
+                    timeout=self.fetching_config['request_timeout']
+                )
+            except Exception:
+                self.rate_limiter.record(feed.url, None)
+                raise
+            self.rate_limiter.record(feed.url, response.status_code, response.headers.get('Retry-After'))
             response.raise_for_status()
             
-            # 解析RSS
-            feed = feedparser.parse(response.content)
-            
-            for entry in feed.entries[:15]:  # 每个源最多取15篇
-                article = self._parse_entry(entry, source, category, priority)
+            for entry in PARSERS[feed.type](response.content, feed):
+                article = self._parse_entry(entry, feed)
                 if article:
                     articles.append(article)
                     
         except Exception as e:
-            logger.error(f"Error parsing RSS from {url}: {e}")
+            logger.error(f"Error parsing {feed.type} feed from {feed.url}: {e}")
             raise
         
         return articles
     
-    def _parse_entry(self, entry, source: str, category: str, priority: int) -> Optional[dict]:
-        """解析单条RSS条目"""
+    def _parse_entry(self, entry: dict, feed: Feed) -> Optional[Article]:
+        """把解析器输出的条目转换为文章"""
         try:
             # 提取基本信息
-            title = entry.get('title', '').strip()
-            link = entry.get('link', '')
-            summary = entry.get('summary', '') or entry.get('description', '')
+            title = entry['title'].strip()
+            link = entry['link']
+            summary = entry['summary']
+            if not link:
+                return None
             
             # 清理摘要（去除HTML标签）
             if summary:
+                from bs4 import BeautifulSoup
                 soup = BeautifulSoup(summary, 'html.parser')
                 summary = soup.get_text(separator=' ', strip=True)[:500]
             
-            # 解析发布时间
-            published = self._parse_date(entry)
-            
-            # 提取作者
-            author = entry.get('author', '')
+            published = entry['published']
             
-            # 生成唯一ID
-            article_id = self._generate_id(link, title)
+            # 文章ID取自规范化URL：跟踪参数、跳转包装或标题修改不会产生新ID
+            canonical_url = canonicalize_url(link)
             
-            return {
-                'id': article_id,
-                'title': title,
-                'summary': summary,
-                'link': link,
-                'source': source,
-                'category': category,
-                'priority': priority,
-                'published': published.isoformat() if published else None,
-                'author': author,
-                'has_full_content': False,  # RSS默认没有全文
-                'full_content': None
-            }
+            return Article(
+                id=article_id(canonical_url),
+                title=title,
+                summary=summary,
+                link=link,
+                canonical_url=canonical_url,
+                source=feed.source,
+                category=feed.category,
+                priority=feed.priority,
+                published=published.isoformat() if published else None,
+                author=entry['author'],
+                has_full_content=False,  # RSS默认没有全文
+                full_content=None
+            )
             
         except Exception as e:
             logger.error(f"Error parsing entry: {e}")
             return None
-    
-    def _parse_date(self, entry) -> Optional[datetime]:
-        """解析发布时间"""
-        date_fields = ['published_parsed', 'updated_parsed', 'created_parsed']
-        
-        for field in date_fields:
-            if hasattr(entry, field) and getattr(entry, field):
-                try:
-                    t = getattr(entry, field)
-                    return datetime(*t[:6])
-                except:
-                    continue
-        
-        # 尝试解析字符串日期
-        date_strings = ['published', 'updated', 'created']
-        for field in date_strings:
-            if hasattr(entry, field) and getattr(entry, field):
-                try:
-                    # feedparser应该已经解析过了
-                    pass
-                except:
-                    continue
-        
-        return None
-    
-    def _generate_id(self, link: str, title: str) -> str:
-        """生成文章唯一ID"""
-        import hashlib
-        content = f"{link}:{title}".encode('utf-8')
-        return hashlib.md5(content).hexdigest()[:16]
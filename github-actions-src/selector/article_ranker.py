@@ -1,7 +1,11 @@
 import logging
 import random
+from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from selector.semantic_scorer import load_semantic_scorer
+from sources.registry import SourceRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -9,10 +13,15 @@ logger = logging.getLogger(__name__)
 class ArticleRanker:
     """文章排序和选择器"""
     
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, registry: Optional[SourceRegistry] = None):
         self.config = config
         self.selection_config = config['selection']
         self.keywords = config['keywords']
+        self.registry = registry or SourceRegistry(config)
+        
+        # 可选的语义评分：与关键词分数按 semantic.weight 混合
+        self.semantic = load_semantic_scorer(config)
+        self.semantic_weight = self.selection_config.get('semantic', {}).get('weight', 0.5)
     
     def select_top_articles(self, articles: List[dict]) -> List[dict]:
         """选择最重要的文章"""
@@ -20,52 +29,58 @@ class ArticleRanker:
         full_content_count = self.selection_config['full_content_count']
         bloomberg_priority = self.selection_config['bloomberg_priority']
         
-        # 1. 计算每篇文章的分数
+        # 1. 计算每篇文章的分数（语义分数整批计算）
+        semantic_scores = self._semantic_scores(articles)
         scored_articles = []
         for article in articles:
-            score = self._calculate_score(article)
+            score = self._calculate_score(article, semantic_scores.get(article['id']))
             scored_articles.append((article, score))
         
         # 2. 排序
         scored_articles.sort(key=lambda x: x[1], reverse=True)
         
-        # 3. 选择文章，保证来源多样性
+        # 3. 选择文章，保证来源多样性（每个来源的配额和全文策略由来源注册表声明）
         selected = []
-        source_count = {'bloomberg': 0, 'yahoo': 0, 'reuters': 0}
+        source_count = defaultdict(int)
         
-        # Bloomberg优先策略
+        def under_quota(source: str) -> bool:
+            quota = self.registry.quota(source)
+            return quota is None or source_count[source] < quota
+        
+        # 可爬全文的来源优先策略（原Bloomberg优先）
         if bloomberg_priority:
-            # 首先选择Bloomberg的文章
+            # 首先选择允许爬取全文的来源
             for article, score in scored_articles:
                 if len(selected) >= total_needed:
                     break
-                if article['source'] == 'bloomberg' and source_count['bloomberg'] < 7:
-                    article['fetch_full_content'] = source_count['bloomberg'] < full_content_count
+                source = article['source']
+                if self.registry.can_crawl(source) and under_quota(source):
+                    article['fetch_full_content'] = sum(1 for a in selected if a.get('fetch_full_content')) < full_content_count
                     selected.append(article)
-                    source_count['bloomberg'] += 1
+                    source_count[source] += 1
             
             # 然后补充其他来源
             for article, score in scored_articles:
                 if len(selected) >= total_needed:
                     break
-                if article not in selected:
-                    if article['source'] == 'yahoo' and source_count['yahoo'] < 2:
-                        article['fetch_full_content'] = False
-                        selected.append(article)
-                        source_count['yahoo'] += 1
-                    elif article['source'] == 'reuters' and source_count['reuters'] < 1:
-                        article['fetch_full_content'] = False
-                        selected.append(article)
-                        source_count['reuters'] += 1
+                source = article['source']
+                if article not in selected and not self.registry.can_crawl(source) and under_quota(source):
+                    article['fetch_full_content'] = False
+                    selected.append(article)
+                    source_count[source] += 1
         else:
             # 均衡分布
+            per_source = total_needed // max(1, len(self.registry.sources)) + 1
             for article, score in scored_articles:
                 if len(selected) >= total_needed:
                     break
                 
                 source = article['source']
-                if source_count[source] < (total_needed // 3 + 1):
-                    article['fetch_full_content'] = len([a for a in selected if a.get('fetch_full_content')]) < full_content_count
+                if source_count[source] < per_source and under_quota(source):
+                    article['fetch_full_content'] = (
+                        self.registry.can_crawl(source)
+                        and len([a for a in selected if a.get('fetch_full_content')]) < full_content_count
+                    )
                     selected.append(article)
                     source_count[source] += 1
         
@@ -78,8 +93,7 @@ class ArticleRanker:
                     article['fetch_full_content'] = False
                     selected.append(article)
         
-        logger.info(f"Selection complete: Bloomberg {source_count['bloomberg']}, "
-                   f"Yahoo {source_count['yahoo']}, Reuters {source_count['reuters']}")
+        logger.info("Selection complete: " + ", ".join(f"{source} {count}" for source, count in source_count.items()))
         
         # 标记需要爬取全文的文章
         full_content_candidates = [a for a in selected if a.get('fetch_full_content')]
@@ -87,7 +101,26 @@ class ArticleRanker:
         
         return selected
     
-    def _calculate_score(self, article: dict) -> float:
+    def _semantic_scores(self, articles: List[dict]) -> Dict[str, float]:
+        """批量计算语义相关度，出错时回退到纯关键词评分"""
+        if self.semantic is None:
+            return {}
+        try:
+            return self.semantic.score(articles)
+        except Exception as e:
+            logger.warning(f"Semantic scoring failed, using keywords only: {e}")
+            return {}
+    
+    def save_cache(self):
+        """保存语义向量缓存（推测式爬取每个源都会重新排序，只在最终排序后保存一次）"""
+        if self.semantic is None:
+            return
+        try:
+            self.semantic.save()
+        except Exception as e:
+            logger.warning(f"Failed to save embedding cache: {e}")
+    
+    def _calculate_score(self, article: dict, semantic_score: Optional[float] = None) -> float:
         """计算文章分数"""
         score = 0.0
         
@@ -97,6 +130,8 @@ class ArticleRanker:
         
         # 2. 关键词分数 (30%)
         keyword_score = self._calculate_keyword_score(article)
+        if semantic_score is not None:
+            keyword_score = (1 - self.semantic_weight) * keyword_score + self.semantic_weight * semantic_score
         score += keyword_score * 0.3
         
         # 3. 来源优先级 (25%)
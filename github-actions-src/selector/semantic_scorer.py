@@ -0,0 +1,170 @@
+import logging
+import re
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# 内置主题种子：补充关键词列表覆盖不到的同义说法（如 Powell / FOMC → 美联储）
+DEFAULT_TOPICS = {
+    'monetary_policy': ['fed', 'federal reserve', 'fomc', 'powell', 'central bank', 'rate cut',
+                        'rate hike', 'interest rates', 'ecb', 'lagarde', 'bank of japan', 'treasury yields'],
+    'macro': ['inflation', 'cpi', 'gdp', 'jobs report', 'payrolls', 'unemployment', 'recession',
+              'consumer spending', 'economy'],
+    'markets': ['stocks', 'equities', 's&p 500', 'nasdaq', 'dow', 'bond market', 'selloff', 'rally',
+                'wall street', 'hedge fund'],
+    'corporate': ['earnings', 'quarterly results', 'revenue', 'profit', 'guidance', 'ipo', 'merger',
+                  'acquisition', 'buyback'],
+    'tech': ['ai', 'artificial intelligence', 'chip', 'semiconductor', 'nvidia', 'openai', 'big tech'],
+    'crypto': ['bitcoin', 'crypto', 'ether', 'stablecoin', 'digital assets'],
+    'trade': ['tariff', 'trade war', 'export controls', 'sanctions', 'supply chain'],
+    'commodities': ['oil', 'opec', 'crude', 'gold', 'copper', 'natural gas'],
+}
+
+
+class SemanticScorer:
+    """基于哈希n-gram向量的语义相关度评分（可选，需要NumPy）
+
+    标题+摘要按词、词二元组和字符3-5gram做特征哈希，得到固定维度的L2归一化向量，
+    与由关键词和主题种子构成的主题中心向量求余弦相似度。不需要下载模型，
+    整批文章一次向量化；向量按 文章ID+文本哈希 缓存在 .npz 文件里，跨运行复用
+    （文章ID在标题修改后不变，标题或摘要变化时文本哈希不同，重新向量化）。
+    """
+
+    def __init__(self, config: dict):
+        import numpy as np
+
+        self.np = np
+        semantic_config = config['selection'].get('semantic', {})
+        self.dim = semantic_config.get('dim', 1024)
+        self.saturation = semantic_config.get('saturation', 0.35)
+        self.cache_path = Path(semantic_config.get('cache_path', 'data/embeddings.npz'))
+        self.max_cached = semantic_config.get('max_cached', 5000)
+
+        # 主题：内置种子 + 配置中的主题 + 每个高/中优先级关键词；低优先级关键词作为负主题
+        keywords = config['keywords']
+        topics = {**DEFAULT_TOPICS, **semantic_config.get('topics', {})}
+        positive = [(phrases, 1.0) for phrases in topics.values()]
+        positive += [([keyword], 1.0) for keyword in keywords['high']]
+        positive += [([keyword], 0.55) for keyword in keywords['medium']]
+        self.topic_weights = np.array([weight for _, weight in positive], dtype=np.float32)
+        self.topics = self._centroids([phrases for phrases, _ in positive])
+        self.negative = self._centroids([[keyword] for keyword in keywords['low']])
+
+        self._cache: Dict[str, int] = {}  # 缓存键 -> 向量行号
+        self._vectors = np.zeros((0, self.dim), dtype=np.float16)
+        self._load_cache()
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+
+    def _features(self, text: str) -> List[str]:
+        """词、词二元组和带边界标记的字符3-5gram"""
+        words = _WORD_RE.findall(text.lower())
+        features = [f"w:{w}" for w in words]
+        features += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            marked = f"<{word}>"
+            for n in (3, 4, 5):
+                features += [marked[i:i + n] for i in range(len(marked) - n + 1)]
+        return features
+
+    def embed(self, texts: List[str]):
+        """批量向量化：所有文本的特征哈希一次性累加进矩阵"""
+        np = self.np
+        rows, cols, signs = [], [], []
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode('utf-8'))
+                rows.append(row)
+                cols.append(h % self.dim)
+                signs.append(1.0 if h & 0x80000000 else -1.0)
+
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if rows:
+            np.add.at(matrix, (np.array(rows), np.array(cols)), np.array(signs, dtype=np.float32))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-9)
+
+    def _centroids(self, groups: List[List[str]]):
+        """每组短语向量的平均（再归一化）作为主题中心"""
+        np = self.np
+        if not groups:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        centroids = np.stack([self.embed(phrases).mean(axis=0) for phrases in groups])
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        return centroids / np.maximum(norms, 1e-9)
+
+    def score(self, articles: List[dict]) -> Dict[str, float]:
+        """返回 文章ID -> 语义相关度（0-1）"""
+        np = self.np
+        if not articles:
+            return {}
+
+        texts = [f"{a.get('title', '')} {a.get('summary', '')}" for a in articles]
+        keys = [self._key(a['id'], text) for a, text in zip(articles, texts)]
+        missing = {key: text for key, text in zip(keys, texts) if key not in self._cache}
+        self.hits += len(articles) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            vectors = self.embed(list(missing.values()))
+            start = len(self._vectors)
+            self._vectors = np.concatenate([self._vectors, vectors.astype(np.float16)])
+            for offset, key in enumerate(missing):
+                self._cache[key] = start + offset
+            self._dirty = True
+
+        matrix = self._vectors[[self._cache[key] for key in keys]].astype(np.float32)
+        positive = (matrix @ self.topics.T * self.topic_weights).max(axis=1)
+        negative = (matrix @ self.negative.T).max(axis=1) if len(self.negative) else 0.0
+        scores = np.clip((positive - negative) / self.saturation, 0.0, 1.0)
+        return {article['id']: float(s) for article, s in zip(articles, scores)}
+
+    @staticmethod
+    def _key(article_id: str, text: str) -> str:
+        """缓存键：文章ID + 被向量化文本的哈希"""
+        return f"{article_id}:{zlib.crc32(text.encode('utf-8')):08x}"
+
+    def _load_cache(self):
+        """读取向量缓存（维度不一致时丢弃）"""
+        if not self.cache_path.exists():
+            return
+        try:
+            with self.np.load(self.cache_path) as data:
+                if int(data['dim']) != self.dim:
+                    logger.info("Embedding cache dimension changed, rebuilding")
+                    return
+                self._vectors = data['vectors']
+                self._cache = {key: i for i, key in enumerate(data['ids'].tolist())}
+            logger.info(f"Loaded {len(self._cache)} cached embeddings")
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable embedding cache {self.cache_path}: {e}")
+
+    def save(self):
+        """保存向量缓存（只保留最近的 max_cached 条；没有新向量时跳过）"""
+        np = self.np
+        if not self._dirty:
+            return
+        ids = sorted(self._cache, key=self._cache.get)[-self.max_cached:]
+        vectors = self._vectors[[self._cache[i] for i in ids]] if ids else self._vectors[:0]
+
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_name(self.cache_path.stem + '.tmp.npz')
+        np.savez_compressed(tmp_path, ids=np.array(ids), vectors=vectors, dim=np.array(self.dim))
+        tmp_path.replace(self.cache_path)
+        self._dirty = False
+        logger.info(f"Embedding cache: {self.hits} hits, {self.misses} computed, {len(ids)} stored")
+
+
+def load_semantic_scorer(config: dict) -> Optional[SemanticScorer]:
+    """按配置创建语义评分器；未启用或缺少NumPy时返回None，回退到纯关键词评分"""
+    if not config['selection'].get('semantic', {}).get('enabled', False):
+        return None
+    try:
+        return SemanticScorer(config)
+    except ImportError:
+        logger.warning("numpy not installed, semantic scoring disabled")
+        return None
@@ -0,0 +1,137 @@
+import argparse
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from models.article import Article, json_default
+
+logger = logging.getLogger(__name__)
+
+Shard = Tuple[int, int]
+
+
+def parse_shard(value: str) -> Shard:
+    """解析 --shard 参数（格式 i/N，0 <= i < N）"""
+    try:
+        index, total = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid shard '{value}', expected i/N")
+    if total < 1 or not 0 <= index < total:
+        raise argparse.ArgumentTypeError(f"Invalid shard '{value}', need 0 <= i < N")
+    return index, total
+
+
+def select_shard(items: list, shard: Optional[Shard]) -> list:
+    """按排序顺序轮流分配：第i个分片取第 i, i+N, i+2N... 项
+
+    用于划分全文爬取目标：各分片分到的文章排名相近、数量相差不超过1，
+    同一来源的文章分散到不同runner上，各自的IP分担该主机的请求。
+    输入相同则结果相同，分片之间不会重复或遗漏。
+    """
+    if shard is None:
+        return items
+    index, total = shard
+    return items[index::total]
+
+
+def shard_state_path(state_path: Path, shard: Shard) -> Path:
+    """每个分片使用独立的检查点文件"""
+    index, total = shard
+    return state_path.with_name(f"{state_path.stem}.shard{index}of{total}{state_path.suffix}")
+
+
+def selection_path(shard_dir: Path) -> Path:
+    return shard_dir / 'selection.json'
+
+
+def save_selection(shard_dir: Path, articles: List[dict]) -> Path:
+    """保存全局排序结果（--select 阶段），各分片据此划分全文爬取目标，合并步骤据此输出"""
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    output_file = selection_path(shard_dir)
+    output_data = {
+        'metadata': {
+            'generated_at': datetime.utcnow().isoformat(),
+            'total_articles': len(articles),
+            'crawl_targets': sum(1 for a in articles if a.get('fetch_full_content')),
+        },
+        'articles': articles
+    }
+    tmp_file = output_file.with_suffix('.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(output_data, f, ensure_ascii=False, indent=2, default=json_default)
+    tmp_file.replace(output_file)
+    return output_file
+
+
+def load_selection(shard_dir: Path) -> List[Article]:
+    """读取全局排序结果"""
+    with open(selection_path(shard_dir), 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [Article.from_dict(item) for item in data['articles']]
+
+
+def crawl_targets(selected: List[dict], shard: Shard) -> List[dict]:
+    """本分片负责爬取全文的文章（全局排序中标记了全文的文章按排序顺序轮流分配）"""
+    return select_shard([a for a in selected if a.get('fetch_full_content')], shard)
+
+
+def save_shard_output(shard_dir: Path, shard: Shard, articles: List[dict],
+                      crawler_stats: dict = None) -> Path:
+    """保存分片结果（该分片的爬取目标，含已爬取的全文）供合并步骤填回排序结果"""
+    index, total = shard
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    output_file = shard_dir / f'shard_{index}_of_{total}.json'
+    
+    output_data = {
+        'metadata': {
+            'generated_at': datetime.utcnow().isoformat(),
+            'shard': index,
+            'total_shards': total,
+            'total_articles': len(articles),
+            'full_content_count': sum(1 for a in articles if a.get('full_content')),
+            'crawler': crawler_stats
+        },
+        'articles': articles
+    }
+    
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(output_data, f, ensure_ascii=False, indent=2, default=json_default)
+    
+    return output_file
+
+
+def load_shard_outputs(shard_dir: Path) -> Tuple[List[dict], List[dict]]:
+    """读取所有分片结果，按文章ID去重（优先保留带全文的副本）
+    
+    返回 (文章列表, 各分片的metadata)。缺失的分片只记警告，用已有分片继续。
+    """
+    files = sorted(shard_dir.glob('shard_*_of_*.json'),
+                   key=lambda p: int(p.stem.split('_')[1]))
+    
+    by_id = {}
+    shards = []
+    for file in files:
+        try:
+            with open(file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Skipping unreadable shard output {file}: {e}")
+            continue
+        
+        shards.append(data['metadata'])
+        for article in map(Article.from_dict, data['articles']):
+            existing = by_id.get(article['id'])
+            if existing is None or (article.get('full_content') and not existing.get('full_content')):
+                by_id[article['id']] = article
+        logger.info(f"  {file.name}: {len(data['articles'])} articles, "
+                   f"{data['metadata']['full_content_count']} with full content")
+    
+    if shards:
+        expected = shards[0]['total_shards']
+        missing = sorted(set(range(expected)) - {m['shard'] for m in shards})
+        if missing:
+            logger.warning(f"Missing shard outputs: {missing} of {expected}, merging the rest")
+    
+    return list(by_id.values()), shards
@@ -0,0 +1,131 @@
+import hashlib
+from typing import Dict
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit, urlunsplit
+
+# 跟踪参数：不影响文章内容，只用于统计来源（前缀匹配 + 精确匹配，均按小写比较）
+TRACKING_PREFIXES = ('utm_', 'guce_', 'soc_', 'mc_', 'ga_')
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'cmpid', 'srnd', 'sref', 'taid', 'ncid',
+    'guccounter', '.tsrc', 'tsrc', 'yptr', 'rpc', 'smid', 'leadsource', 'in_source',
+    'embedded-checkout', 'ref', 'referrer', 'feedtype', 'feedname', 'rss',
+}
+
+# 可以离线解开的跳转包装：主机 -> 存放目标URL的查询参数
+REDIRECT_PARAMS = {
+    'google.com': ('url', 'q'),
+    'news.google.com': ('url',),
+    'l.facebook.com': ('u',),
+    'out.reddit.com': ('url',),
+    'finance.yahoo.com': ('url',),
+}
+
+# 记录字段哈希的字段（服务器据此逐字段复用译文）
+HASHED_FIELDS = ('title', 'summary', 'full_content')
+
+# 参与内容修订号的字段：修订号变化时已发送的文章会再次发送。全文不参与——是否爬到全文、
+# 清洗结果随运行变化（入选全文名单、爬取失败或超时），不代表文章被编辑
+REVISION_FIELDS = ('title', 'summary')
+
+
+def canonicalize_url(url: str) -> str:
+    """规范化文章URL，用作文章身份
+
+    解开能离线识别的跳转包装（Yahoo搜索 RU=、Google AMP缓存、?url= 类跳转），
+    统一为https、小写主机并去掉 www./m./amp. 前缀和默认端口，去掉 /amp 路径、
+    片段和跟踪参数，其余查询参数排序。无法解析的URL原样返回（去掉首尾空白）。
+    """
+    url = url.strip()
+    for _ in range(3):  # 包装可能嵌套，最多解三层
+        target = _unwrap_redirect(url)
+        if target is None:
+            break
+        url = target
+
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        return url
+
+    host = parts.hostname.lower().rstrip('.')
+    for prefix in ('www.', 'm.', 'amp.'):
+        if host.startswith(prefix) and host.count('.') > 1:
+            host = host[len(prefix):]
+            break
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or '/'
+    if path.startswith('/amp/'):
+        path = path[len('/amp'):]
+    if path.endswith('/amp'):
+        path = path[:-len('/amp')] or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking(key)
+    )
+    return urlunsplit(('https', host, path, urlencode(query), ''))
+
+
+def _is_tracking(key: str) -> bool:
+    key = key.lower()
+    return key in TRACKING_PARAMS or key.startswith(TRACKING_PREFIXES)
+
+
+def _unwrap_redirect(url: str):
+    """返回跳转包装中的目标URL；不是已知包装时返回None"""
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return None
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+
+    # Yahoo 搜索跳转：/_ylt=.../RU=<编码后的URL>/RK=.../RS=...
+    if host.endswith('search.yahoo.com'):
+        for segment in parts.path.split('/'):
+            if segment.startswith('RU='):
+                return unquote(segment[3:])
+
+    # Google AMP 缓存：/amp/s/<host>/<path>
+    if host == 'google.com' and parts.path.startswith('/amp/s/'):
+        return 'https://' + parts.path[len('/amp/s/'):]
+
+    params = REDIRECT_PARAMS.get(host)
+    if params:
+        query = dict(parse_qsl(parts.query))
+        for name in params:
+            target = query.get(name, '')
+            if target.startswith(('http://', 'https://')):
+                return target
+    return None
+
+
+def article_id(canonical_url: str) -> str:
+    """文章ID：规范化URL的哈希（标题修改不会产生新ID）"""
+    return hashlib.md5(canonical_url.encode('utf-8')).hexdigest()[:16]
+
+
+def field_hashes(article: dict) -> Dict[str, str]:
+    """各内容字段的短哈希（空字段不记录）"""
+    hashes = {}
+    for field in HASHED_FIELDS:
+        value = article.get(field)
+        if value:
+            hashes[field] = hashlib.blake2b(value.encode('utf-8'), digest_size=8).hexdigest()
+    return hashes
+
+
+def stamp_revision(article: dict):
+    """写入字段哈希和内容修订号（标题或摘要变化时修订号变化）"""
+    hashes = field_hashes(article)
+    article['field_hashes'] = hashes
+    article['revision'] = hashlib.blake2b(
+        '|'.join(f"{field}:{hashes.get(field, '')}" for field in REVISION_FIELDS).encode('utf-8'),
+        digest_size=8,
+    ).hexdigest()
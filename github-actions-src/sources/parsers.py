@@ -0,0 +1,141 @@
+import json
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sources.registry import Feed
+
+logger = logging.getLogger(__name__)
+
+# 各类型请求时使用的Accept头
+ACCEPT = {
+    'rss': 'application/rss+xml,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'json': 'application/json,*/*;q=0.8',
+    'sitemap': 'application/xml,text/xml;q=0.9,*/*;q=0.8',
+}
+
+# JSON API 默认字段映射（可在feed配置的 fields 中覆盖，支持 a.b.c 形式的嵌套路径）
+DEFAULT_JSON_FIELDS = {
+    'title': 'title',
+    'link': 'url',
+    'summary': 'summary',
+    'published': 'published',
+    'author': 'author',
+}
+
+_SITEMAP_NS = {
+    'sm': 'http://www.sitemaps.org/schemas/sitemap/0.9',
+    'news': 'http://www.google.com/schemas/sitemap-news/0.9',
+}
+
+
+def parse_rss(content: bytes, feed: Feed) -> List[dict]:
+    """解析RSS/Atom"""
+    import feedparser
+
+    parsed = feedparser.parse(content)
+    if parsed.bozo and not parsed.entries:
+        raise ValueError(f"Unparseable feed: {parsed.get('bozo_exception')}")
+
+    entries = []
+    for entry in parsed.entries[:feed.limit]:
+        entries.append({
+            'title': entry.get('title', ''),
+            'link': entry.get('link', ''),
+            'summary': entry.get('summary', '') or entry.get('description', ''),
+            'published': _parse_struct_time(entry),
+            'author': entry.get('author', ''),
+        })
+    return entries
+
+
+def parse_json(content: bytes, feed: Feed) -> List[dict]:
+    """解析JSON API：feed.options 中 items 为文章列表的路径，fields 为字段映射"""
+    data = json.loads(content)
+    items = _lookup(data, feed.options.get('items', ''))
+    if not isinstance(items, list):
+        raise ValueError(f"JSON path '{feed.options.get('items', '')}' is not a list")
+
+    fields = {**DEFAULT_JSON_FIELDS, **feed.options.get('fields', {})}
+    entries = []
+    for item in items[:feed.limit]:
+        entries.append({
+            'title': str(_lookup(item, fields['title']) or ''),
+            'link': str(_lookup(item, fields['link']) or ''),
+            'summary': str(_lookup(item, fields['summary']) or ''),
+            'published': _parse_iso(_lookup(item, fields['published'])),
+            'author': str(_lookup(item, fields['author']) or ''),
+        })
+    return entries
+
+
+def parse_sitemap(content: bytes, feed: Feed) -> List[dict]:
+    """解析（新闻）站点地图：标题取 news:title，没有时用URL路径代替"""
+    import xml.etree.ElementTree as ET
+
+    root = ET.fromstring(content)
+    entries = []
+    for url in root.findall('sm:url', _SITEMAP_NS):
+        link = (url.findtext('sm:loc', '', _SITEMAP_NS) or '').strip()
+        if not link:
+            continue
+        title = url.findtext('news:news/news:title', '', _SITEMAP_NS).strip()
+        published = (url.findtext('news:news/news:publication_date', '', _SITEMAP_NS)
+                     or url.findtext('sm:lastmod', '', _SITEMAP_NS))
+        entries.append({
+            'title': title or link.rstrip('/').rsplit('/', 1)[-1].replace('-', ' '),
+            'link': link,
+            'summary': '',
+            'published': _parse_iso(published),
+            'author': '',
+        })
+
+    # 按发布时间倒序，只取最新的 limit 篇
+    entries.sort(key=lambda e: e['published'] or datetime.min, reverse=True)
+    return entries[:feed.limit]
+
+
+PARSERS: Dict[str, Callable[[bytes, Feed], List[dict]]] = {
+    'rss': parse_rss,
+    'json': parse_json,
+    'sitemap': parse_sitemap,
+}
+
+
+def _lookup(data: Any, path: str) -> Any:
+    """按 a.b.c 路径取值，路径为空时返回自身"""
+    for part in path.split('.') if path else []:
+        if isinstance(data, dict):
+            data = data.get(part)
+        elif isinstance(data, list) and part.isdigit() and int(part) < len(data):
+            data = data[int(part)]
+        else:
+            return None
+    return data
+
+
+def _parse_struct_time(entry) -> Optional[datetime]:
+    """解析feedparser的发布时间"""
+    for field in ['published_parsed', 'updated_parsed', 'created_parsed']:
+        if hasattr(entry, field) and getattr(entry, field):
+            try:
+                t = getattr(entry, field)
+                return datetime(*t[:6])
+            except:
+                continue
+    return None
+
+
+def _parse_iso(value) -> Optional[datetime]:
+    """解析ISO 8601时间字符串或Unix时间戳（统一转换为UTC的naive datetime）"""
+    if not value:
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            return datetime.utcfromtimestamp(value)
+        parsed = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+        if parsed.tzinfo is not None:
+            parsed = (parsed - parsed.utcoffset()).replace(tzinfo=None)
+        return parsed
+    except (ValueError, OverflowError, OSError):
+        return None
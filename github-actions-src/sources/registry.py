@@ -0,0 +1,97 @@
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+FEED_TYPES = ('rss', 'json', 'sitemap')
+DEFAULT_LIMIT = 15
+
+
+class Feed:
+    """单个抓取入口（一个RSS/JSON API/站点地图URL）"""
+    
+    __slots__ = ('key', 'source', 'category', 'url', 'type', 'limit', 'priority', 'options')
+    
+    def __init__(self, source: str, category: str, url: str, type: str = 'rss',
+                 limit: int = DEFAULT_LIMIT, priority: int = 1, options: Optional[dict] = None):
+        self.key = f"{source}/{category}"
+        self.source = source
+        self.category = category
+        self.url = url
+        self.type = type
+        self.limit = limit
+        self.priority = priority
+        self.options = options or {}  # 解析器参数（如JSON API的 items 路径和字段映射）
+    
+    def __repr__(self):
+        return f"Feed({self.key}, {self.type}, {self.url})"
+
+
+class Source:
+    """来源：优先级、入选配额、全文爬取策略和它的抓取入口"""
+    
+    __slots__ = ('name', 'priority', 'quota', 'crawl', 'feeds')
+    
+    def __init__(self, name: str, priority: int, quota: Optional[int], crawl: bool, feeds: List[Feed]):
+        self.name = name
+        self.priority = priority
+        self.quota = quota   # 每次最多入选的文章数（None表示不限）
+        self.crawl = crawl   # 入选文章是否允许爬取全文
+        self.feeds = feeds
+
+
+class SourceRegistry:
+    """来源注册表 - 启动时从配置加载一次，抓取器和排序器共用
+    
+    config.yaml 中每个来源声明 priority / quota / crawl / type / limit 和 feeds；
+    单个feed可以是URL字符串，也可以是带 url / type / limit / 解析参数的字典。
+    """
+    
+    def __init__(self, config: dict):
+        self.sources: Dict[str, Source] = {
+            name: self._load_source(name, source_config)
+            for name, source_config in config['sources'].items()
+        }
+        
+        logger.info(f"Loaded {len(self.sources)} sources with {len(self.feeds())} feeds")
+    
+    @staticmethod
+    def _load_source(name: str, source_config: dict) -> Source:
+        """解析单个来源的配置，feed级参数覆盖来源级默认值"""
+        priority = source_config.get('priority', 1)
+        default_type = source_config.get('type', 'rss')
+        default_limit = source_config.get('limit', DEFAULT_LIMIT)
+        
+        feeds = []
+        for category, feed_config in source_config.get('feeds', {}).items():
+            if isinstance(feed_config, str):
+                feed_config = {'url': feed_config}
+            options = {k: v for k, v in feed_config.items() if k not in ('url', 'type', 'limit')}
+            feed = Feed(name, category, feed_config['url'],
+                        type=feed_config.get('type', default_type),
+                        limit=feed_config.get('limit', default_limit),
+                        priority=priority,
+                        options=options)
+            if feed.type not in FEED_TYPES:
+                raise ValueError(f"Unknown feed type '{feed.type}' for {feed.key}, expected one of {FEED_TYPES}")
+            feeds.append(feed)
+        
+        return Source(name, priority, source_config.get('quota'), source_config.get('crawl', False), feeds)
+    
+    def feeds(self) -> List[Feed]:
+        """按配置顺序返回所有抓取入口"""
+        return [feed for source in self.sources.values() for feed in source.feeds]
+    
+    def get(self, name: str) -> Optional[Source]:
+        """按名称获取来源（未注册的来源返回None）"""
+        return self.sources.get(name)
+    
+    def quota(self, name: str) -> Optional[int]:
+        """来源的入选配额"""
+        source = self.sources.get(name)
+        return source.quota if source else None
+    
+    def can_crawl(self, name: str) -> bool:
+        """来源是否允许爬取全文"""
+        source = self.sources.get(name)
+        return bool(source and source.crawl)
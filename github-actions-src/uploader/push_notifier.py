@@ -0,0 +1,68 @@
+import hashlib
+import hmac
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class PushNotifier:
+    """Artifact就绪通知 - 上传完成后通知服务器立即拉取，免去等待下一次定时轮询
+    
+    通知地址和签名密钥来自环境变量 PUSH_NOTIFY_URL / PUSH_SECRET（仓库 Secrets），
+    未配置时跳过。签名为 HMAC-SHA256(secret, "{timestamp}." + body)，与服务器端 receiver 一致。
+    """
+    
+    def __init__(self, timeout: float = 10, retries: int = 3):
+        self.url = os.environ.get('PUSH_NOTIFY_URL', '')
+        self.secret = os.environ.get('PUSH_SECRET', '')
+        self.run_id = os.environ.get('GITHUB_RUN_ID', 'local')
+        self.timeout = timeout
+        self.retries = retries
+    
+    @property
+    def enabled(self) -> bool:
+        return bool(self.url and self.secret)
+    
+    def notify(self, file_path: Path, artifact_name: str = '') -> bool:
+        """发送通知（携带run ID、artifact名称和JSON文件SHA-256）；失败不影响工作流"""
+        if not self.enabled:
+            logger.info("PUSH_NOTIFY_URL/PUSH_SECRET not set, skipping server notification")
+            return False
+        
+        import requests
+        
+        body = json.dumps({
+            'run_id': self.run_id,
+            'artifact': artifact_name or f'news-data-{self.run_id}',
+            'sha256': hashlib.sha256(file_path.read_bytes()).hexdigest(),
+        }).encode('utf-8')
+        
+        for attempt in range(1, self.retries + 1):
+            # 每次重试重新签名，避免时间戳过期
+            timestamp = str(int(time.time()))
+            signature = hmac.new(self.secret.encode('utf-8'), timestamp.encode('utf-8') + b'.' + body,
+                                 hashlib.sha256).hexdigest()
+            try:
+                response = requests.post(self.url, data=body, timeout=self.timeout, headers={
+                    'Content-Type': 'application/json',
+                    'X-Newsbot-Timestamp': timestamp,
+                    'X-Newsbot-Signature': f'sha256={signature}',
+                })
+                if response.status_code < 300:
+                    logger.info(f"✓ Server notified ({response.status_code}): {response.text.strip()}")
+                    return True
+                if response.status_code < 500:
+                    logger.error(f"Server rejected notification: {response.status_code} {response.text.strip()}")
+                    return False
+                logger.warning(f"Notification attempt {attempt} failed: HTTP {response.status_code}")
+            except requests.RequestException as e:
+                logger.warning(f"Notification attempt {attempt} failed: {e}")
+            if attempt < self.retries:
+                time.sleep(2 ** attempt)
+        
+        logger.error("Server notification failed, the server will pick up the data on its next poll")
+        return False
@@ -0,0 +1,77 @@
+"""对比两种全文提取模式（dom / html）的传输字节数和单篇耗时
+
+用法：
+    python scripts/bench_extraction.py saved_pages/   # 目录中放若干保存下来的文章页 *.html
+
+脚本用本地HTTP服务器提供这些页面，同一个浏览器页面依次用两种模式加载和提取，
+html模式的耗时包含在Python中解析（BeautifulSoup）的时间。
+"""
+import functools
+import statistics
+import sys
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import yaml
+
+SRC_DIR = Path(__file__).resolve().parent.parent / 'github-actions-src'
+sys.path.insert(0, str(SRC_DIR))
+
+from crawler.extraction import build_content, extract_content  # noqa: E402
+from crawler.stealth_browser import StealthBrowser  # noqa: E402
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+    pages_dir = Path(sys.argv[1]).resolve()
+    pages = sorted(p.name for p in pages_dir.glob('*.html'))
+    if not pages:
+        print(f"No *.html files in {pages_dir}")
+        sys.exit(1)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(QuietHandler, directory=str(pages_dir)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    from playwright.sync_api import sync_playwright
+
+    with open(SRC_DIR / 'config.yaml', 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    results = {}
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+        for mode in ('dom', 'html'):
+            crawler = StealthBrowser(config)
+            crawler.extraction = mode
+            timings = []
+            for name in pages:
+                page.goto(f"{base_url}/{name}", wait_until='load')
+                start = time.perf_counter()
+                result = crawler._capture(page)
+                if isinstance(result, list):
+                    build_content(result)
+                else:
+                    extract_content(result, name)
+                timings.append((time.perf_counter() - start) * 1000)
+            results[mode] = (crawler.stats['transfer_bytes'], timings, dict(crawler.stats['extraction']))
+        browser.close()
+    server.shutdown()
+
+    print(f"{len(pages)} pages from {pages_dir}")
+    print(f"{'mode':<6} {'bytes':>12} {'median ms':>10} {'max ms':>8}  captured")
+    for mode, (transferred, timings, captured) in results.items():
+        print(f"{mode:<6} {transferred:>12} {statistics.median(timings):>10.1f} {max(timings):>8.1f}  {captured}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""飞书卡片渲染与发送基准：本地模拟飞书接口，测量渲染耗时、卡片数/大小和连续发送耗时
+
+用法：
+    python scripts/bench_feishu_cards.py [--articles 1000]
+
+模拟服务实现 /auth/v3/app_access_token/internal 和 /im/v1/messages，
+超过30KB的消息返回错误码，与真实接口一致；FeishuBot 的 base_url 指向模拟服务。
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import yaml
+
+SERVER_DIR = Path(__file__).resolve().parent.parent / 'server'
+sys.path.insert(0, str(SERVER_DIR))
+
+from notifier.feishu_bot import FeishuBot  # noqa: E402
+
+FEISHU_MAX_BYTES = 30 * 1024
+
+
+class MockFeishu(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive，与真实接口一致
+    sizes = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if '/auth/' in self.path:
+            self._reply({'code': 0, 'app_access_token': 'mock-token', 'expire': 7200})
+            return
+        size = len(json.loads(body)['content'].encode('utf-8'))
+        MockFeishu.sizes.append(size)
+        if size > FEISHU_MAX_BYTES:
+            self._reply({'code': 230025, 'msg': 'message content too long'})
+        else:
+            self._reply({'code': 0, 'data': {'message_id': f'om_{len(MockFeishu.sizes)}'}})
+
+    def _reply(self, payload: dict):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_articles(count: int) -> list:
+    """中英文混合的合成文章，长度与真实翻译结果相近"""
+    articles = []
+    for i in range(count):
+        articles.append({
+            'id': f'bench{i:05d}',
+            'title': f'Fed officials signal patience on rate cuts as inflation cools ({i})',
+            'title_zh': f'美联储官员暗示降息需保持耐心，通胀持续降温（{i}）',
+            'summary': 'Policymakers said they want more evidence before easing. ' * 3,
+            'summary_zh': '政策制定者表示，在放松政策之前需要看到更多证据，市场预期年内降息两次。' * 2,
+            'link': f'https://www.bloomberg.com/news/articles/2026-10-19/bench-{i}',
+            'source': ('bloomberg', 'reuters', 'yahoo')[i % 3],
+            'category': 'markets',
+            'published': '2026-10-19T08:30:00',
+        })
+    return articles
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Feishu card rendering and sending against a local mock')
+    parser.add_argument('--articles', type=int, default=1000)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockFeishu)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with open(SERVER_DIR / 'config.yaml', 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    config['feishu']['base_url'] = f"http://127.0.0.1:{server.server_port}/open-apis"
+    os.environ.setdefault('FEISHU_APP_ID', 'bench')
+    os.environ.setdefault('FEISHU_APP_SECRET', 'bench')
+    os.environ.setdefault('FEISHU_CHAT_ID', 'oc_bench')
+
+    bot = FeishuBot(config)
+    articles = make_articles(args.articles)
+    metadata = {'generated_at': '2026-10-19T08:30:00', 'total_articles': len(articles)}
+
+    start = time.perf_counter()
+    cards = bot.render(articles, metadata)
+    render_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    sent = bot.send_news(articles, metadata)
+    send_s = time.perf_counter() - start
+    server.shutdown()
+
+    sizes = [len(card.encode('utf-8')) for card in cards]
+    print(f"articles        {len(articles)}")
+    print(f"render          {render_ms:.1f} ms")
+    print(f"cards           {len(cards)} (sent {sent}, rejected {sum(s > FEISHU_MAX_BYTES for s in MockFeishu.sizes)})")
+    print(f"card bytes      max {max(sizes)}, median {statistics.median(sizes):.0f}")
+    print(f"send            {send_s:.2f} s")
+
+
+if __name__ == '__main__':
+    main()
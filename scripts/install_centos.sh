@@ -45,7 +45,6 @@ pip install --upgrade pip
 # 创建临时requirements文件
 cat > /tmp/server_requirements.txt << 'EOF'
 requests
-openai
 python-dateutil
 pyyaml
 python-dotenv
@@ -0,0 +1,128 @@
+"""本地OpenAI兼容接口模拟服务，用于验证翻译请求的提示词缓存命中情况
+
+用法：
+    python scripts/openai_stub.py [--port 8790]
+    cd server && OPENAI_API_KEY=test OPENAI_BASE_URL=http://127.0.0.1:8790/v1 python main.py
+
+模拟服务只实现 POST /v1/chat/completions：按请求中的 prompt_cache_key 和最长公共前缀模拟服务端缓存
+（与OpenAI一致：前缀不足1024 token不缓存，命中部分按128 token取整），在 usage.prompt_tokens_details.cached_tokens
+中返回命中的token数，译文为 "[译] " + 原文。退出时打印请求数和缓存命中率。
+"""
+import argparse
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent.parent / 'server'
+sys.path.insert(0, str(SERVER_DIR))
+
+from translator.token_budget import count_tokens  # noqa: E402
+
+MIN_CACHED_TOKENS = 1024
+CACHE_BLOCK = 128
+
+
+class StubState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.prefixes = {}  # prompt_cache_key -> 已见过的请求前缀（拼接后的消息文本）
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    def complete(self, payload: dict) -> dict:
+        messages = payload.get('messages', [])
+        prompt = ''.join(f"<{m.get('role')}>{m.get('content', '')}" for m in messages)
+        prompt_tokens = count_tokens(prompt)
+        key = payload.get('prompt_cache_key') or payload.get('model', '')
+
+        with self.lock:
+            cached = 0
+            seen = self.prefixes.get(key)
+            if seen is not None:
+                common = _common_prefix(seen, prompt)
+                tokens = count_tokens(prompt[:common])
+                if tokens >= MIN_CACHED_TOKENS:
+                    cached = tokens // CACHE_BLOCK * CACHE_BLOCK
+            self.prefixes[key] = prompt
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.cached_tokens += cached
+
+        text = messages[-1].get('content', '').split('\n\n', 1)[-1] if messages else ''
+        content = f"[译] {text}"
+        return {
+            'id': f"chatcmpl-stub-{self.requests}",
+            'object': 'chat.completion',
+            'model': payload.get('model', ''),
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': content}}],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': count_tokens(content),
+                'total_tokens': prompt_tokens + count_tokens(content),
+                'prompt_tokens_details': {'cached_tokens': cached},
+            },
+        }
+
+
+def _common_prefix(a: str, b: str) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if not self.path.rstrip('/').endswith('/chat/completions'):
+                self._reply(404, {'error': {'message': 'not found'}})
+                return
+            length = int(self.headers.get('Content-Length', 0))
+            try:
+                payload = json.loads(self.rfile.read(length))
+            except ValueError:
+                self._reply(400, {'error': {'message': 'invalid JSON'}})
+                return
+            self._reply(200, state.complete(payload))
+
+        def _reply(self, status: int, body: dict):
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OpenAI-compatible stub reporting prompt cache hits')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8790)
+    args = parser.parse_args()
+
+    state = StubState()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    print(f"OpenAI stub listening on http://{args.host}:{server.server_port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        rate = state.cached_tokens / state.prompt_tokens if state.prompt_tokens else 0
+        print(f"{state.requests} requests, {state.prompt_tokens} prompt tokens, "
+              f"{state.cached_tokens} cached ({rate:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryOutbox:
+    """投递发件箱 - 渲染好的卡片先落库，再分批发送（至少一次）
+    
+    与NewsCache共用同一个SQLite文件。一次运行的全部卡片构成一个批次，
+    批次内所有卡片都发送成功后，其中的文章才算已投递。
+    """
+    
+    def __init__(self, config: dict):
+        self.config = config
+        self.cache_config = config.get('cache', {})
+        self.outbox_config = config.get('outbox', {})
+        self.db_path = Path(self.cache_config.get('db_path', 'data/cache/news_cache.db'))
+        self.retention_hours = self.cache_config.get('retention_hours', 24)
+        self.batch_size = self.outbox_config.get('batch_size', 20)
+        self.max_attempts = self.outbox_config.get('max_attempts', 10)
+        self.retry_rounds = self.outbox_config.get('retry_rounds', 3)
+        self.retry_delay = self.outbox_config.get('retry_delay', 5)
+        
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+    
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.db_path))
+    
+    def _init_db(self):
+        """初始化发件箱表"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS outbox_batches (
+                batch_id TEXT PRIMARY KEY,
+                articles TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                delivered_at TIMESTAMP
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS outbox (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                batch_id TEXT,
+                chat_id TEXT,
+                card TEXT,
+                status TEXT DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                last_error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                sent_at TIMESTAMP
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox(status, seq)
+        ''')
+        
+        conn.commit()
+        conn.close()
+    
+    def enqueue(self, chat_cards: Dict[str, List[str]], articles: List[dict]) -> str:
+        """把一次运行渲染出的卡片写入发件箱，返回批次ID"""
+        batch_id = uuid.uuid4().hex
+        # 只保留缓存去重需要的字段
+        article_refs = [
+            {'id': a['id'], 'title': a.get('title', ''), 'link': a.get('link', ''), 'source': a.get('source', ''),
+             'revision': a.get('revision')}
+            for a in articles
+        ]
+        
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                'INSERT INTO outbox_batches (batch_id, articles) VALUES (?, ?)',
+                (batch_id, json.dumps(article_refs, ensure_ascii=False))
+            )
+            conn.executemany(
+                'INSERT INTO outbox (batch_id, chat_id, card) VALUES (?, ?, ?)',
+                [(batch_id, chat_id, card) for chat_id, cards in chat_cards.items() for card in cards]
+            )
+        conn.close()
+        
+        logger.info(f"Enqueued {sum(len(c) for c in chat_cards.values())} cards for {len(articles)} articles")
+        return batch_id
+    
+    def pending_article_ids(self) -> Set[str]:
+        """尚未投递完成的批次中的文章ID（避免重复入队）"""
+        conn = self._connect()
+        rows = conn.execute('SELECT articles FROM outbox_batches WHERE delivered_at IS NULL').fetchall()
+        conn.close()
+        return {ref['id'] for row in rows for ref in json.loads(row[0])}
+    
+    def drain(self, sender) -> Tuple[List[dict], int]:
+        """分批发送待发卡片，失败的在本次运行内重试 retry_rounds 轮
+        
+        返回 (本次完成投递的文章, 仍待发送的卡片数)
+        """
+        for round_no in range(self.retry_rounds):
+            if round_no > 0:
+                logger.info(f"Outbox retry round {round_no + 1}/{self.retry_rounds} in {self.retry_delay}s")
+                time.sleep(self.retry_delay)
+            
+            failures = 0
+            # 本轮只处理一遍当前待发的卡片，失败的留到下一轮；
+            # 某个群失败后本轮不再发它后面的卡片，保证群内顺序
+            blocked = set()
+            last_seq = 0
+            while True:
+                rows = self._next_batch(last_seq)
+                if not rows:
+                    break
+                last_seq = rows[-1][0]
+                failures += self._send_rows(sender, rows, blocked)
+            
+            if failures == 0:
+                break
+        
+        delivered = self._complete_batches()
+        remaining = self.pending_count()
+        if remaining:
+            logger.warning(f"Outbox: {remaining} cards still pending")
+        return delivered, remaining
+    
+    def _next_batch(self, after_seq: int) -> List[tuple]:
+        conn = self._connect()
+        rows = conn.execute('''
+            SELECT seq, chat_id, card FROM outbox
+            WHERE status = 'pending' AND seq > ?
+            ORDER BY seq LIMIT ?
+        ''', (after_seq, self.batch_size)).fetchall()
+        conn.close()
+        return rows
+    
+    def _send_rows(self, sender, rows: List[tuple], blocked: Set[str]) -> int:
+        """并发发送一批卡片（同一群内保持顺序），更新状态，返回失败数"""
+        chat_rows: Dict[str, List[tuple]] = {}
+        skipped = 0
+        for row in rows:
+            if row[1] in blocked:
+                skipped += 1
+                continue
+            chat_rows.setdefault(row[1], []).append(row)
+        
+        if not chat_rows:
+            return skipped
+        
+        report = sender.dispatch({chat_id: [r[2] for r in items] for chat_id, items in chat_rows.items()})
+        
+        sent_seqs = []
+        failed = []
+        for chat_id, items in chat_rows.items():
+            result = report.get(chat_id, {'sent': 0, 'error': 'not dispatched'})
+            # 同一群的卡片按顺序发送，前 sent 张成功
+            sent_seqs.extend(r[0] for r in items[:result['sent']])
+            if result['sent'] < len(items):
+                blocked.add(chat_id)
+                # 只有真正尝试过的那张计入失败次数，后面的卡片原样保留
+                failed.append((result['error'], items[result['sent']][0]))
+                skipped += len(items) - result['sent'] - 1
+        
+        conn = self._connect()
+        with conn:
+            conn.executemany('''
+                UPDATE outbox SET status = 'sent', attempts = attempts + 1, sent_at = CURRENT_TIMESTAMP
+                WHERE seq = ?
+            ''', [(seq,) for seq in sent_seqs])
+            conn.executemany('''
+                UPDATE outbox SET attempts = attempts + 1, last_error = ?,
+                    status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END
+                WHERE seq = ?
+            ''', [(error, self.max_attempts, seq) for error, seq in failed])
+        conn.close()
+        
+        return len(failed) + skipped
+    
+    def _complete_batches(self) -> List[dict]:
+        """标记没有待发卡片的批次，返回其中的文章
+        
+        卡片达到 max_attempts 后为 'failed'（终态），所在批次同样视为结束：文章交给缓存，
+        不会在清理后被当作新文章重新翻译、重新发给已经收到其他卡片的群。
+        """
+        conn = self._connect()
+        with conn:
+            rows = conn.execute('''
+                SELECT b.batch_id, b.articles,
+                    (SELECT COUNT(*) FROM outbox o WHERE o.batch_id = b.batch_id AND o.status = 'failed')
+                FROM outbox_batches b
+                WHERE b.delivered_at IS NULL AND NOT EXISTS (
+                    SELECT 1 FROM outbox o WHERE o.batch_id = b.batch_id AND o.status = 'pending'
+                )
+            ''').fetchall()
+            for batch_id, _, failed in rows:
+                if failed:
+                    logger.error(f"Outbox batch {batch_id}: {failed} cards abandoned after "
+                                 f"{self.max_attempts} attempts, marking batch as finished")
+            conn.executemany(
+                'UPDATE outbox_batches SET delivered_at = CURRENT_TIMESTAMP WHERE batch_id = ?',
+                [(row[0],) for row in rows]
+            )
+            self._cleanup(conn)
+        conn.close()
+        
+        return [ref for row in rows for ref in json.loads(row[1])]
+    
+    def _cleanup(self, conn: sqlite3.Connection):
+        """清理已投递或已放弃的过期记录"""
+        cutoff_time = (datetime.now() - timedelta(hours=self.retention_hours)).isoformat()
+        conn.execute('''
+            DELETE FROM outbox WHERE status != 'pending' AND created_at < ?
+        ''', (cutoff_time,))
+        conn.execute('''
+            DELETE FROM outbox_batches WHERE created_at < ? AND delivered_at IS NOT NULL AND NOT EXISTS (
+                SELECT 1 FROM outbox o WHERE o.batch_id = outbox_batches.batch_id
+            )
+        ''', (cutoff_time,))
+    
+    def pending_count(self) -> int:
+        """待发送的卡片数"""
+        conn = self._connect()
+        count = conn.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
+        conn.close()
+        return count
@@ -1,15 +1,23 @@
 import hashlib
+import json
 import logging
 import sqlite3
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List
 
+from cache.memory import BloomFilter, LRUCache
+from models.article import Article, json_default
+
 logger = logging.getLogger(__name__)
 
 
 class NewsCache:
-    """SQLite缓存管理"""
+    """SQLite缓存管理
+    
+    前面叠一层进程内缓存：布隆过滤器快速排除从未见过的文章ID，
+    LRU（过期时间与retention_hours一致）缓存去重和翻译查询结果，写入时同步更新（write-through）。
+    """
     
     def __init__(self, config: dict):
         self.config = config
@@ -20,13 +28,27 @@ class NewsCache:
         # 确保目录存在
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
+        # 长连接：常驻进程中不必每次查询都重新打开数据库
+        self.conn = sqlite3.connect(str(self.db_path))
+        
         # 初始化数据库
         self._init_db()
+        
+        # 内存缓存层
+        ttl_seconds = self.retention_hours * 3600
+        max_entries = self.cache_config.get('memory_max_entries', 10000)
+        self.seen_lru = LRUCache(max_entries, ttl_seconds)
+        self.translation_lru = LRUCache(max_entries, ttl_seconds)
+        self.bloom_capacity = self.cache_config.get('bloom_capacity', 100000)
+        self.bloom_error_rate = self.cache_config.get('bloom_error_rate', 0.01)
+        self.bloom_negatives = 0
+        self.bloom_false_positives = 0
+        self.bloom_stale = 0  # 已从库中清理、仍留在布隆过滤器里的ID数
+        self._rebuild_bloom()
     
     def _init_db(self):
         """初始化数据库表"""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
+        cursor = self.conn.cursor()
         
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS articles (
@@ -34,81 +56,222 @@ class NewsCache:
                 title TEXT,
                 link TEXT,
                 source TEXT,
+                revision TEXT,
                 cached_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
         
+        # 旧版本的库没有 revision 列
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(articles)')}
+        if 'revision' not in columns:
+            cursor.execute('ALTER TABLE articles ADD COLUMN revision TEXT')
+        
+        # 修订号曾包含全文哈希，旧修订号与现在的算法不可比，清空后这些文章只按ID判断
+        if cursor.execute('PRAGMA user_version').fetchone()[0] < 1:
+            cursor.execute('UPDATE articles SET revision = NULL')
+            cursor.execute('PRAGMA user_version = 1')
+        
         # 创建索引
         cursor.execute('''
             CREATE INDEX IF NOT EXISTS idx_cached_at ON articles(cached_at)
         ''')
         
-        conn.commit()
-        conn.close()
+        # 已翻译的文章（与已发送的articles表分开：发送失败时不必重新翻译）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS translations (
+                id TEXT PRIMARY KEY,
+                payload TEXT,
+                translated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_translated_at ON translations(translated_at)
+        ''')
+        
+        self.conn.commit()
         logger.info(f"Cache database initialized: {self.db_path}")
     
+    def _rebuild_bloom(self):
+        """用数据库中现有的ID重建布隆过滤器（启动时，以及过期ID超过一半时）"""
+        ids = [row[0] for row in self.conn.execute('SELECT id FROM articles')]
+        self.bloom = BloomFilter(max(self.bloom_capacity, len(ids) * 2), self.bloom_error_rate)
+        for article_id in ids:
+            self.bloom.add(article_id)
+        self.bloom_stale = 0
+        self.synced_at = self.conn.execute('SELECT MAX(cached_at) FROM articles').fetchone()[0] or ''
+    
+    def _sync_from_db(self):
+        """把其他进程（如cron轮询）在上次同步后写入的文章补进内存缓存层
+        
+        常驻进程的缓存对象跨运行保留，不同步时另一进程发送过的文章会被布隆过滤器判为“一定没见过”。
+        """
+        rows = self.conn.execute(
+            'SELECT id, revision, cached_at FROM articles WHERE cached_at >= ?', (self.synced_at,)
+        ).fetchall()
+        for article_id, revision, cached_at in rows:
+            if article_id not in self.bloom:
+                self.bloom.add(article_id)
+            self.seen_lru.put(article_id, revision or '')
+            self.synced_at = max(self.synced_at, cached_at)
+    
+    def close(self):
+        self.conn.close()
+    
     def filter_new_articles(self, articles: List[dict]) -> List[dict]:
-        """过滤掉已缓存的文章"""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
+        """过滤掉已缓存的文章
         
-        # 清理过期缓存
-        self._cleanup_old_cache(cursor)
-        conn.commit()
+        文章ID在标题修改后保持不变，缓存同时记录发送时的内容修订号：已发送过但修订号变化的文章
+        （标题/摘要被编辑）视为新文章，重新翻译变化的字段并再次发送；全文不参与修订号，
+        有无全文或全文不同都不会触发重发。
+        任一方没有修订号（旧数据）时只按ID判断。
+        """
+        # 清理过期缓存；布隆过滤器不能删除，过期ID只会让查库多一些，超过一半时才全量重建
+        self.bloom_stale += self._cleanup_old_cache(self.conn.cursor())
+        self.conn.commit()
+        if self.bloom_stale * 2 > self.bloom.count:
+            self._rebuild_bloom()
+        else:
+            self._sync_from_db()
+        
+        # 1. 布隆过滤器判定“一定没见过”的直接算新文章；2. 再查LRU；3. 剩下的一次性查库
+        seen = {}  # 文章ID -> 发送时的修订号（没有记录时为空字符串）
+        to_query = []
+        for article in articles:
+            article_id = article['id']
+            if article_id not in self.bloom:
+                self.bloom_negatives += 1
+                continue
+            revision = self.seen_lru.get(article_id)
+            if revision is not None:
+                seen[article_id] = revision
+            else:
+                to_query.append(article_id)
         
-        # 获取所有已缓存的ID
-        cursor.execute('SELECT id FROM articles')
-        cached_ids = {row[0] for row in cursor.fetchall()}
+        if to_query:
+            placeholders = ','.join('?' * len(to_query))
+            found = {row[0]: row[1] or '' for row in self.conn.execute(
+                f'SELECT id, revision FROM articles WHERE id IN ({placeholders})', to_query
+            )}
+            self.bloom_false_positives += len(set(to_query) - set(found))
+            for article_id, revision in found.items():
+                self.seen_lru.put(article_id, revision)
+            seen.update(found)
         
-        # 过滤新文章
+        # 过滤新文章（修订过的已发送文章同样算新文章）
         new_articles = []
+        revised = 0
         for article in articles:
-            if article['id'] not in cached_ids:
+            if article['id'] not in seen:
                 new_articles.append(article)
+            elif seen[article['id']] and article.get('revision') and seen[article['id']] != article['revision']:
+                new_articles.append(article)
+                revised += 1
         
-        conn.close()
-        
-        logger.info(f"Cache check: {len(articles)} total, {len(new_articles)} new, {len(articles) - len(new_articles)} cached")
+        logger.info(f"Cache check: {len(articles)} total, {len(new_articles)} new ({revised} revised), "
+                   f"{len(articles) - len(new_articles)} cached")
         return new_articles
     
     def add_articles(self, articles: List[dict]):
         """添加文章到缓存"""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
+        cursor = self.conn.cursor()
         
         for article in articles:
             try:
                 cursor.execute('''
-                    INSERT OR REPLACE INTO articles (id, title, link, source, cached_at)
-                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                    INSERT OR REPLACE INTO articles (id, title, link, source, revision, cached_at)
+                    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
                 ''', (
                     article['id'],
                     article.get('title', '')[:200],  # 限制长度
                     article.get('link', ''),
-                    article.get('source', '')
+                    article.get('source', ''),
+                    article.get('revision')
                 ))
+                self.bloom.add(article['id'])
+                self.seen_lru.put(article['id'], article.get('revision') or '')
             except Exception as e:
                 logger.error(f"Error caching article {article.get('id')}: {e}")
         
-        conn.commit()
-        conn.close()
+        self.conn.commit()
         logger.info(f"Added {len(articles)} articles to cache")
     
-    def _cleanup_old_cache(self, cursor):
-        """清理过期的缓存"""
+    def get_translations(self, article_ids: List[str]) -> Dict[str, Article]:
+        """获取已翻译的文章（文章ID -> 翻译后的文章）"""
+        translations = {}
+        missing = []
+        for article_id in article_ids:
+            cached = self.translation_lru.get(article_id)
+            if cached is not None:
+                translations[article_id] = Article.from_dict(json.loads(cached))
+            else:
+                missing.append(article_id)
+        
+        if missing:
+            placeholders = ','.join('?' * len(missing))
+            rows = self.conn.execute(
+                f'SELECT id, payload FROM translations WHERE id IN ({placeholders})', missing
+            ).fetchall()
+            for article_id, payload in rows:
+                self.translation_lru.put(article_id, payload)
+                translations[article_id] = Article.from_dict(json.loads(payload))
+        
+        return translations
+    
+    def save_translations(self, articles: List[dict]):
+        """保存翻译结果（翻译失败、使用原文兜底的文章不保存，下次重新翻译）
+        
+        因预算不足没有翻译的字段（budget_skipped）不保存占位的译文，只保留标记，下次按需翻译。
+        """
+        rows = []
+        for article in articles:
+            if article.get('translation_failed'):
+                continue
+            payload = article.to_dict() if isinstance(article, Article) else dict(article)
+            for field in payload.get('budget_skipped', ()):
+                payload.pop(f"{field}_zh", None)
+            rows.append((article['id'], json.dumps(payload, ensure_ascii=False, default=json_default)))
+        
+        self.conn.executemany('''
+            INSERT OR REPLACE INTO translations (id, payload, translated_at)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+        ''', rows)
+        self.conn.commit()
+        
+        # 缓存序列化后的字符串，读出时各自反序列化，调用方修改不会污染缓存
+        for article_id, payload in rows:
+            self.translation_lru.put(article_id, payload)
+        logger.info(f"Saved {len(rows)} translations")
+    
+    def _cleanup_old_cache(self, cursor) -> int:
+        """清理过期的缓存，返回删除的文章条数（只从内存缓存中移除被删除的条目）"""
         cutoff_time = datetime.now() - timedelta(hours=self.retention_hours)
-        cursor.execute('''
-            DELETE FROM articles WHERE cached_at < ?
-        ''', (cutoff_time.isoformat(),))
+        expired = [row[0] for row in cursor.execute('''
+            SELECT id FROM articles WHERE cached_at < ?
+        ''', (cutoff_time.isoformat(),))]
+        if expired:
+            cursor.execute('''
+                DELETE FROM articles WHERE cached_at < ?
+            ''', (cutoff_time.isoformat(),))
+            logger.info(f"Cleaned up {len(expired)} old cache entries")
+            for article_id in expired:
+                self.seen_lru.discard(article_id)
+        
+        expired_translations = [row[0] for row in cursor.execute('''
+            SELECT id FROM translations WHERE translated_at < ?
+        ''', (cutoff_time.isoformat(),))]
+        if expired_translations:
+            cursor.execute('''
+                DELETE FROM translations WHERE translated_at < ?
+            ''', (cutoff_time.isoformat(),))
+            for article_id in expired_translations:
+                self.translation_lru.discard(article_id)
         
-        deleted = cursor.rowcount
-        if deleted > 0:
-            logger.info(f"Cleaned up {deleted} old cache entries")
+        return len(expired)
     
     def get_stats(self) -> dict:
         """获取缓存统计信息"""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
+        cursor = self.conn.cursor()
         
         cursor.execute('SELECT COUNT(*) FROM articles')
         total = cursor.fetchone()[0]
@@ -118,9 +281,20 @@ class NewsCache:
         ''')
         by_source = dict(cursor.fetchall())
         
-        conn.close()
+        cursor.execute('SELECT COUNT(*) FROM translations')
+        translated = cursor.fetchone()[0]
         
         return {
             'total_cached': total,
-            'by_source': by_source
+            'by_source': by_source,
+            'translated': translated,
+            'memory': {
+                'seen_lru': self.seen_lru.get_stats(),
+                'translation_lru': self.translation_lru.get_stats(),
+                'bloom': {
+                    'entries': self.bloom.count,
+                    'negatives': self.bloom_negatives,
+                    'false_positives': self.bloom_false_positives,
+                },
+            }
         }
@@ -1,16 +1,23 @@
+import hashlib
 import json
 import logging
 import os
+import queue
 import re
+import threading
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional
-
-import requests
-from dateutil import parser as date_parser
+from typing import Callable, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+CHUNK_SIZE = 64 * 1024
+
+
+class DownloadCancelled(Exception):
+    """另一个来源已经成功，放弃本次下载"""
+
 
 class GitHubDownloader:
     """从GitHub Actions Artifacts下载数据"""
@@ -21,28 +28,138 @@ class GitHubDownloader:
         self.owner = self.github_config.get('owner', '')
         self.repo = self.github_config.get('repo', '')
         self.token = os.environ.get('GITHUB_TOKEN', '')  # 可选，公开仓库不需要
+        # 对冲下载：主来源超过 hedge_delay 秒没有结果时启动下一个来源，取最先成功的结果
+        self.hedge = self.github_config.get('hedge', True)
+        self.hedge_delay = self.github_config.get('hedge_delay', 5)
+        self.last_sha256 = ''  # 最近一次下载的JSON文件SHA-256
+        self.stats: Dict = {}  # 最近一次下载：获胜来源和各来源耗时
     
     def download_latest(self) -> Optional[dict]:
         """下载最新的新闻数据"""
         logger.info("Fetching latest artifact from GitHub Actions...")
         
-        # 方法1: 通过GitHub API获取最新Artifacts
-        try:
-            return self._download_via_api()
-        except Exception as e:
-            logger.warning(f"API download failed: {e}")
+        sources = [
+            ('api', self._download_via_api),          # 方法1: 通过GitHub API获取最新Artifacts
+            ('nightly', self._download_via_nightly),  # 方法2: 通过nightly.link获取（公开仓库）
+        ]
+        if self.hedge:
+            result = self._download_hedged(sources)
+        else:
+            result = self._download_sequential(sources)
+        
+        if result is None:
+            # 方法3: 从本地文件读取（测试用，只在网络来源全部失败时使用）
+            start = time.monotonic()
+            result = self._download_local()
+            self._record('local', start, 'ok' if result else 'failed')
+            if result:
+                self.stats['winner'] = 'local'
+        
+        self._log_stats()
+        if result is None:
+            return None
+        data, self.last_sha256 = result
+        return data
+    
+    def _download_sequential(self, sources: list) -> Optional[Tuple[dict, str]]:
+        """依次尝试各来源"""
+        self.stats = {'winner': None, 'timings': {}}
+        for name, download in sources:
+            start = time.monotonic()
+            try:
+                result = download(threading.Event())
+                self._record(name, start, 'ok')
+                self.stats['winner'] = name
+                return result
+            except Exception as e:
+                self._record(name, start, 'failed')
+                logger.warning(f"{name} download failed: {e}")
+        return None
+    
+    def _download_hedged(self, sources: list) -> Optional[Tuple[dict, str]]:
+        """对冲下载：先启动第一个来源，hedge_delay 秒内没有结果（或已失败）再启动下一个，
+        取最先成功的结果并取消其余下载。落后的来源在后台线程中结束，不阻塞主流程。
+        """
+        self.stats = {'winner': None, 'timings': {}}
+        results: queue.Queue = queue.Queue()
+        cancel = threading.Event()
+        started: Dict[str, float] = {}
+        
+        def run(name: str, download: Callable):
+            try:
+                results.put((name, download(cancel), None))
+            except Exception as e:
+                results.put((name, None, e))
+        
+        def launch(index: int):
+            name, download = sources[index]
+            started[name] = time.monotonic()
+            if index:
+                logger.info(f"Starting hedged download from {name}")
+            threading.Thread(target=run, args=(name, download), name=f'download-{name}', daemon=True).start()
+        
+        launch(0)
+        next_index, pending = 1, 1
+        while pending:
+            wait = self.hedge_delay if next_index < len(sources) else None
+            try:
+                name, result, error = results.get(timeout=wait)
+            except queue.Empty:
+                launch(next_index)
+                next_index, pending = next_index + 1, pending + 1
+                continue
+            
+            pending -= 1
+            if result is not None:
+                cancel.set()
+                self._record(name, started[name], 'ok')
+                self.stats['winner'] = name
+                for other in started:
+                    if other not in self.stats['timings']:
+                        self._record(other, started[other], 'cancelled')
+                return result
+            
+            self._record(name, started[name], 'failed')
+            logger.warning(f"{name} download failed: {error}")
+            if next_index < len(sources):
+                # 失败时立即启动下一个来源，不必等到对冲延迟
+                launch(next_index)
+                next_index, pending = next_index + 1, pending + 1
+        return None
+    
+    def _record(self, name: str, start: float, outcome: str):
+        self.stats.setdefault('timings', {})[name] = {
+            'seconds': round(time.monotonic() - start, 2),
+            'outcome': outcome,
+        }
+    
+    def _log_stats(self):
+        timings = ', '.join(f"{name} {t['outcome']} in {t['seconds']}s"
+                            for name, t in self.stats.get('timings', {}).items())
+        logger.info(f"Download source: {self.stats.get('winner') or 'none'} ({timings})")
+    
+    def download_run(self, run_id, artifact_name: str = '', sha256: str = '') -> Optional[dict]:
+        """下载推送通知指定的run的数据，并校验JSON文件的SHA-256
         
-        # 方法2: 通过nightly.link获取（公开仓库）
+        指定run下载失败时回退到 download_latest()；回退得到的数据校验不一致时丢弃，
+        等待下一次推送或定时轮询。
+        """
+        logger.info(f"Fetching artifact {artifact_name or 'news-data-*'} from run {run_id}...")
         try:
-            return self._download_via_nightly()
+            data, self.last_sha256 = self._download_run_artifact(
+                run_id, self._api_headers(), threading.Event(), artifact_name, sha256)
+            return data
         except Exception as e:
-            logger.warning(f"Nightly.link download failed: {e}")
+            logger.warning(f"Download of run {run_id} failed: {e}, falling back to latest")
         
-        # 方法3: 从本地文件读取（测试用）
-        return self._download_local()
+        data = self.download_latest()
+        if data is not None and sha256 and self.last_sha256 != sha256:
+            logger.error(f"Fallback data does not match checksum of run {run_id}, ignoring")
+            return None
+        return data
     
-    def _download_via_api(self) -> Optional[dict]:
-        """通过GitHub API下载"""
+    def _api_headers(self) -> dict:
+        """GitHub API请求头"""
         if not self.owner or not self.repo:
             raise ValueError("GitHub owner and repo must be configured")
         
@@ -51,6 +168,29 @@ class GitHubDownloader:
         }
         if self.token:
             headers['Authorization'] = f'token {self.token}'
+        return headers
+    
+    @staticmethod
+    def _get(url: str, cancel: threading.Event, timeout: float, **kwargs) -> bytes:
+        """流式GET，每读一块检查一次取消标记，另一个来源成功后尽快放弃"""
+        import requests
+        
+        if cancel.is_set():
+            raise DownloadCancelled(url)
+        with requests.get(url, timeout=timeout, stream=True, **kwargs) as response:
+            response.raise_for_status()
+            chunks = []
+            for chunk in response.iter_content(CHUNK_SIZE):
+                if cancel.is_set():
+                    raise DownloadCancelled(url)
+                chunks.append(chunk)
+        return b''.join(chunks)
+    
+    def _download_via_api(self, cancel: threading.Event) -> Tuple[dict, str]:
+        """通过GitHub API下载"""
+        headers = self._api_headers()
+        
+        from dateutil import parser as date_parser
         
         # 获取最新workflow run
         runs_url = f'https://api.github.com/repos/{self.owner}/{self.repo}/actions/runs'
@@ -60,9 +200,7 @@ class GitHubDownloader:
             'status': 'success'
         }
         
-        response = requests.get(runs_url, headers=headers, params=params, timeout=30)
-        response.raise_for_status()
-        runs = response.json()['workflow_runs']
+        runs = json.loads(self._get(runs_url, cancel, 30, headers=headers, params=params))['workflow_runs']
         
         if not runs:
             raise ValueError("No successful runs found")
@@ -86,11 +224,14 @@ class GitHubDownloader:
         
         logger.info(f"Found successful run: {run_id} from {run_time}")
         
+        return self._download_run_artifact(run_id, headers, cancel)
+    
+    def _download_run_artifact(self, run_id, headers: dict, cancel: threading.Event,
+                               artifact_name: str = '', sha256: str = '') -> Tuple[dict, str]:
+        """下载指定run的news-data artifact（可指定名称和校验值）"""
         # 获取artifacts
         artifacts_url = f'https://api.github.com/repos/{self.owner}/{self.repo}/actions/runs/{run_id}/artifacts'
-        response = requests.get(artifacts_url, headers=headers, timeout=30)
-        response.raise_for_status()
-        artifacts = response.json()['artifacts']
+        artifacts = json.loads(self._get(artifacts_url, cancel, 30, headers=headers))['artifacts']
         
         if not artifacts:
             raise ValueError("No artifacts found")
@@ -98,38 +239,44 @@ class GitHubDownloader:
         # 找到news-data artifact
         news_artifact = None
         for artifact in artifacts:
-            if artifact['name'].startswith('news-data-'):
+            name = artifact['name']
+            if (name == artifact_name) if artifact_name else name.startswith('news-data-'):
                 news_artifact = artifact
                 break
         
         if not news_artifact:
-            raise ValueError("No news-data artifact found")
+            raise ValueError(f"No {artifact_name or 'news-data'} artifact found")
         
         # 下载artifact
         download_url = news_artifact['archive_download_url']
         logger.info(f"Downloading artifact: {news_artifact['name']}")
         
-        response = requests.get(download_url, headers=headers, timeout=60)
-        response.raise_for_status()
+        content = self._get(download_url, cancel, 60, headers=headers)
         
-        # 解压zip文件
+        data, digest = self._read_zip(content, sha256)
+        logger.info(f"✓ Successfully downloaded {len(data.get('articles', []))} articles")
+        return data, digest
+    
+    def _read_zip(self, content: bytes, sha256: str = '') -> Tuple[dict, str]:
+        """解压artifact，读取最新的JSON文件；给出sha256时校验文件内容。返回 (数据, SHA-256)"""
         import zipfile
         import io
         
-        with zipfile.ZipFile(io.BytesIO(response.content)) as z:
+        with zipfile.ZipFile(io.BytesIO(content)) as z:
             json_files = [f for f in z.namelist() if f.endswith('.json')]
             if not json_files:
                 raise ValueError("No JSON files in artifact")
             
             # 读取最新的JSON文件
             json_files.sort()
-            with z.open(json_files[-1]) as f:
-                data = json.load(f)
+            raw = z.read(json_files[-1])
         
-        logger.info(f"✓ Successfully downloaded {len(data.get('articles', []))} articles")
-        return data
+        digest = hashlib.sha256(raw).hexdigest()
+        if sha256 and digest != sha256:
+            raise ValueError(f"Checksum mismatch for {json_files[-1]}")
+        return json.loads(raw), digest
     
-    def _download_via_nightly(self) -> Optional[dict]:
+    def _download_via_nightly(self, cancel: threading.Event) -> Tuple[dict, str]:
         """通过nightly.link下载（适用于公开仓库）"""
         # nightly.link 是一个服务，可以直接下载GitHub Actions Artifacts
         # URL格式: https://nightly.link/{owner}/{repo}/workflows/{workflow}/{branch}/{artifact-name}.zip
@@ -140,30 +287,19 @@ class GitHubDownloader:
         url = f"https://nightly.link/{self.owner}/{self.repo}/workflows/fetch-news.yml/main/news-data.zip"
         
         logger.info(f"Trying nightly.link: {url}")
-        response = requests.get(url, timeout=60)
-        response.raise_for_status()
+        content = self._get(url, cancel, 60)
         
         # 解压并读取
-        import zipfile
-        import io
-        
-        with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-            json_files = [f for f in z.namelist() if f.endswith('.json')]
-            if not json_files:
-                raise ValueError("No JSON files")
-            
-            json_files.sort()
-            with z.open(json_files[-1]) as f:
-                data = json.load(f)
+        data, digest = self._read_zip(content)
         
         logger.info(f"✓ Downloaded via nightly.link: {len(data.get('articles', []))} articles")
-        return data
+        return data, digest
     
-    def _download_local(self) -> Optional[dict]:
+    def _download_local(self) -> Optional[Tuple[dict, str]]:
         """从本地文件读取（测试用）"""
         local_path = Path('test_data/news_sample.json')
         if local_path.exists():
             logger.info(f"Loading from local file: {local_path}")
-            with open(local_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            raw = local_path.read_bytes()
+            return json.loads(raw), hashlib.sha256(raw).hexdigest()
         return None
@@ -1,17 +1,66 @@
+import argparse
+import importlib
 import json
 import logging
 import os
+import signal
 import sys
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 
+_T0 = time.perf_counter()
+
 import yaml
 
+from cache.outbox import DeliveryOutbox
 from cache.sqlite_cache import NewsCache
 from fetcher.github_downloader import GitHubDownloader
+from models.article import Article
+from notifier.fanout import FanoutSender
 from notifier.feishu_bot import FeishuBot
+from receiver.push_receiver import PushReceiver
+from store.article_store import ArticleStore
 from translator.openai_translator import OpenAITranslator
 from utils.logger import setup_logger
+from utils.run_lock import run_lock
+
+# 按需加载的重型依赖（用于 --profile-startup 统计）
+HEAVY_MODULES = [
+    'requests',
+    'dateutil.parser',
+]
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='Bloomberg News Bot - Server Side')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='打印启动阶段的导入耗时分布后退出')
+    parser.add_argument('--serve', action='store_true',
+                        help='常驻运行，接收GitHub Actions推送的artifact就绪通知后立即处理')
+    return parser.parse_args()
+
+def profile_startup():
+    """打印导入耗时分布（入口模块 + 各个延迟加载的重型依赖）"""
+    rows = [('<entry point>', (time.perf_counter() - _T0) * 1000)]
+    
+    for name in HEAVY_MODULES:
+        if name in sys.modules:
+            rows.append((name, 0.0))
+            continue
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+            rows.append((name, (time.perf_counter() - start) * 1000))
+        except ImportError as e:
+            rows.append((f"{name} (unavailable: {e})", 0.0))
+    
+    width = max(len(name) for name, _ in rows)
+    print(f"{'module'.ljust(width)}  import ms")
+    for name, ms in rows:
+        print(f"{name.ljust(width)}  {ms:9.1f}")
+    print(f"{'total'.ljust(width)}  {sum(ms for _, ms in rows):9.1f}")
 
 def load_config():
     """加载配置文件"""
@@ -19,6 +68,78 @@ def load_config():
     with open(config_path, 'r', encoding='utf-8') as f:
         return yaml.safe_load(f)
 
+def process(config: dict, news_data: dict, cache: NewsCache) -> bool:
+    """去重、翻译、入库、发送；返回发件箱是否已清空
+    
+    cache 由调用方创建：常驻模式下整个进程共用一个，内存缓存层跨运行保留。
+    """
+    logger = logging.getLogger(__name__)
+    logger.info(f"Fetched {len(news_data['articles'])} articles")
+    articles = [Article.from_dict(a) for a in news_data['articles']]
+    
+    # 2. 检查缓存去重
+    logger.info("Step 2: Checking cache...")
+    outbox = DeliveryOutbox(config)
+    new_articles = cache.filter_new_articles(articles)
+    
+    # 上次已入队但尚未发送完的文章由发件箱负责重发，不再重复处理
+    pending_ids = outbox.pending_article_ids()
+    new_articles = [a for a in new_articles if a['id'] not in pending_ids]
+    
+    if not new_articles and not outbox.pending_count():
+        logger.info("No new articles.")
+        return True
+    
+    logger.info(f"Found {len(new_articles)} new articles")
+    
+    bot = FeishuBot(config)
+    sender = FanoutSender(bot, config)
+    
+    if new_articles:
+        # 3. 翻译文章（已翻译过且各字段都未变化的直接复用；否则只重新翻译变化的字段）
+        logger.info("Step 3: Translating articles...")
+        previous = cache.get_translations([a['id'] for a in new_articles])
+        translations = {a['id']: previous[a['id']] for a in new_articles
+                        if a['id'] in previous and a.get('field_hashes')
+                        and previous[a['id']].get('field_hashes') == a.get('field_hashes')
+                        and not previous[a['id']].get('budget_skipped')}
+        to_translate = [a for a in new_articles if a['id'] not in translations]
+        if to_translate:
+            translator = OpenAITranslator(config)
+            translated = translator.translate_articles(to_translate, previous)
+            cache.save_translations(translated)
+            translations.update({a['id']: a for a in translated})
+        translated_articles = [translations[a['id']] for a in new_articles]
+        logger.info(f"Translated {len(to_translate)} articles, reused {len(new_articles) - len(to_translate)} translations")
+        
+        # 写入历史文章库（供检索）
+        store = ArticleStore(config)
+        store.add_articles(translated_articles)
+        store.close()
+        
+        # 4. 渲染卡片并写入发件箱
+        logger.info("Step 4: Rendering cards into outbox...")
+        outbox.enqueue(sender.render(translated_articles, news_data['metadata']), translated_articles)
+    
+    # 5. 分批发送发件箱中的卡片（包括上次失败遗留的）
+    logger.info("Step 5: Sending to Feishu...")
+    delivered, remaining = outbox.drain(sender)
+    
+    if delivered:
+        # 6. 更新缓存
+        cache.add_articles(delivered)
+        logger.info(f"✓ {len(delivered)} articles delivered, cache updated")
+    
+    if remaining:
+        logger.error(f"✗ {remaining} cards not sent, will retry on next run")
+        return False
+    return True
+
+def lock_path(config: dict) -> str:
+    """处理流程互斥锁文件（与缓存数据库放在同一目录）"""
+    db_path = Path(config.get('cache', {}).get('db_path', 'data/cache/news_cache.db'))
+    return str(db_path.parent / 'pipeline.lock')
+
 def main():
     """主程序"""
     # 设置日志
@@ -33,51 +154,74 @@ def main():
     # 加载配置
     config = load_config()
     
-    # 1. 从GitHub拉取最新数据
-    logger.info("Step 1: Fetching data from GitHub...")
-    downloader = GitHubDownloader(config)
-    news_data = downloader.download_latest()
-    
-    if not news_data:
-        logger.error("Failed to fetch news data. Exiting.")
-        sys.exit(1)
-    
-    logger.info(f"Fetched {len(news_data['articles'])} articles")
-    
-    # 2. 检查缓存去重
-    logger.info("Step 2: Checking cache...")
-    cache = NewsCache(config)
-    new_articles = cache.filter_new_articles(news_data['articles'])
-    
-    if not new_articles:
-        logger.info("No new articles. Exiting.")
-        return
+    with run_lock(lock_path(config)):
+        # 1. 从GitHub拉取最新数据
+        logger.info("Step 1: Fetching data from GitHub...")
+        downloader = GitHubDownloader(config)
+        news_data = downloader.download_latest()
+        
+        if not news_data:
+            logger.error("Failed to fetch news data. Exiting.")
+            sys.exit(1)
+        
+        cache = NewsCache(config)
+        try:
+            ok = process(config, news_data, cache)
+        finally:
+            cache.close()
+        if not ok:
+            sys.exit(1)
     
-    logger.info(f"Found {len(new_articles)} new articles")
+    logger.info("=" * 50)
+    logger.info("Process completed successfully")
+    logger.info("=" * 50)
+
+def serve():
+    """常驻模式：收到artifact就绪通知后下载该run的数据并立即处理"""
+    setup_logger()
+    logger = logging.getLogger(__name__)
+    config = load_config()
+    # 整个进程共用一个NewsCache；sqlite3连接只能在创建它的线程中使用，在工作线程里首次处理时创建
+    cache = None
     
-    # 3. 翻译文章
-    logger.info("Step 3: Translating articles...")
-    translator = OpenAITranslator(config)
-    translated_articles = translator.translate_articles(new_articles)
-    logger.info(f"Translated {len(translated_articles)} articles")
+    def on_ready(notification: dict) -> bool:
+        """处理成功（发件箱已清空）时返回True"""
+        nonlocal cache
+        run_id = notification['run_id']
+        logger.info("=" * 50)
+        logger.info(f"Processing pushed run {run_id}")
+        with run_lock(lock_path(config)):
+            downloader = GitHubDownloader(config)
+            news_data = downloader.download_run(run_id, notification.get('artifact', ''),
+                                                notification.get('sha256', ''))
+            if not news_data:
+                logger.error(f"Failed to fetch data for run {run_id}, leaving it to the next poll")
+                return False
+            if cache is None:
+                cache = NewsCache(config)
+            if not process(config, news_data, cache):
+                return False
+            logger.info(f"Run {run_id} processed successfully")
+            return True
     
-    # 4. 发送到飞书
-    logger.info("Step 4: Sending to Feishu...")
-    bot = FeishuBot(config)
-    success = bot.send_news(translated_articles, news_data['metadata'])
+    receiver = PushReceiver(config, on_ready)
+    receiver.start()
     
-    if success:
-        logger.info("✓ News sent successfully")
-        # 5. 更新缓存
-        cache.add_articles(translated_articles)
-        logger.info("✓ Cache updated")
-    else:
-        logger.error("✗ Failed to send news")
-        sys.exit(1)
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    signal.signal(signal.SIGINT, lambda *_: stopped.set())
+    stopped.wait()
     
-    logger.info("=" * 50)
-    logger.info("Process completed successfully")
-    logger.info("=" * 50)
+    logger.info("Shutting down receiver...")
+    receiver.stop()
 
 if __name__ == '__main__':
-    main()
+    args = parse_args()
+    if args.profile_startup:
+        profile_startup()
+        sys.exit(0)
+    
+    if args.serve:
+        serve()
+    else:
+        main()
@@ -0,0 +1,115 @@
+import sys
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator
+
+# 文章字段（GitHub Actions 端与服务器端共用同一份定义，artifact JSON 即两端的约定）
+FIELDS = (
+    # 抓取
+    'id', 'title', 'summary', 'link', 'canonical_url', 'source', 'category', 'priority',
+    'published', 'author',
+    # 排序与全文爬取
+    'fetch_full_content', 'has_full_content', 'full_content',
+    # 内容修订
+    'field_hashes', 'revision',
+    # 翻译（服务器端）
+    'title_zh', 'summary_zh', 'full_content_zh', 'translation_failed', 'budget_skipped',
+)
+
+# 取值重复度高的字符串字段，驻留后所有文章共享同一个对象
+INTERNED_FIELDS = frozenset({'source', 'category', 'author'})
+
+
+class Article(MutableMapping):
+    """文章记录 - 固定字段的 __slots__ 对象，同时实现映射协议
+    
+    各阶段仍可按 article['title'] / article.get('summary', '') 读写，行为与原来的字典一致：
+    没有赋值过的字段视为不存在（get 返回默认值，序列化时省略）。写入未声明的字段会抛出 KeyError，
+    拼写错误在写入时就会暴露。读入的JSON中未声明的字段原样保存在 extra 中，序列化时写回。
+    """
+    
+    __slots__ = FIELDS + ('extra',)
+    
+    def __init__(self, **fields):
+        self.extra: Dict[str, Any] = {}
+        for key, value in fields.items():
+            self[key] = value
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Article':
+        """从artifact/检查点中的字典创建（未声明的字段放进 extra）"""
+        article = cls()
+        for key, value in data.items():
+            if key in _FIELD_SET:
+                article[key] = value
+            else:
+                article.extra[key] = value
+        return article
+    
+    def to_dict(self) -> dict:
+        """转换为可JSON序列化的字典（只包含已赋值的字段）"""
+        data = {}
+        for key in FIELDS:
+            try:
+                data[key] = getattr(self, key)
+            except AttributeError:
+                continue
+        data.update(self.extra)
+        return data
+    
+    def __getitem__(self, key: str) -> Any:
+        if key in _FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        return self.extra[key]
+    
+    def __setitem__(self, key: str, value: Any):
+        if key not in _FIELD_SET:
+            raise KeyError(f"Unknown article field: {key}")
+        if key in INTERNED_FIELDS and type(value) is str:
+            value = sys.intern(value)
+        setattr(self, key, value)
+    
+    def __delitem__(self, key: str):
+        if key in _FIELD_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        else:
+            del self.extra[key]
+    
+    def __iter__(self) -> Iterator[str]:
+        for key in FIELDS:
+            if hasattr(self, key):
+                yield key
+        yield from self.extra
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+    
+    def __contains__(self, key) -> bool:
+        if key in _FIELD_SET:
+            return hasattr(self, key)
+        return key in self.extra
+    
+    # 文章按身份比较（同一篇文章就是同一个对象），列表中查找不必逐字段比较
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+    
+    def copy(self) -> 'Article':
+        return Article.from_dict(self.to_dict())
+    
+    def __repr__(self) -> str:
+        return f"Article(id={self.get('id')!r}, source={self.get('source')!r}, title={(self.get('title') or '')[:40]!r})"
+
+
+_FIELD_SET = frozenset(FIELDS)
+
+
+def json_default(obj):
+    """json.dump 的 default 钩子：文章记录序列化为字典"""
+    if isinstance(obj, Article):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
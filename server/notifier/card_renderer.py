@@ -0,0 +1,115 @@
+import json
+import logging
+from datetime import datetime
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+# 预编译的元素模板（JSON片段），渲染时只做字符串填充，不再逐篇构建dict
+_DIV_TEMPLATE = '{"tag":"div","text":{"tag":"lark_md","content":%s}}'
+_HR = '{"tag":"hr"}'
+_CARD_TEMPLATE = (
+    '{"config":{"wide_screen_mode":true},'
+    '"header":{"title":{"tag":"plain_text","content":%s},"template":"blue"},'
+    '"elements":[%s]}'
+)
+
+# 飞书卡片内容上限约30KB，留出余量
+DEFAULT_MAX_CARD_BYTES = 28 * 1024
+
+
+def _quote(text: str) -> str:
+    """JSON字符串转义"""
+    return json.dumps(text, ensure_ascii=False)
+
+
+def _payload_size(fragment: str) -> int:
+    """片段放进消息体后的字节数（content字段会被再次JSON转义）"""
+    return len(json.dumps(fragment, ensure_ascii=False).encode('utf-8')) - 2
+
+
+class CardRenderer:
+    """飞书卡片渲染器 - 按字节大小自动分页"""
+    
+    def __init__(self, config: dict):
+        self.feishu_config = config.get('feishu', {})
+        self.max_card_bytes = self.feishu_config.get('max_card_bytes', DEFAULT_MAX_CARD_BYTES)
+        self.title = self.feishu_config.get('card_title', 'Bloomberg 财经新闻')
+    
+    def render(self, articles: List[dict], metadata: dict) -> List[str]:
+        """渲染文章列表，返回一张或多张卡片的JSON字符串（已按大小拆分）"""
+        heading = self._div(f"**📰 Bloomberg 财经早报 ({datetime.now().strftime('%m月%d日 %H:%M')})**")
+        footer = self._div(
+            f"📊 **来源分布：** {self._source_text(articles)}\n"
+            f"⏰ **更新时间：** {metadata.get('generated_at', 'Unknown')[:19]}"
+        )
+        
+        # 每张卡片的固定开销：卡片外壳 + 标题行 + 分隔线 + 底部统计 + 分页标记余量
+        shell = _CARD_TEMPLATE % (_quote(self.title + ' (00/00)'), '')
+        fixed = _payload_size(shell) + _payload_size(heading) + _payload_size(_HR) + _payload_size(footer) + 3
+        budget = self.max_card_bytes - fixed
+        
+        pages = []
+        current = []
+        used = 0
+        for i, article in enumerate(articles, 1):
+            block = self._article_block(article, i)
+            size = _payload_size(block) + 1  # 逗号
+            if current and used + size > budget:
+                pages.append(current)
+                current = []
+                used = 0
+            current.append(block)
+            used += size
+        if current or not pages:
+            pages.append(current)
+        
+        cards = []
+        for page_no, blocks in enumerate(pages, 1):
+            elements = [heading, _HR] + blocks
+            if page_no == len(pages):
+                elements.append(footer)
+            title = self.title if len(pages) == 1 else f"{self.title} ({page_no}/{len(pages)})"
+            cards.append(_CARD_TEMPLATE % (_quote(title), ','.join(elements)))
+        
+        if len(cards) > 1:
+            logger.info(f"Rendered {len(articles)} articles into {len(cards)} cards")
+        return cards
+    
+    def _div(self, content: str) -> str:
+        return _DIV_TEMPLATE % _quote(content)
+    
+    def _source_text(self, articles: List[dict]) -> str:
+        """统计来源"""
+        source_stats = {}
+        for article in articles:
+            source = article.get('source', 'unknown')
+            source_stats[source] = source_stats.get(source, 0) + 1
+        return ' | '.join([f"{k.title()}: {v}篇" for k, v in source_stats.items()])
+    
+    def _article_block(self, article: dict, index: int) -> str:
+        """单篇文章的元素片段（标题、摘要、全文摘要、分隔线），分页时不拆开"""
+        # 文章标题（带链接）
+        title_zh = article.get('title_zh', article['title'])
+        link = article['link']
+        source = article.get('source', '').upper()
+        
+        # 重要性标记
+        importance = '🔴' if index <= 3 else ('🟡' if index <= 6 else '⚪')
+        
+        parts = [self._div(f"{importance} **[{source}]** [{title_zh}]({link})")]
+        
+        # 摘要
+        summary_zh = article.get('summary_zh', article.get('summary', ''))
+        if summary_zh:
+            # 截断过长的摘要
+            if len(summary_zh) > 120:
+                summary_zh = summary_zh[:120] + "..."
+            parts.append(self._div(f"💡 {summary_zh}"))
+        
+        # 如果有全文，添加全文摘要
+        if article.get('has_full_content') and article.get('full_content_zh'):
+            parts.append(self._div(f"📄 *全文摘要：*{article['full_content_zh'][:200]}..."))
+        
+        parts.append(_HR)
+        return ','.join(parts)
@@ -0,0 +1,136 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Throttle:
+    """全局发送节流（所有群共享），避免触发飞书应用级限流"""
+    
+    def __init__(self, qps: float):
+        self.interval = 1.0 / qps if qps > 0 else 0.0
+        self.next_at = 0.0
+        self.lock = threading.Lock()
+    
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            wait = max(0.0, self.next_at - now)
+            self.next_at = max(now, self.next_at) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class FanoutSender:
+    """多群分发 - 每种文章组合只渲染一次，按群并发发送"""
+    
+    def __init__(self, bot, config: dict):
+        self.bot = bot
+        self.feishu_config = config.get('feishu', {})
+        self.max_parallel = self.feishu_config.get('max_parallel', 5)
+        self.throttle = _Throttle(self.feishu_config.get('rate_limit_qps', 20))
+        
+        chats = self.feishu_config.get('chats') or []
+        if not chats and bot.chat_id:
+            chats = [{'chat_id': bot.chat_id}]
+        self.chats = chats
+    
+    def deliver(self, articles: List[dict], metadata: dict) -> dict:
+        """分发到所有群，返回每个群的投递结果"""
+        return self.dispatch(self.render(articles, metadata))
+    
+    def render(self, articles: List[dict], metadata: dict) -> Dict[str, List[str]]:
+        """按群过滤并渲染卡片，相同的文章组合共用一份渲染结果；返回 chat_id -> 卡片列表"""
+        variants: Dict[tuple, List[str]] = {}
+        chat_cards = {}
+        for chat in self.chats:
+            selected = [a for a in articles if self._matches(a, chat)]
+            if not selected:
+                logger.info(f"No matching articles for chat {self._name(chat)}")
+                continue
+            key = tuple(a['id'] for a in selected)
+            if key not in variants:
+                variants[key] = self.bot.render(selected, metadata)
+            chat_cards[chat['chat_id']] = variants[key]
+        
+        logger.info(f"Rendered cards for {len(chat_cards)} chats ({len(variants)} distinct card variants)")
+        return chat_cards
+    
+    def dispatch(self, chat_cards: Dict[str, List[str]]) -> dict:
+        """有上限的并发发送；同一个群内的卡片按顺序发送。返回每个群的投递结果"""
+        report = {}
+        if not chat_cards:
+            return report
+        
+        # 先取一次令牌，避免各线程同时刷新
+        self.bot.ensure_token()
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_parallel, len(chat_cards))) as executor:
+            futures = {
+                executor.submit(self._deliver_chat, chat_id, cards): chat_id
+                for chat_id, cards in chat_cards.items()
+            }
+            for future in as_completed(futures):
+                report[futures[future]] = future.result()
+        
+        failed = [chat_id for chat_id, result in report.items() if not result['ok']]
+        logger.info(f"Fan-out complete: {len(report) - len(failed)} ok, {len(failed)} failed")
+        for chat_id in failed:
+            logger.error(f"  ✗ {chat_id}: {report[chat_id]['error']}")
+        
+        return report
+    
+    def _deliver_chat(self, chat_id: str, cards: List[str]) -> dict:
+        """向单个群发送全部卡片，记录耗时和失败"""
+        start = time.perf_counter()
+        sent = 0
+        error = None
+        
+        try:
+            for card in cards:
+                self.throttle.wait()
+                if not self.bot.send_card(card, chat_id):
+                    error = f"card {sent + 1}/{len(cards)} rejected"
+                    break
+                sent += 1
+        except Exception as e:
+            error = str(e)
+        
+        return {
+            'ok': error is None,
+            'cards': len(cards),
+            'sent': sent,
+            'latency_ms': round((time.perf_counter() - start) * 1000, 1),
+            'error': error,
+        }
+    
+    @staticmethod
+    def _name(chat: dict) -> str:
+        return chat.get('name') or chat['chat_id']
+    
+    @staticmethod
+    def _matches(article: dict, chat: dict) -> bool:
+        """按来源/分类/关键词过滤（未配置的条件视为不限）"""
+        sources = chat.get('sources')
+        if sources and article.get('source') not in sources:
+            return False
+        
+        categories = chat.get('categories')
+        if categories and article.get('category') not in categories:
+            return False
+        
+        keywords = chat.get('keywords')
+        if keywords:
+            text = ' '.join([
+                article.get('title', ''), article.get('summary', '') or '',
+                article.get('title_zh', '') or '', article.get('summary_zh', '') or '',
+            ]).lower()
+            if not any(keyword.lower() in text for keyword in keywords):
+                return False
+        
+        return True
@@ -1,14 +1,18 @@
 import json
 import logging
 import os
+import threading
 import time
 from datetime import datetime
 from typing import Dict, List
 
-import requests
+from notifier.card_renderer import CardRenderer
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_BASE_URL = 'https://open.feishu.cn/open-apis'
+RATE_LIMIT_CODE = 99991400
+
 
 class FeishuBot:
     """飞书机器人"""
@@ -16,25 +20,43 @@ class FeishuBot:
     def __init__(self, config: dict):
         self.config = config
         self.feishu_config = config.get('feishu', {})
+        self.base_url = self.feishu_config.get('base_url', DEFAULT_BASE_URL).rstrip('/')
         
         self.app_id = os.environ.get('FEISHU_APP_ID')
         self.app_secret = os.environ.get('FEISHU_APP_SECRET')
         self.chat_id = os.environ.get('FEISHU_CHAT_ID')
+        self.retry_count = self.feishu_config.get('retry_count', 3)
         
-        if not all([self.app_id, self.app_secret, self.chat_id]):
+        # 配置了多群分发（feishu.chats）时 FEISHU_CHAT_ID 可以不填
+        if not all([self.app_id, self.app_secret]) or not (self.chat_id or self.feishu_config.get('chats')):
             raise ValueError("Feishu credentials not set in environment variables")
         
         self.access_token = None
         self.token_expires_at = 0
+        self._token_lock = threading.Lock()
+        
+        self.renderer = CardRenderer(config)
+        
+        # 复用连接池：多张卡片连续发送时不重复建立TLS连接
+        import requests
+        self.session = requests.Session()
+    
+    def ensure_token(self):
+        """预先获取访问令牌（并发发送前调用一次，避免各线程同时刷新）"""
+        self._get_access_token()
     
     def _get_access_token(self) -> str:
-        """获取飞书访问令牌"""
+        """获取飞书访问令牌（多线程发送时只刷新一次）"""
+        with self._token_lock:
+            return self._refresh_access_token()
+    
+    def _refresh_access_token(self) -> str:
         if self.access_token and time.time() < self.token_expires_at:
             return self.access_token
         
-        url = 'https://open.feishu.cn/open-apis/auth/v3/app_access_token/internal'
+        url = f'{self.base_url}/auth/v3/app_access_token/internal'
         
-        response = requests.post(url, json={
+        response = self.session.post(url, json={
             'app_id': self.app_id,
             'app_secret': self.app_secret
         }, timeout=30)
@@ -42,7 +64,7 @@ class FeishuBot:
         response.raise_for_status()
         data = response.json()
         
-        if data.get('code') != 0:
+        if not isinstance(data, dict) or data.get('code') != 0:
             raise ValueError(f"Failed to get access token: {data}")
         
         self.access_token = data['app_access_token']
@@ -51,18 +73,48 @@ class FeishuBot:
         
         return self.access_token
     
-    def send_news(self, articles: List[dict], metadata: dict) -> bool:
-        """发送新闻到飞书"""
+    def render(self, articles: List[dict], metadata: dict) -> List[str]:
+        """渲染卡片（超过卡片大小上限时自动拆成多张），返回卡片JSON字符串列表"""
+        return self.renderer.render(articles, metadata)
+    
+    def send_news(self, articles: List[dict], metadata: dict, start: int = 0) -> int:
+        """按顺序发送新闻卡片，返回第一张未发送成功的卡片序号（全部成功时等于卡片数）
+        
+        某张卡片失败后不再发送后面的卡片；调用方重试时传入 start=返回值，已发送的卡片不会重复发送。
+        卡片渲染结果只由文章和metadata决定，重试时分页相同。
+        """
         if not articles:
             logger.info("No articles to send")
-            return True
+            return 0
         
-        token = self._get_access_token()
+        cards = self.render(articles, metadata)
+        for i in range(start, len(cards)):
+            if not self.send_card(cards[i]):
+                logger.error(f"Failed to send card {i + 1}/{len(cards)}, {len(cards) - i} cards left unsent")
+                return i
         
-        # 构建消息内容
-        message = self._build_message(articles, metadata)
+        return len(cards)
+    
+    def send_card(self, card: str, chat_id: str = None) -> bool:
+        """发送一张已渲染的卡片（card为卡片JSON字符串），被限流时按 retry_count 退避重试"""
+        chat_id = chat_id or self.chat_id
+        
+        for attempt in range(self.retry_count + 1):
+            ok, retry_after = self._post_card(card, chat_id)
+            if ok:
+                return True
+            if retry_after is None or attempt == self.retry_count:
+                return False
+            logger.warning(f"Feishu rate limited for {chat_id}, retrying in {retry_after:.1f}s")
+            time.sleep(retry_after)
+        
+        return False
+    
+    def _post_card(self, card: str, chat_id: str):
+        """调用发送消息接口，返回 (是否成功, 被限流时建议的等待秒数)"""
+        token = self._get_access_token()
         
-        url = 'https://open.feishu.cn/open-apis/im/v1/messages'
+        url = f'{self.base_url}/im/v1/messages'
         
         params = {
             'receive_id_type': 'chat_id'
@@ -70,126 +122,45 @@ class FeishuBot:
         
         headers = {
             'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json'
+            'Content-Type': 'application/json; charset=utf-8'
         }
         
         payload = {
-            'receive_id': self.chat_id,
+            'receive_id': chat_id,
             'msg_type': 'interactive',
-            'content': json.dumps(message)
+            'content': card
         }
         
         try:
-            response = requests.post(url, params=params, headers=headers, json=payload, timeout=30)
+            response = self.session.post(
+                url, params=params, headers=headers,
+                data=json.dumps(payload, ensure_ascii=False).encode('utf-8'),
+                timeout=30
+            )
+            
+            # 飞书限流：HTTP 429 或业务码 99991400，x-ogw-ratelimit-reset 给出重置秒数
+            if response.status_code == 429 or self._response_code(response) == RATE_LIMIT_CODE:
+                reset = response.headers.get('x-ogw-ratelimit-reset')
+                return False, float(reset) if reset and reset.isdigit() else 1.0
+            
             response.raise_for_status()
             data = response.json()
             
-            if data.get('code') == 0:
+            if isinstance(data, dict) and data.get('code') == 0:
                 logger.info(f"✓ Message sent successfully, message_id: {data.get('data', {}).get('message_id')}")
-                return True
+                return True, None
             else:
                 logger.error(f"Failed to send message: {data}")
-                return False
-                
+                return False, None
+        
         except Exception as e:
             logger.error(f"Error sending message: {e}")
-            return False
+            return False, None
     
-    def _build_message(self, articles: List[dict], metadata: dict) -> dict:
-        """构建飞书卡片消息"""
-        # 统计来源
-        source_stats = {}
-        for article in articles:
-            source = article.get('source', 'unknown')
-            source_stats[source] = source_stats.get(source, 0) + 1
-        
-        source_text = ' | '.join([f"{k.title()}: {v}篇" for k, v in source_stats.items()])
-        
-        # 构建卡片内容
-        elements = []
-        
-        # 标题
-        elements.append({
-            'tag': 'div',
-            'text': {
-                'tag': 'lark_md',
-                'content': f"**📰 Bloomberg 财经早报 ({datetime.now().strftime('%m月%d日 %H:%M')})**"
-            }
-        })
-        
-        elements.append({'tag': 'hr'})
-        
-        # 文章列表
-        for i, article in enumerate(articles[:10], 1):
-            # 文章标题（带链接）
-            title_zh = article.get('title_zh', article['title'])
-            link = article['link']
-            source = article.get('source', '').upper()
-            
-            # 重要性标记
-            importance = '🔴' if i <= 3 else ('🟡' if i <= 6 else '⚪')
-            
-            elements.append({
-                'tag': 'div',
-                'text': {
-                    'tag': 'lark_md',
-                    'content': f"{importance} **[{source}]** [{title_zh}]({link})"
-                }
-            })
-            
-            # 摘要
-            summary_zh = article.get('summary_zh', article.get('summary', ''))
-            if summary_zh:
-                # 截断过长的摘要
-                if len(summary_zh) > 120:
-                    summary_zh = summary_zh[:120] + "..."
-                
-                elements.append({
-                    'tag': 'div',
-                    'text': {
-                        'tag': 'lark_md',
-                        'content': f"💡 {summary_zh}"
-                    }
-                })
-            
-            # 如果有全文，添加折叠内容
-            if article.get('has_full_content') and article.get('full_content_zh'):
-                full_content = article['full_content_zh']
-                if len(full_content) > 500:
-                    full_content = full_content[:500] + "..."
-                
-                elements.append({
-                    'tag': 'div',
-                    'text': {
-                        'tag': 'lark_md',
-                        'content': f"📄 *全文摘要：*{full_content[:200]}..."
-                    }
-                })
-            
-            elements.append({'tag': 'hr'})
-        
-        # 底部统计
-        elements.append({
-            'tag': 'div',
-            'text': {
-                'tag': 'lark_md',
-                'content': f"📊 **来源分布：** {source_text}\n⏰ **更新时间：** {metadata.get('generated_at', 'Unknown')[:19]}"
-            }
-        })
-        
-        # 构建完整卡片
-        card = {
-            'config': {
-                'wide_screen_mode': True
-            },
-            'header': {
-                'title': {
-                    'tag': 'plain_text',
-                    'content': 'Bloomberg 财经新闻'
-                },
-                'template': 'blue'
-            },
-            'elements': elements
-        }
-        
-        return card
+    @staticmethod
+    def _response_code(response):
+        try:
+            data = response.json()
+        except ValueError:
+            return None
+        return data.get('code') if isinstance(data, dict) else None
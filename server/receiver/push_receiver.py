@@ -0,0 +1,163 @@
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 64 * 1024
+
+_STOP = None  # 工作队列结束标记
+
+
+def sign(secret: str, timestamp: str, body: bytes) -> str:
+    """通知签名：HMAC-SHA256(secret, "{timestamp}." + body)"""
+    message = timestamp.encode('utf-8') + b'.' + body
+    return 'sha256=' + hmac.new(secret.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+
+class PushReceiver:
+    """Artifact就绪通知接收端 - GitHub Actions上传数据后推送通知，服务器立即处理
+    
+    POST {path}，请求体为 {"run_id": ..., "artifact": ..., "sha256": ...}，
+    请求头 X-Newsbot-Timestamp / X-Newsbot-Signature 携带时间戳和HMAC签名；
+    时间戳偏差超过 max_skew 秒的请求视为重放并拒绝。通过校验的通知放入队列，
+    由单个工作线程依次处理，同一个run只处理一次：on_ready 返回False或抛出异常时撤销登记，
+    同一run重发的通知会再次处理。定时轮询（cron）保持不变，作为兜底。
+    """
+    
+    def __init__(self, config: dict, on_ready: Callable[[dict], bool],
+                 clock: Callable[[], float] = time.time):
+        receiver_config = config.get('receiver', {})
+        self.host = receiver_config.get('host', '127.0.0.1')
+        self.port = receiver_config.get('port', 8787)
+        self.path = receiver_config.get('path', '/artifact-ready')
+        self.max_skew = receiver_config.get('max_skew', 300)
+        self.secret = os.environ.get(receiver_config.get('secret_env', 'PUSH_SECRET'), '')
+        if not self.secret:
+            raise ValueError(f"{receiver_config.get('secret_env', 'PUSH_SECRET')} must be set to run the receiver")
+        
+        self.on_ready = on_ready
+        self.clock = clock
+        self._queue: queue.Queue = queue.Queue()
+        self._seen: OrderedDict = OrderedDict()  # 排队中、处理中和最近处理成功的 run_id
+        self._seen_lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._worker: Optional[threading.Thread] = None
+    
+    def verify(self, timestamp: str, signature: str, body: bytes) -> bool:
+        """校验时间戳和签名"""
+        try:
+            skew = abs(self.clock() - float(timestamp))
+        except (TypeError, ValueError):
+            return False
+        if skew > self.max_skew:
+            return False
+        return hmac.compare_digest(sign(self.secret, timestamp, body), signature or '')
+    
+    def accept(self, notification: dict) -> bool:
+        """登记通知；同一个run已在排队、处理中或已处理成功时返回False"""
+        run_id = str(notification['run_id'])
+        with self._seen_lock:
+            if run_id in self._seen:
+                return False
+            self._seen[run_id] = True
+            while len(self._seen) > 100:
+                self._seen.popitem(last=False)
+        self._queue.put(notification)
+        return True
+    
+    def _work(self):
+        """工作线程：依次处理通知，单次失败不影响后续通知"""
+        while True:
+            notification = self._queue.get()
+            if notification is _STOP:
+                return
+            try:
+                ok = self.on_ready(notification)
+            except Exception as e:
+                logger.error(f"Processing run {notification['run_id']} failed: {e}")
+                ok = False
+            if not ok:
+                # 处理失败：撤销登记，重发的通知可以再次处理
+                with self._seen_lock:
+                    self._seen.pop(notification['run_id'], None)
+    
+    def _make_handler(self):
+        receiver = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, status: int, payload: dict):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def do_GET(self):
+                if self.path == '/healthz':
+                    self._reply(200, {'status': 'ok', 'queued': receiver._queue.qsize()})
+                else:
+                    self._reply(404, {'error': 'not found'})
+            
+            def do_POST(self):
+                if self.path != receiver.path:
+                    self._reply(404, {'error': 'not found'})
+                    return
+                
+                length = int(self.headers.get('Content-Length') or 0)
+                if length <= 0 or length > MAX_BODY_BYTES:
+                    self._reply(413 if length > 0 else 400, {'error': 'invalid body size'})
+                    return
+                body = self.rfile.read(length)
+                
+                if not receiver.verify(self.headers.get('X-Newsbot-Timestamp', ''),
+                                       self.headers.get('X-Newsbot-Signature', ''), body):
+                    logger.warning(f"Rejected notification from {self.client_address[0]}: bad signature or timestamp")
+                    self._reply(401, {'error': 'invalid signature'})
+                    return
+                
+                try:
+                    notification = json.loads(body)
+                    notification['run_id'] = str(notification['run_id'])
+                except (ValueError, KeyError, TypeError):
+                    self._reply(400, {'error': 'run_id required'})
+                    return
+                
+                if receiver.accept(notification):
+                    logger.info(f"Artifact ready: run {notification['run_id']} "
+                               f"({notification.get('artifact') or 'news-data-*'})")
+                    self._reply(202, {'status': 'accepted'})
+                else:
+                    self._reply(200, {'status': 'duplicate'})
+            
+            def log_message(self, format, *args):
+                logger.debug(f"{self.client_address[0]} {format % args}")
+        
+        return Handler
+    
+    def start(self):
+        """后台启动HTTP服务和工作线程"""
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self.port = self._server.server_port
+        self._worker = threading.Thread(target=self._work, name='push-worker', daemon=True)
+        self._worker.start()
+        threading.Thread(target=self._server.serve_forever, name='push-receiver', daemon=True).start()
+        logger.info(f"Listening for artifact notifications on http://{self.host}:{self.port}{self.path}")
+    
+    def stop(self):
+        """停止接收，等待正在处理的通知完成"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        self._queue.put(_STOP)
+        if self._worker is not None:
+            self._worker.join()
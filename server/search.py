@@ -0,0 +1,66 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import yaml
+
+from store.article_store import ArticleStore
+
+
+def load_config():
+    """加载配置文件"""
+    config_path = Path(__file__).parent / 'config.yaml'
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='检索历史文章库')
+    parser.add_argument('query', nargs='?', default='', help='检索词（中英文均可，多个词为AND）；留空则按时间列出')
+    parser.add_argument('--source', help='按来源过滤，如 bloomberg')
+    parser.add_argument('--category', help='按分类过滤，如 markets')
+    parser.add_argument('--since', help='发布时间下限（ISO格式，如 2026-10-01）')
+    parser.add_argument('--until', help='发布时间上限（ISO格式，不含）')
+    parser.add_argument('--limit', type=int, default=20, help='返回条数')
+    parser.add_argument('--rank', action='store_true', help='按相关度排序（默认按入库时间倒序）')
+    parser.add_argument('--json', action='store_true', help='以JSON输出完整记录')
+    parser.add_argument('--stats', action='store_true', help='只输出库统计信息')
+    parser.add_argument('--optimize', action='store_true', help='合并FTS索引段（批量导入后执行）')
+    return parser.parse_args()
+
+
+def main():
+    """主程序"""
+    args = parse_args()
+    store = ArticleStore(load_config())
+    
+    if args.optimize:
+        store.optimize()
+    
+    if args.stats:
+        print(json.dumps(store.get_stats(), ensure_ascii=False, indent=2))
+        return
+    
+    filters = dict(source=args.source, category=args.category,
+                   since=args.since, until=args.until, limit=args.limit)
+    if args.query:
+        results = store.search(args.query, order='rank' if args.rank else 'recent', **filters)
+    else:
+        results = store.recent(**filters)
+    
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+    
+    for article in results:
+        published = (article.get('published') or '')[:16]
+        title = article.get('title_zh') or article.get('title')
+        print(f"{published:16}  [{(article.get('source') or '').upper()}] {title}")
+        print(f"{'':16}  {article.get('link')}")
+    print(f"{len(results)} results", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+import logging
+import re
+import sqlite3
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 中日韩文字
+_CJK_RE = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]')
+
+COLUMNS = [
+    'id', 'source', 'category', 'published', 'link', 'author',
+    'title', 'summary', 'full_content',
+    'title_zh', 'summary_zh', 'full_content_zh',
+]
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS articles (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    source TEXT,
+    category TEXT,
+    published TEXT,
+    link TEXT,
+    author TEXT,
+    title TEXT,
+    summary TEXT,
+    full_content TEXT,
+    title_zh TEXT,
+    summary_zh TEXT,
+    full_content_zh TEXT,
+    stored_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_articles_published ON articles(published);
+CREATE INDEX IF NOT EXISTS idx_articles_source_published ON articles(source, published);
+CREATE INDEX IF NOT EXISTS idx_articles_category_published ON articles(category, published);
+
+-- 英文：unicode61 + porter 词干；中文：trigram（子串匹配，不依赖分词）
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts_en USING fts5(
+    title, summary, full_content,
+    content='articles', content_rowid='seq',
+    tokenize='porter unicode61 remove_diacritics 2'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts_zh USING fts5(
+    title_zh, summary_zh, full_content_zh,
+    content='articles', content_rowid='seq',
+    tokenize='trigram'
+);
+
+-- 新插入的行由 _write_batch 按批整体写入索引（比逐行触发器快数倍），
+-- 更新和删除走触发器
+CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts_en(articles_fts_en, rowid, title, summary, full_content)
+        VALUES ('delete', old.seq, old.title, old.summary, old.full_content);
+    INSERT INTO articles_fts_zh(articles_fts_zh, rowid, title_zh, summary_zh, full_content_zh)
+        VALUES ('delete', old.seq, old.title_zh, old.summary_zh, old.full_content_zh);
+END;
+
+CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE ON articles BEGIN
+    INSERT INTO articles_fts_en(articles_fts_en, rowid, title, summary, full_content)
+        VALUES ('delete', old.seq, old.title, old.summary, old.full_content);
+    INSERT INTO articles_fts_zh(articles_fts_zh, rowid, title_zh, summary_zh, full_content_zh)
+        VALUES ('delete', old.seq, old.title_zh, old.summary_zh, old.full_content_zh);
+    INSERT INTO articles_fts_en(rowid, title, summary, full_content)
+        VALUES (new.seq, new.title, new.summary, new.full_content);
+    INSERT INTO articles_fts_zh(rowid, title_zh, summary_zh, full_content_zh)
+        VALUES (new.seq, new.title_zh, new.summary_zh, new.full_content_zh);
+END;
+'''
+
+
+class ArticleStore:
+    """文章历史库 - 保存原文和译文，FTS5全文检索（中英文）"""
+    
+    def __init__(self, config: dict):
+        self.config = config
+        self.store_config = config.get('store', {})
+        self.db_path = Path(self.store_config.get('db_path', 'data/store/articles.db'))
+        self.batch_size = self.store_config.get('batch_size', 5000)
+        
+        # 确保目录存在
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        self.conn = self._connect()
+        self.conn.executescript(SCHEMA)
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path))
+        conn.row_factory = sqlite3.Row
+        # WAL：写入时不阻塞查询；NORMAL 在WAL下足够安全且批量写入快得多
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+    
+    def close(self):
+        self.conn.close()
+    
+    def add_articles(self, articles: Iterable[dict]) -> int:
+        """批量写入文章（按ID去重，已存在的更新），返回写入条数"""
+        columns = ', '.join(COLUMNS)
+        placeholders = ', '.join('?' * len(COLUMNS))
+        updates = ', '.join(f'{c} = excluded.{c}' for c in COLUMNS if c != 'id')
+        sql = f'''
+            INSERT INTO articles ({columns}) VALUES ({placeholders})
+            ON CONFLICT(id) DO UPDATE SET {updates}
+        '''
+        
+        total = 0
+        batch = []
+        for article in articles:
+            batch.append(tuple(article.get(c) for c in COLUMNS))
+            if len(batch) >= self.batch_size:
+                total += self._write_batch(sql, batch)
+                batch = []
+        if batch:
+            total += self._write_batch(sql, batch)
+        
+        logger.info(f"Stored {total} articles in {self.db_path}")
+        return total
+    
+    def _write_batch(self, sql: str, rows: List[tuple]) -> int:
+        # 同一批内的重复ID只保留最后一条：否则第二条会对尚未写入索引的新行触发更新触发器，
+        # 之后整批写入索引时再写一次，FTS索引损坏
+        rows = list({row[0]: row for row in rows}.values())
+        # 每批一个事务，避免逐行提交
+        with self.conn:
+            last_seq = self.conn.execute('SELECT COALESCE(MAX(seq), 0) FROM articles').fetchone()[0]
+            self.conn.executemany(sql, rows)
+            # 新行的seq一定大于写入前的最大值，整批写入FTS索引
+            self.conn.execute('''
+                INSERT INTO articles_fts_en(rowid, title, summary, full_content)
+                SELECT seq, title, summary, full_content FROM articles WHERE seq > ?
+            ''', (last_seq,))
+            self.conn.execute('''
+                INSERT INTO articles_fts_zh(rowid, title_zh, summary_zh, full_content_zh)
+                SELECT seq, title_zh, summary_zh, full_content_zh FROM articles WHERE seq > ?
+            ''', (last_seq,))
+        return len(rows)
+    
+    def search(self, query: str, source: Optional[str] = None, category: Optional[str] = None,
+               since: Optional[str] = None, until: Optional[str] = None, limit: int = 20,
+               order: str = 'recent') -> List[dict]:
+        """全文检索；含中文的查询走中文索引，其余走英文索引
+        
+        order='recent' 按入库顺序倒序，命中前limit条即返回，百万级数据下也是毫秒级；
+        order='rank' 按bm25相关度排序，需要给所有命中打分，常见词会慢一些。
+        """
+        filters, params = self._filters(source, category, since, until)
+        query = query.strip()
+        
+        if _CJK_RE.search(query):
+            terms = query.split()
+            if all(len(term) >= 3 for term in terms):
+                return self._match('articles_fts_zh', terms, filters, params, limit, order)
+            # trigram 无法索引少于3个字的词，退化为LIKE扫描
+            return self._like(terms, filters, params, limit)
+        
+        return self._match('articles_fts_en', query.split(), filters, params, limit, order)
+    
+    def recent(self, source: Optional[str] = None, category: Optional[str] = None,
+               since: Optional[str] = None, until: Optional[str] = None, limit: int = 20) -> List[dict]:
+        """按发布时间倒序列出文章"""
+        filters, params = self._filters(source, category, since, until)
+        where = f"WHERE {' AND '.join(filters)}" if filters else ''
+        rows = self.conn.execute(f'''
+            SELECT * FROM articles a {where}
+            ORDER BY a.published DESC LIMIT ?
+        ''', params + [limit]).fetchall()
+        return [dict(row) for row in rows]
+    
+    def _match(self, table: str, terms: List[str], filters: List[str], params: list,
+               limit: int, order: str) -> List[dict]:
+        if not terms:
+            return []
+        # 每个词作为短语加引号，避免用户输入被当成FTS语法
+        match = ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+        conditions = [f'{table} MATCH ?'] + filters
+        rows = self.conn.execute(f'''
+            SELECT a.* FROM {table} f
+            JOIN articles a ON a.seq = f.rowid
+            WHERE {' AND '.join(conditions)}
+            ORDER BY {'f.rank' if order == 'rank' else 'f.rowid DESC'} LIMIT ?
+        ''', [match] + params + [limit]).fetchall()
+        return [dict(row) for row in rows]
+    
+    def _like(self, terms: List[str], filters: List[str], params: list, limit: int) -> List[dict]:
+        conditions = list(filters)
+        like_params = []
+        for term in terms:
+            conditions.append('(a.title_zh LIKE ? OR a.summary_zh LIKE ? OR a.full_content_zh LIKE ?)')
+            like_params.extend([f'%{term}%'] * 3)
+        rows = self.conn.execute(f'''
+            SELECT a.* FROM articles a
+            WHERE {' AND '.join(conditions)}
+            ORDER BY a.seq DESC LIMIT ?
+        ''', params + like_params + [limit]).fetchall()
+        return [dict(row) for row in rows]
+    
+    @staticmethod
+    def _filters(source, category, since, until):
+        filters, params = [], []
+        if source:
+            filters.append('a.source = ?')
+            params.append(source)
+        if category:
+            filters.append('a.category = ?')
+            params.append(category)
+        if since:
+            filters.append('a.published >= ?')
+            params.append(since)
+        if until:
+            filters.append('a.published < ?')
+            params.append(until)
+        return filters, params
+    
+    def optimize(self):
+        """合并FTS索引段（大批量导入后执行一次，查询更快）"""
+        with self.conn:
+            self.conn.execute("INSERT INTO articles_fts_en(articles_fts_en) VALUES ('optimize')")
+            self.conn.execute("INSERT INTO articles_fts_zh(articles_fts_zh) VALUES ('optimize')")
+    
+    def get_stats(self) -> dict:
+        """获取库统计信息"""
+        total = self.conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+        by_source = dict(self.conn.execute(
+            'SELECT source, COUNT(*) FROM articles GROUP BY source'
+        ).fetchall())
+        return {
+            'total_articles': total,
+            'by_source': by_source,
+        }
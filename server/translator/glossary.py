@@ -0,0 +1,161 @@
+from typing import Dict, Optional
+
+# 翻译系统提示词（所有请求共用，放在消息最前面，保证前缀逐字节一致）
+SYSTEM_PROMPT = """你是一个专业的金融新闻翻译助手，把彭博、路透、雅虎财经等英文财经新闻翻译成简体中文。
+翻译要求：
+1. 忠实原文，不增删信息，不加评论或解释；只输出译文本身，不要输出原文、引号或“译文：”等前缀。
+2. 术语、机构和人名以下方术语表为准，同一术语在所有文章中保持一致；术语表中没有的人名保留英文原文。
+3. 数字、百分比、货币金额和日期照原文保留（如 $2.5 billion 译为 25亿美元，0.25 percentage point 译为0.25个百分点）。
+4. 股票代码、指数代码和英文缩写（如 AAPL、S&P 500、GDP）可保留原文。
+5. 标题简洁有力，符合中文财经媒体的标题习惯；摘要和正文使用书面语，适当分段。
+6. 原文已经是中文时原样输出。"""
+
+# 金融术语表（英文 -> 中文），可在 openai.glossary 中补充或覆盖
+GLOSSARY = {
+    'Federal Reserve': '美联储',
+    'the Fed': '美联储',
+    'FOMC': '联邦公开市场委员会（FOMC）',
+    'Jerome Powell': '鲍威尔',
+    'European Central Bank': '欧洲央行',
+    'ECB': '欧洲央行',
+    'Christine Lagarde': '拉加德',
+    'Bank of England': '英国央行',
+    'Bank of Japan': '日本央行',
+    'BOJ': '日本央行',
+    "People's Bank of China": '中国人民银行',
+    'PBOC': '中国人民银行',
+    'Treasury Department': '美国财政部',
+    'Treasury Secretary': '财政部长',
+    'Treasuries': '美国国债',
+    'Treasury yields': '美债收益率',
+    '10-year yield': '10年期国债收益率',
+    'yield curve': '收益率曲线',
+    'inverted yield curve': '收益率曲线倒挂',
+    'basis points': '个基点',
+    'rate cut': '降息',
+    'rate hike': '加息',
+    'interest rates': '利率',
+    'federal funds rate': '联邦基金利率',
+    'quantitative easing': '量化宽松',
+    'quantitative tightening': '量化紧缩',
+    'balance sheet': '资产负债表',
+    'dot plot': '点阵图',
+    'hawkish': '鹰派',
+    'dovish': '鸽派',
+    'soft landing': '软着陆',
+    'hard landing': '硬着陆',
+    'stagflation': '滞胀',
+    'recession': '经济衰退',
+    'inflation': '通胀',
+    'disinflation': '通胀放缓',
+    'deflation': '通缩',
+    'core inflation': '核心通胀',
+    'consumer price index': '消费者价格指数（CPI）',
+    'CPI': 'CPI',
+    'producer price index': '生产者价格指数（PPI）',
+    'PCE': '个人消费支出（PCE）物价指数',
+    'gross domestic product': '国内生产总值（GDP）',
+    'nonfarm payrolls': '非农就业人数',
+    'jobs report': '就业报告',
+    'unemployment rate': '失业率',
+    'jobless claims': '初请失业金人数',
+    'retail sales': '零售销售',
+    'consumer confidence': '消费者信心',
+    'purchasing managers index': '采购经理人指数（PMI）',
+    'PMI': 'PMI',
+    'fiscal stimulus': '财政刺激',
+    'budget deficit': '预算赤字',
+    'debt ceiling': '债务上限',
+    'government shutdown': '政府停摆',
+    'tariffs': '关税',
+    'trade war': '贸易战',
+    'export controls': '出口管制',
+    'sanctions': '制裁',
+    'supply chain': '供应链',
+    'Wall Street': '华尔街',
+    'S&P 500': '标普500指数',
+    'Nasdaq 100': '纳斯达克100指数',
+    'Nasdaq Composite': '纳斯达克综合指数',
+    'Dow Jones Industrial Average': '道琼斯工业平均指数',
+    'Stoxx Europe 600': '斯托克欧洲600指数',
+    'Nikkei 225': '日经225指数',
+    'Hang Seng Index': '恒生指数',
+    'CSI 300': '沪深300指数',
+    'MSCI': '明晟（MSCI）',
+    'VIX': 'VIX波动率指数',
+    'bull market': '牛市',
+    'bear market': '熊市',
+    'correction': '回调',
+    'selloff': '抛售',
+    'rally': '上涨',
+    'record high': '历史新高',
+    'risk appetite': '风险偏好',
+    'safe haven': '避险资产',
+    'volatility': '波动性',
+    'short seller': '卖空者',
+    'short squeeze': '轧空',
+    'hedge fund': '对冲基金',
+    'private equity': '私募股权',
+    'venture capital': '风险投资',
+    'asset manager': '资产管理公司',
+    'sovereign wealth fund': '主权财富基金',
+    'investment-grade bonds': '投资级债券',
+    'high-yield bonds': '高收益债券',
+    'junk bonds': '垃圾债券',
+    'credit spreads': '信用利差',
+    'credit rating': '信用评级',
+    'downgrade': '下调评级',
+    'default': '违约',
+    'earnings': '财报',
+    'quarterly results': '季度业绩',
+    'revenue': '营收',
+    'net income': '净利润',
+    'earnings per share': '每股收益',
+    'guidance': '业绩指引',
+    'profit warning': '盈利预警',
+    'market capitalization': '市值',
+    'valuation': '估值',
+    'initial public offering': '首次公开募股（IPO）',
+    'IPO': 'IPO',
+    'share buyback': '股票回购',
+    'dividend': '股息',
+    'merger': '合并',
+    'acquisition': '收购',
+    'takeover bid': '收购要约',
+    'spinoff': '分拆',
+    'antitrust': '反垄断',
+    'regulators': '监管机构',
+    'Securities and Exchange Commission': '美国证券交易委员会（SEC）',
+    'SEC': '美国证券交易委员会（SEC）',
+    'dollar': '美元',
+    'euro': '欧元',
+    'yen': '日元',
+    'yuan': '人民币',
+    'Bloomberg Dollar Spot Index': '彭博美元即期指数',
+    'emerging markets': '新兴市场',
+    'crude oil': '原油',
+    'Brent crude': '布伦特原油',
+    'West Texas Intermediate': '西得克萨斯中质原油（WTI）',
+    'OPEC+': '欧佩克+',
+    'natural gas': '天然气',
+    'gold': '黄金',
+    'copper': '铜',
+    'commodities': '大宗商品',
+    'Bitcoin': '比特币',
+    'Ether': '以太币',
+    'stablecoin': '稳定币',
+    'cryptocurrency': '加密货币',
+    'exchange-traded fund': '交易所交易基金（ETF）',
+    'artificial intelligence': '人工智能',
+    'semiconductors': '半导体',
+    'chipmaker': '芯片制造商',
+    'Magnificent Seven': '七巨头',
+    'Big Tech': '大型科技公司',
+}
+
+
+def build_system_prompt(extra: Optional[Dict[str, str]] = None) -> str:
+    """系统提示词 + 术语表（内容固定，作为所有请求共用的前缀，命中服务端提示词缓存）"""
+    glossary = {**GLOSSARY, **(extra or {})}
+    lines = [f"{english} => {chinese}" for english, chinese in glossary.items()]
+    return f"{SYSTEM_PROMPT}\n\n术语表（英文 => 中文）：\n" + '\n'.join(lines)
@@ -1,15 +1,32 @@
 import logging
 import os
 import time
-from typing import Dict, List
+from typing import Dict, List, Optional
 
-import openai
+from translator.glossary import build_system_prompt
+from translator.prefilter import TranslationPrefilter
+from translator.token_budget import LEVEL_FIELDS, TokenBudgetPlanner
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_BASE_URL = 'https://api.openai.com/v1'
+
+# 各类文本的翻译指令（放在共用前缀之后）
+PROMPTS = {
+    'title': '将以下英文新闻标题翻译成中文，保持简洁准确：',
+    'summary': '将以下英文新闻摘要翻译成中文，控制在100字以内：',
+    'content': '将以下英文新闻内容翻译成中文，保持专业术语准确，适当分段：'
+}
+
 
 class OpenAITranslator:
-    """OpenAI翻译器"""
+    """OpenAI翻译器
+    
+    每个请求的消息都以同一条系统消息（翻译规则 + 金融术语表，超过1024 token）开头，
+    文本类型的指令和待翻译文本放在其后，使服务端提示词缓存对所有请求生效；
+    每次运行记录响应中命中缓存的输入token数。接口地址可配置（openai.base_url / OPENAI_BASE_URL），
+    可指向本地模拟服务做测试。
+    """
     
     def __init__(self, config: dict):
         self.config = config
@@ -20,113 +37,207 @@ class OpenAITranslator:
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable not set")
         
-        openai.api_key = api_key
+        self.base_url = (os.environ.get('OPENAI_BASE_URL')
+                         or self.openai_config.get('base_url', DEFAULT_BASE_URL)).rstrip('/')
+        self.prompt_cache_key = self.openai_config.get('prompt_cache_key', '')
+        
+        # 复用连接池：同一次运行的多次调用不重复建立TLS连接
+        import requests
+        self.session = requests.Session()
+        self.session.headers.update({'Authorization': f'Bearer {api_key}'})
+        
+        # 共用前缀：内容固定，每个请求逐字节相同
+        self.system_prompt = build_system_prompt(self.openai_config.get('glossary'))
         self.model = self.openai_config.get('model', 'gpt-4o-mini')
         self.max_tokens_title = self.openai_config.get('max_tokens_title', 100)
         self.max_tokens_summary = self.openai_config.get('max_tokens_summary', 300)
         self.max_tokens_content = self.openai_config.get('max_tokens_content', 1000)
+        self.planner = TokenBudgetPlanner(config)
+        self.planner.set_prefix(self.system_prompt)
+        self.prefilter = TranslationPrefilter()
     
-    def translate_articles(self, articles: List[dict]) -> List[dict]:
-        """翻译文章列表"""
+    def translate_articles(self, articles: List[dict],
+                           previous: Optional[Dict[str, dict]] = None) -> List[dict]:
+        """翻译文章列表
+        
+        previous 为同一文章ID的旧译文（文章ID -> 翻译后的文章）；字段哈希未变的字段直接复用旧译文。
+        """
+        previous = previous or {}
         translated = []
         
+        def reusable(article, field):
+            return self._reuse(article, previous.get(article['id']), field) is not None
+        
+        # 翻译前分析：已是中文、只有代码/数字、与标题或同批其他文章重复的字段不调用API
+        self.prefilter.analyze(articles, needs=lambda a, field: not reusable(a, field))
+        
+        # 按排序顺序分配本次运行的token预算：靠前的翻译全文，中间的翻译摘要，末尾只翻译标题
+        plan = self.planner.plan(
+            articles, needs=lambda a, field: not reusable(a, field) and self.prefilter.needs_call(a, field))
+        
         for i, article in enumerate(articles):
-            logger.info(f"Translating article {i+1}/{len(articles)}: {article['title'][:50]}...")
+            logger.info(f"Translating article {i+1}/{len(articles)} [{plan[article['id']]}]: {article['title'][:50]}...")
             
             try:
-                translated_article = self._translate_single(article)
+                calls = self.planner.actual['calls']
+                translated_article = self._translate_single(article, previous.get(article['id']),
+                                                            plan[article['id']])
                 translated.append(translated_article)
                 
-                # 避免速率限制
-                if i < len(articles) - 1:
+                # 避免速率限制（没有调用API的文章不必等待）
+                if i < len(articles) - 1 and self.planner.actual['calls'] > calls:
                     time.sleep(1)
-                    
+            
             except Exception as e:
                 logger.error(f"Error translating article: {e}")
                 # 如果翻译失败，使用原文
                 article['title_zh'] = article['title']
                 article['summary_zh'] = article.get('summary', '')
                 article['full_content_zh'] = article.get('full_content', '')
+                article['translation_failed'] = True
                 translated.append(article)
         
+        stats = self.planner.get_stats()
+        planned, actual = stats['planned'], stats['actual']
+        logger.info(f"Translation tokens: planned {planned['input_tokens']} in ({planned['cached_tokens']} cached) / "
+                   f"{planned['output_tokens']} out (${planned['cost']:.4f}), "
+                   f"actual {actual['input_tokens']} in ({actual['cached_tokens']} cached) / "
+                   f"{actual['output_tokens']} out (${actual['cost']:.4f}) in {actual['calls']} calls")
+        avoided = self.prefilter.avoided
+        logger.info(f"Translation calls avoided: {sum(avoided.values())} "
+                   f"({', '.join(f'{reason} {count}' for reason, count in avoided.items())})")
         return translated
     
-    def _translate_single(self, article: dict) -> dict:
-        """翻译单篇文章"""
+    def get_stats(self) -> dict:
+        """本次运行的token计划与实际用量，以及翻译前分析省下的API调用次数"""
+        stats = self.planner.get_stats()
+        stats['avoided_calls'] = {**self.prefilter.avoided, 'total': sum(self.prefilter.avoided.values())}
+        return stats
+    
+    @staticmethod
+    def _reuse(article: dict, previous: Optional[dict], field: str) -> Optional[str]:
+        """字段内容未变化时返回旧译文，否则返回None（上次因预算不足没有翻译的字段不复用）"""
+        if not previous or previous.get('translation_failed'):
+            return None
+        if field in previous.get('budget_skipped', ()):
+            return None
+        old_hash = previous.get('field_hashes', {}).get(field)
+        if old_hash is None or old_hash != article.get('field_hashes', {}).get(field):
+            return None
+        return previous.get(f"{field}_zh")
+    
+    def _translate_single(self, article: dict, previous: Optional[dict] = None,
+                          level: str = 'full') -> dict:
+        """翻译单篇文章（previous 为该文章修订前的译文，level 为预算规划给出的翻译级别）
+        
+        超出级别的字段不翻译：标题保留原文，摘要不写译文（卡片显示原文摘要），全文译文留空，
+        并记入 budget_skipped，预算充足的后续运行会重新翻译这些字段。
+        """
+        allowed = LEVEL_FIELDS[level]
+        skipped = []
+        
         # 翻译标题
-        title_zh = self._translate_text(
-            article['title'],
-            'title',
-            self.max_tokens_title
-        )
+        title_zh = self._reuse(article, previous, 'title')
+        if title_zh is None and 'title' not in allowed:
+            title_zh = article['title']
+            skipped.append('title')
+        elif title_zh is None:
+            title_zh = self._translate_field(
+                article, 'title', article['title'],
+                'title',
+                self.max_tokens_title
+            )
+        else:
+            self.prefilter.remember(article['title'], title_zh)
         
         # 翻译摘要
         summary = article.get('summary', '')
-        if summary:
-            summary_zh = self._translate_text(
-                summary,
-                'summary',
-                self.max_tokens_summary
-            )
-        else:
-            summary_zh = ''
+        summary_zh = self._reuse(article, previous, 'summary')
+        if summary_zh is None:
+            if summary and 'summary' not in allowed:
+                summary_zh = None
+                skipped.append('summary')
+            elif summary:
+                summary_zh = self._translate_field(
+                    article, 'summary', summary,
+                    'summary',
+                    self.max_tokens_summary
+                )
+            else:
+                summary_zh = ''
+        elif summary:
+            self.prefilter.remember(summary, summary_zh)
         
         # 翻译全文（如果有）
         full_content = article.get('full_content', '')
-        if full_content and article.get('has_full_content'):
-            # 截断过长的内容
-            if len(full_content) > 4000:
-                full_content = full_content[:4000] + "..."
-            
-            full_content_zh = self._translate_text(
-                full_content,
-                'content',
-                self.max_tokens_content
-            )
-        else:
-            full_content_zh = ''
+        full_content_zh = self._reuse(article, previous, 'full_content')
+        if full_content_zh is None:
+            if full_content and article.get('has_full_content') and 'full_content' in allowed:
+                full_content_zh = self._translate_field(
+                    article, 'full_content', full_content,
+                    'content',
+                    self.max_tokens_content
+                )
+            else:
+                if full_content and article.get('has_full_content'):
+                    skipped.append('full_content')
+                full_content_zh = ''
+        elif full_content:
+            self.prefilter.remember(full_content, full_content_zh)
         
         # 更新文章
         article['title_zh'] = title_zh
-        article['summary_zh'] = summary_zh
+        if summary_zh is not None:
+            article['summary_zh'] = summary_zh
         article['full_content_zh'] = full_content_zh
+        if skipped:
+            article['budget_skipped'] = skipped
+        else:
+            article.pop('budget_skipped', None)
         
         return article
     
+    def _translate_field(self, article: dict, field: str, text: str, text_type: str, max_tokens: int) -> str:
+        """翻译单个字段：翻译前分析能直接得到译文时不调用API，否则调用API并记录译文供重复字段复用"""
+        translation = self.prefilter.resolve(article, field, text)
+        if translation is not None:
+            return translation
+        
+        if field == 'full_content':
+            # 按token预算在段落边界截断过长的内容（按截断前的原文记录译文）
+            translation = self._translate_text(self.planner.trim_content(text), text_type, max_tokens)
+        else:
+            translation = self._translate_text(text, text_type, max_tokens)
+        self.prefilter.remember(text, translation)
+        return translation
+    
     def _translate_text(self, text: str, text_type: str, max_tokens: int) -> str:
         """调用OpenAI API翻译"""
         if not text:
             return ''
         
-        # 构建prompt
-        prompts = {
-            'title': '将以下英文新闻标题翻译成中文，保持简洁准确：',
-            'summary': '将以下英文新闻摘要翻译成中文，控制在100字以内：',
-            'content': '将以下英文新闻内容翻译成中文，保持专业术语准确，适当分段：'
+        prompt = PROMPTS.get(text_type, '翻译成中文：')
+        payload = {
+            'model': self.model,
+            'messages': [
+                # 共用前缀在最前，类型指令和正文在后，保证前缀可以被缓存
+                {'role': 'system', 'content': self.system_prompt},
+                {'role': 'user', 'content': f"{prompt}\n\n{text}"},
+            ],
+            'max_tokens': max_tokens,
+            'temperature': 0.3,
         }
-        
-        prompt = prompts.get(text_type, '翻译成中文：')
+        if self.prompt_cache_key:
+            payload['prompt_cache_key'] = self.prompt_cache_key
         
         try:
-            response = openai.ChatCompletion.create(
-                model=self.model,
-                messages=[
-                    {
-                        'role': 'system',
-                        'content': '你是一个专业的金融新闻翻译助手。请准确翻译，保持专业术语的一致性。'
-                    },
-                    {
-                        'role': 'user',
-                        'content': f"{prompt}\n\n{text}"
-                    }
-                ],
-                max_tokens=max_tokens,
-                temperature=0.3
-            )
-            
-            translated = response.choices[0].message.content.strip()
-            return translated
+            response = self.session.post(f'{self.base_url}/chat/completions', json=payload, timeout=60)
+            response.raise_for_status()
+            result = response.json()
             
+            self.planner.record(result.get('usage'))
+            return result['choices'][0]['message']['content'].strip()
+        
         except Exception as e:
             logger.error(f"OpenAI API error: {e}")
             raise
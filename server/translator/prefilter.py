@@ -0,0 +1,110 @@
+import re
+import unicodedata
+from typing import Callable, Dict, List, Optional, Tuple
+
+from translator.token_budget import LEVEL_FIELDS
+
+_HAN_RE = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]')
+_LATIN_RE = re.compile(r'[A-Za-z]')
+_WORD_RE = re.compile(r'\w+')
+
+# 股票/指数代码和数字：AAPL、BRK.B、7203.T、^GSPC、$TSLA、BTC-USD、+2.5%、$1.2B、2026-10-19
+_TICKER_OR_NUMBER_RE = re.compile(
+    r'(?:[$^]?[A-Z]{1,5}(?:[.-][A-Z0-9]{1,4})?'
+    r'|[$^]?\d{1,6}\.[A-Z]{1,2}'
+    r'|[-+±]?[$€£¥]?\d[\d,]*(?:\.\d+)?(?:%|[KMBT]n?|bp|bps)?'
+    r'|\d{4}-\d{2}-\d{2}'
+    r'|[-+/|:,()%]+)'
+)
+
+# 跳过API调用的原因
+REASONS = ('chinese', 'numeric', 'same_as_title', 'duplicate')
+
+
+def normalize(text: str) -> str:
+    """比较用的规范化文本：全角转半角、忽略大小写、只保留词字符"""
+    return ' '.join(_WORD_RE.findall(unicodedata.normalize('NFKC', text).casefold()))
+
+
+def is_chinese(text: str) -> bool:
+    """汉字占字母类字符（汉字+拉丁字母）的一半以上时视为已是中文"""
+    han = len(_HAN_RE.findall(text))
+    return han > 0 and han >= len(_LATIN_RE.findall(text))
+
+
+def is_ticker_or_numeric(text: str) -> bool:
+    """只由股票代码、数字、日期和符号组成，没有需要翻译的文字
+    
+    多个词时要求至少含一个数字，避免把 "US GDP" 这类全大写缩写标题当作代码。
+    """
+    tokens = text.split()
+    if not tokens or not all(_TICKER_OR_NUMBER_RE.fullmatch(token) for token in tokens):
+        return False
+    return len(tokens) == 1 or any(c.isdigit() for c in text)
+
+
+class TranslationPrefilter:
+    """翻译前分析 - 找出不需要调用API的字段
+    
+    - chinese / numeric：原文已是中文，或只有代码和数字，译文即原文
+    - same_as_title：摘要与标题规范化后相同，直接用标题译文
+    - duplicate：与同一批中排序更靠前的字段规范化后相同，复用其译文
+    
+    后两类依赖前面字段的译文（API翻译或复用的旧译文），文章按排序顺序翻译时前者总是先完成；
+    前者没有译文（超出预算或翻译失败）时照常调用API。analyze() 的结果同时用于预算规划，
+    avoided 按原因统计实际省下的调用次数。
+    """
+    
+    def __init__(self):
+        self.shortcuts: Dict[Tuple[str, str], str] = {}  # (文章ID, 字段) -> 原因
+        self.translations: Dict[str, str] = {}           # 规范化原文 -> 译文
+        self.avoided = {reason: 0 for reason in REASONS}
+    
+    def analyze(self, articles: List[dict], needs: Optional[Callable[[dict, str], bool]] = None):
+        """按排序顺序标记每个可以跳过API调用的 (文章ID, 字段)"""
+        needs = needs or (lambda article, field: True)
+        seen = set()
+        for article in articles:
+            title_key = normalize(article.get('title') or '')
+            for field in LEVEL_FIELDS['full']:
+                text = article.get(field) or ''
+                if not text or (field == 'full_content' and not article.get('has_full_content')):
+                    continue
+                key = normalize(text)
+                if not needs(article, field):
+                    seen.add(key)  # 可复用旧译文的字段同样可以作为后面重复字段的来源
+                    continue
+                reason = None
+                if is_chinese(text):
+                    reason = 'chinese'
+                elif not key or is_ticker_or_numeric(text):
+                    reason = 'numeric'
+                elif field == 'summary' and key == title_key:
+                    reason = 'same_as_title'
+                elif key in seen:
+                    reason = 'duplicate'
+                seen.add(key)
+                if reason:
+                    self.shortcuts[(article['id'], field)] = reason
+    
+    def needs_call(self, article: dict, field: str) -> bool:
+        """该字段是否需要调用API（用于预算规划）"""
+        return (article['id'], field) not in self.shortcuts
+    
+    def resolve(self, article: dict, field: str, text: str) -> Optional[str]:
+        """不调用API得到的译文；需要调用API时返回None"""
+        reason = self.shortcuts.get((article['id'], field))
+        if reason in ('chinese', 'numeric'):
+            translation = text
+        elif reason:
+            translation = self.translations.get(normalize(text))
+        else:
+            return None
+        if translation is not None:
+            self.avoided[reason] += 1
+        return translation
+    
+    def remember(self, text: str, translation: str):
+        """记录已有译文，供后面相同的字段复用"""
+        if text and translation:
+            self.translations.setdefault(normalize(text), translation)
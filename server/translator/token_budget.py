@@ -0,0 +1,198 @@
+import logging
+import math
+import re
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_CJK_RE = re.compile(r'[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]')
+
+# 翻译级别：从高到低依次降级
+LEVELS = ('full', 'summary', 'title', 'none')
+LEVEL_FIELDS = {
+    'full': ('title', 'summary', 'full_content'),
+    'summary': ('title', 'summary'),
+    'title': ('title',),
+    'none': (),
+}
+
+_encoder = None
+
+
+def count_tokens(text: str) -> int:
+    """本地估计token数：安装了tiktoken时精确计数，否则按 中日韩字符1个/其余约4字符1个 估算"""
+    global _encoder
+    if not text:
+        return 0
+    if _encoder is None:
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding('o200k_base')
+        except Exception:
+            _encoder = False
+    if _encoder:
+        return len(_encoder.encode(text))
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+class TokenBudgetPlanner:
+    """翻译token预算规划 - 按排序顺序分配每次运行的token/费用预算
+    
+    文章按artifact中的顺序（即GitHub Actions端的排序结果）处理：先给所有文章预留标题的预算，
+    再从排名最前的文章开始依次升级为 标题+摘要、标题+摘要+全文，预算用完即停；
+    连标题都放不下时从末尾开始不翻译（保留原文）。输出token按输入token × output_ratio 估算，
+    并以各字段的 max_tokens 为上限。运行结束后与API返回的实际用量对比记录。
+    """
+    
+    def __init__(self, config: dict, counter: Callable[[str], int] = count_tokens):
+        openai_config = config.get('openai', {})
+        budget_config = openai_config.get('budget', {})
+        self.counter = counter
+        self.max_tokens = budget_config.get('max_tokens_per_run', 0)  # 输入+输出，0为不限
+        self.max_cost = budget_config.get('max_cost_per_run', 0)      # 美元，0为不限
+        self.input_price = budget_config.get('input_price_per_1m', 0.15)
+        self.cached_input_price = budget_config.get('cached_input_price_per_1m', 0.075)
+        self.output_price = budget_config.get('output_price_per_1m', 0.60)
+        self.output_ratio = budget_config.get('output_ratio', 1.2)
+        self.max_content_tokens = budget_config.get('max_content_tokens', 1200)
+        self.max_output = {
+            'title': openai_config.get('max_tokens_title', 100),
+            'summary': openai_config.get('max_tokens_summary', 300),
+            'full_content': openai_config.get('max_tokens_content', 1000),
+        }
+        self.prompt_overhead = budget_config.get('prompt_overhead_tokens', 60)
+        self.prefix_tokens = 0  # 所有请求共用、可被服务端缓存的前缀（每次调用都计入输入token）
+        
+        self.planned = {'input_tokens': 0, 'cached_tokens': 0, 'output_tokens': 0, 'calls': 0, 'cost': 0.0}
+        self.actual = {'input_tokens': 0, 'cached_tokens': 0, 'output_tokens': 0, 'calls': 0}
+        self.levels = {level: 0 for level in LEVELS}
+    
+    def set_prefix(self, prefix: str):
+        """设置共用前缀（计入每次调用的输入token）"""
+        self.prefix_tokens = self.counter(prefix)
+    
+    def cached_estimate(self, calls: int) -> int:
+        """预计命中缓存的输入token：前缀达到1024 token时，第一次调用之后的前缀都按缓存计"""
+        if self.prefix_tokens < 1024 or calls <= 1:
+            return 0
+        return (calls - 1) * self.prefix_tokens
+    
+    def cost(self, input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float:
+        """费用（美元），命中缓存的输入token按缓存单价计"""
+        return ((input_tokens - cached_tokens) * self.input_price + cached_tokens * self.cached_input_price
+                + output_tokens * self.output_price) / 1e6
+    
+    def trim_content(self, text: str) -> str:
+        """全文按段落截断到 max_content_tokens 以内（单段超长时按比例截断字符）"""
+        if self.counter(text) <= self.max_content_tokens:
+            return text
+        kept, used = [], 0
+        for paragraph in text.split('\n'):
+            tokens = self.counter(paragraph) + 1
+            if used + tokens > self.max_content_tokens:
+                if not kept:
+                    ratio = self.max_content_tokens / tokens
+                    kept.append(paragraph[:int(len(paragraph) * ratio)])
+                break
+            kept.append(paragraph)
+            used += tokens
+        return '\n'.join(kept).rstrip() + '...'
+    
+    def field_cost(self, field: str, text: str):
+        """单个字段一次调用的 (输入token, 估计输出token)"""
+        if field == 'full_content':
+            text = self.trim_content(text)
+        tokens = self.counter(text)
+        output = min(self.max_output[field], math.ceil(tokens * self.output_ratio))
+        return self.prefix_tokens + self.prompt_overhead + tokens, output
+    
+    def _fits(self, input_tokens: int, output_tokens: int, calls: int) -> bool:
+        if self.max_tokens and input_tokens + output_tokens > self.max_tokens:
+            return False
+        if self.max_cost and self.cost(input_tokens, output_tokens, self.cached_estimate(calls)) > self.max_cost:
+            return False
+        return True
+    
+    def plan(self, articles: List[dict],
+             needs: Optional[Callable[[dict, str], bool]] = None) -> Dict[str, str]:
+        """返回 文章ID -> 翻译级别（full / summary / title / none）
+        
+        needs(article, field) 为False的字段（如可复用旧译文）不计入预算。
+        """
+        needs = needs or (lambda article, field: True)
+        costs = []
+        for article in articles:
+            field_costs = {}
+            for field in LEVEL_FIELDS['full']:
+                text = article.get(field) or ''
+                if field == 'full_content' and not article.get('has_full_content'):
+                    text = ''
+                field_costs[field] = self.field_cost(field, text) if text and needs(article, field) else (0, 0)
+            costs.append(field_costs)
+        
+        def level_cost(field_costs: dict, level: str):
+            """(输入token, 输出token, 调用次数)"""
+            fields = [field_costs[f] for f in LEVEL_FIELDS[level] if field_costs[f][0]]
+            return sum(f[0] for f in fields), sum(f[1] for f in fields), len(fields)
+        
+        # 1. 先按排序给标题预留预算，放不下的（排名靠后的）不翻译
+        levels = []
+        used_in = used_out = calls = 0
+        for field_costs in costs:
+            cost_in, cost_out, cost_calls = level_cost(field_costs, 'title')
+            if self._fits(used_in + cost_in, used_out + cost_out, calls + cost_calls):
+                levels.append('title')
+                used_in, used_out, calls = used_in + cost_in, used_out + cost_out, calls + cost_calls
+            else:
+                levels.append('none')
+        
+        # 2. 再按排序依次升级：能放下全文就翻译全文，否则尝试摘要
+        for i, (article, field_costs) in enumerate(zip(articles, costs)):
+            if levels[i] != 'title':
+                continue
+            base_in, base_out, base_calls = level_cost(field_costs, 'title')
+            has_content = article.get('has_full_content') and article.get('full_content')
+            for level in ('full', 'summary') if has_content else ('summary',):
+                cost_in, cost_out, cost_calls = level_cost(field_costs, level)
+                extra_in, extra_out, extra_calls = cost_in - base_in, cost_out - base_out, cost_calls - base_calls
+                if self._fits(used_in + extra_in, used_out + extra_out, calls + extra_calls):
+                    levels[i] = level
+                    used_in, used_out, calls = used_in + extra_in, used_out + extra_out, calls + extra_calls
+                    break
+        
+        plan = {}
+        for article, level in zip(articles, levels):
+            plan[article['id']] = level
+            self.levels[level] += 1
+        cached = self.cached_estimate(calls)
+        self.planned['input_tokens'] += used_in
+        self.planned['cached_tokens'] += cached
+        self.planned['output_tokens'] += used_out
+        self.planned['calls'] += calls
+        self.planned['cost'] += self.cost(used_in, used_out, cached)
+        
+        logger.info(f"Translation plan: {self.levels['full']} full, {self.levels['summary']} summary, "
+                   f"{self.levels['title']} title only, {self.levels['none']} untranslated; "
+                   f"{calls} calls, ~{used_in} input (~{cached} cached) + ~{used_out} output tokens "
+                   f"(${self.cost(used_in, used_out, cached):.4f})")
+        return plan
+    
+    def record(self, usage):
+        """记录一次API调用的实际用量（响应中的 usage）"""
+        if not usage:
+            return
+        self.actual['calls'] += 1
+        self.actual['input_tokens'] += usage.get('prompt_tokens', 0)
+        self.actual['cached_tokens'] += (usage.get('prompt_tokens_details') or {}).get('cached_tokens', 0)
+        self.actual['output_tokens'] += usage.get('completion_tokens', 0)
+    
+    def get_stats(self) -> dict:
+        """计划与实际用量"""
+        return {
+            'levels': dict(self.levels),
+            'planned': {**self.planned, 'cost': round(self.planned['cost'], 6)},
+            'actual': {**self.actual,
+                       'cost': round(self.cost(self.actual['input_tokens'], self.actual['output_tokens'],
+                                               self.actual['cached_tokens']), 6)},
+        }
@@ -0,0 +1,27 @@
+import fcntl
+import logging
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def run_lock(path: str = 'data/pipeline.lock'):
+    """进程间互斥锁 - 定时轮询与推送触发的处理流程不会同时运行
+    
+    使用 flock，进程退出时由内核自动释放，不会留下陈旧的锁。
+    """
+    lock_path = Path(path)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(str(lock_path), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            logger.info(f"Another run holds {lock_path}, waiting...")
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)